@@ -1,20 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from typing import List
+import asyncio
+import hashlib
+import json
 import os
 import shutil
+import uuid
 from backend.models.schemas import User, AnalysisResult
 from backend.services.analysis_service import AnalysisService
-from backend.api.auth import get_current_user
+from backend.services.auth_service import create_stream_token
+from backend.services.job_queue import PRIORITY_WEIGHTS, QueueFullError
+from backend.api.auth import get_current_user, verify_stream_token
+from backend.api.metrics import REGISTRY, render_header, render_histogram, render_sample
 from config.settings import settings
 from loguru import logger
 
 router = APIRouter(prefix="/analysis", tags=["analysis"])
 analysis_service = AnalysisService()
 
+@router.on_event("startup")
+def start_analysis_service():
+    # Resumes interrupted analyses now and on every heartbeat
+    analysis_service.start()
+
+@router.on_event("shutdown")
+def shutdown_analysis_service():
+    analysis_service.shutdown()
+
+@REGISTRY.register
+def collect_analysis_metrics():
+    """Queue depth, stage durations, annotation cache and inference latency for /metrics"""
+    queue = analysis_service.job_queue.stats()
+    lines = render_header("analysis_jobs_running", "gauge", "Analyses currently running")
+    lines.append(render_sample("analysis_jobs_running", queue["running"]))
+    lines += render_header("analysis_jobs_queued", "gauge", "Analyses waiting for a running slot")
+    lines.append(render_sample("analysis_jobs_queued", queue["queued"]))
+    lines += render_header("analysis_jobs_rejected_total", "counter", "Uploads rejected because the queue was full")
+    lines.append(render_sample("analysis_jobs_rejected_total", queue["rejected"]))
+
+    lines += render_header("analysis_event_subscribers", "gauge", "Open analysis event streams")
+    lines.append(render_sample("analysis_event_subscribers", analysis_service.events.subscriber_count()))
+
+    lines += render_header("analysis_stage_duration_seconds", "histogram", "Wall time of pipeline stages")
+    for stage, histograms in sorted(analysis_service.pipeline_stats().items()):
+        lines += render_histogram("analysis_stage_duration_seconds", histograms["wall_ms"], {"stage": stage}, scale=0.001)
+
+    cache = analysis_service.annotation_cache_stats()
+    if cache is not None:
+        lines += render_header("annotation_cache_hit_ratio", "gauge", "Share of annotation lookups served from cache")
+        lines.append(render_sample("annotation_cache_hit_ratio", cache["hit_ratio"]))
+        lines += render_header("annotation_cache_lookups_total", "counter", "Annotation cache lookups by result")
+        for result in ("memory_hits", "disk_hits", "misses"):
+            lines.append(render_sample("annotation_cache_lookups_total", cache[result], {"result": result}))
+
+    inference = analysis_service.inference_stats()
+    if inference["enabled"]:
+        lines += render_header("inference_latency_seconds", "histogram", "Queue wait plus scoring time of batched inference")
+        lines += render_histogram("inference_latency_seconds", inference["latency_ms"], scale=0.001)
+        lines += render_header("inference_batch_rows", "histogram", "Rows per batched model call")
+        lines += render_histogram("inference_batch_rows", inference["batch_size"])
+    return lines
+
+def _queue_full(error: QueueFullError) -> HTTPException:
+    return HTTPException(
+        status_code=429,
+        detail="Too many analyses in progress, please retry later",
+        headers={"Retry-After": str(error.retry_after)},
+    )
+
 @router.post("/upload", response_model=dict)
 async def upload_vcf(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
+    priority: str = Query("interactive", description="interactive or bulk"),
     current_user: User = Depends(get_current_user)
 ):
     """Upload VCF file and start analysis"""
@@ -22,14 +80,19 @@ async def upload_vcf(
     # Validate file
     if not file.filename.endswith('.vcf'):
         raise HTTPException(status_code=400, detail="Only VCF files are allowed")
+    if priority not in PRIORITY_WEIGHTS:
+        raise HTTPException(status_code=400, detail=f"priority must be one of {', '.join(PRIORITY_WEIGHTS)}")
 
     # Save file while enforcing max size. FastAPI's UploadFile does not provide a
     # reliable `size` attribute, so we stream the upload and count bytes.
     os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
-    file_path = os.path.join(settings.UPLOAD_DIR, f"{current_user.id}_{file.filename}")
+    # Unique per upload: a queued or resumed analysis must not see a later upload of the same name
+    file_path = os.path.join(settings.UPLOAD_DIR, f"{current_user.id}_{uuid.uuid4().hex}.vcf")
 
     max_size = settings.MAX_FILE_SIZE
     bytes_written = 0
+    # Hashed while streaming, so re-uploads can reuse earlier results
+    digest = hashlib.sha256()
 
     try:
         # Read in chunks from the UploadFile (async) and write to disk.
@@ -48,6 +111,7 @@ async def upload_vcf(
                         pass
                     raise HTTPException(status_code=400, detail="File too large")
                 buffer.write(chunk)
+                digest.update(chunk)
     except HTTPException:
         # Re-raise known HTTP exceptions
         raise
@@ -68,10 +132,31 @@ async def upload_vcf(
             pass
     
     # Create analysis record
-    analysis_id = await analysis_service.create_analysis(current_user.id, file.filename)
+    content_hash = digest.hexdigest()
+    analysis_id = await analysis_service.create_analysis(
+        current_user.id, file.filename, content_hash, file_path=file_path
+    )
+    
+    # Same file, pipeline and model as an earlier analysis of this user: reuse its results
+    cached_from = analysis_service.reuse_cached_result(analysis_id, content_hash, current_user.id)
+    if cached_from:
+        return {
+            "message": "File uploaded successfully",
+            "analysis_id": analysis_id,
+            "filename": file.filename,
+            "cached_from": cached_from
+        }
     
-    # Start background processing
-    background_tasks.add_task(analysis_service.process_vcf, analysis_id, file_path)
+    # Queue processing on the analysis executor; admission is only checked
+    # here so a re-upload served from the cache is never turned away
+    try:
+        analysis_service.submit_analysis(analysis_id, file_path, current_user.id, priority)
+    except QueueFullError as e:
+        # Queue is full
+        analysis_service.discard_analysis(analysis_id)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise _queue_full(e)
     
     return {
         "message": "File uploaded successfully",
@@ -95,8 +180,104 @@ async def get_analysis_results(
     if analysis.get('user_id') != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied")
     
+    position = analysis_service.queue_position(analysis_id)
+    if position is not None:
+        analysis['queue_position'] = position
+    
     return analysis
 
+TERMINAL_STATUSES = ("completed", "failed")
+# Comment lines keep idle connections open through proxies
+SSE_KEEPALIVE_SECONDS = 15
+# Stream tokens only need to outlive opening (or reopening) the stream
+STREAM_TOKEN_SECONDS = 60
+
+def _sse(event: dict) -> str:
+    return f"data: {json.dumps(event, default=str)}\n\n"
+
+@router.post("/results/{analysis_id}/events/token")
+async def create_events_token(
+    analysis_id: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Short-lived token for the event stream of one analysis
+    
+    EventSource cannot send an Authorization header and query strings end
+    up in access logs, so the stream takes this token instead of the
+    access token.
+    """
+    
+    analysis = await analysis_service.get_analysis(analysis_id)
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    if analysis.get('user_id') != current_user.id:
+        raise HTTPException(status_code=403, detail="Access denied")
+    
+    return {
+        "token": create_stream_token(current_user.id, analysis_id, STREAM_TOKEN_SECONDS),
+        "expires_in": STREAM_TOKEN_SECONDS
+    }
+
+@router.get("/results/{analysis_id}/events")
+async def stream_analysis_events(
+    analysis_id: str,
+    token: str = Query(..., description="Stream token from POST /results/{analysis_id}/events/token")
+):
+    """Server-sent events with the status and progress of an analysis
+    
+    The first event is the current state; the stream ends after the
+    analysis completes or fails. Updates come from this process's event
+    bus, and from the stored record whenever the stream has been idle for
+    SSE_KEEPALIVE_SECONDS (jobs running in another worker or replica).
+    """
+    
+    user_id = verify_stream_token(token, analysis_id)
+    
+    # Subscribe before reading the record so no update falls in between
+    subscription = analysis_service.events.subscribe(analysis_id)
+    try:
+        analysis = await analysis_service.get_analysis(analysis_id)
+        if not analysis:
+            raise HTTPException(status_code=404, detail="Analysis not found")
+        if analysis.get('user_id') != user_id:
+            raise HTTPException(status_code=403, detail="Access denied")
+    except HTTPException:
+        analysis_service.events.unsubscribe(subscription)
+        raise
+    
+    async def stream():
+        try:
+            snapshot = analysis_service.event_snapshot(analysis)
+            yield _sse(snapshot)
+            if snapshot["status"] in TERMINAL_STATUSES:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    # The job may run in another worker or replica, whose
+                    # events never reach this process: fall back to the record
+                    record = await analysis_service.get_analysis(analysis_id)
+                    if record is None:
+                        return
+                    latest = analysis_service.event_snapshot(record)
+                    if all(snapshot.get(field) == value for field, value in latest.items()):
+                        yield ": keepalive\n\n"
+                        continue
+                    event = latest
+                snapshot = {**snapshot, **event}
+                yield _sse(event)
+                if event.get("status") in TERMINAL_STATUSES:
+                    return
+        finally:
+            analysis_service.events.unsubscribe(subscription)
+    
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/history", response_model=List[AnalysisResult])
 async def get_analysis_history(
     current_user: User = Depends(get_current_user)
@@ -106,6 +287,30 @@ async def get_analysis_history(
     analyses = await analysis_service.get_user_analyses(current_user.id)
     return analyses
 
+@router.get("/inference/stats")
+async def get_inference_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Batch-size and latency histograms of batched risk scoring"""
+    
+    return analysis_service.inference_stats()
+
+@router.get("/pipeline/stats")
+async def get_pipeline_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Per-stage timing histograms of finished analyses"""
+    
+    return analysis_service.pipeline_stats()
+
+@router.get("/queue")
+async def get_queue_stats(
+    current_user: User = Depends(get_current_user)
+):
+    """Job queue totals and the current user's running and queued analyses"""
+    
+    return analysis_service.queue_stats(current_user.id)
+
 @router.delete("/results/{analysis_id}")
 async def delete_analysis(
     analysis_id: str,
@@ -126,8 +331,8 @@ async def delete_analysis(
     analysis_service._db.analyses.delete_one({"_id": analysis_id})
     
     # Delete associated file
-    file_path = os.path.join(settings.UPLOAD_DIR, f"{current_user.id}_{analysis.get('vcf_file')}")
-    if os.path.exists(file_path):
+    file_path = analysis.get('file_path')
+    if file_path and os.path.exists(file_path):
         os.remove(file_path)
     
     return {"message": "Analysis deleted successfully"}
\ No newline at end of file
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from backend.models.schemas import User, UserCreate, Token
-from backend.services.auth_service import create_user, authenticate_user, create_access_token, get_user_by_username
+from backend.services.auth_service import (
+    STREAM_TOKEN_SCOPE, create_user, authenticate_user, create_access_token, get_user_by_username
+)
 from jose import JWTError, jwt
 from config.settings import settings
 
@@ -28,6 +30,16 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
         raise credentials_exception
     return user
 
+def verify_stream_token(token: str, analysis_id: str) -> str:
+    """User ID of a stream token issued for `analysis_id` (see create_stream_token)"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        payload = {}
+    if payload.get("scope") != STREAM_TOKEN_SCOPE or payload.get("aid") != analysis_id or not payload.get("uid"):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired stream token")
+    return payload["uid"]
+
 @router.post("/register", response_model=User)
 async def register(user_data: UserCreate):
     user = await create_user(user_data)
@@ -0,0 +1,164 @@
+"""
+Prometheus metrics endpoint
+
+`install_metrics(app)` adds an ASGI middleware that records per-route
+request latency and in-flight requests, and serves everything registered in
+REGISTRY at GET /metrics in the Prometheus text exposition format. Services
+add their own metrics with `REGISTRY.register(collector)`, where the
+collector returns text lines built with the render helpers below; collectors
+only run when /metrics is scraped, so they cost nothing on hot paths.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from loguru import logger
+
+from backend.services.metrics import LATENCY_MS_BUCKETS, Histogram
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Collector = Callable[[], Iterable[str]]
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+def render_header(name: str, kind: str, help_text: str) -> List[str]:
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+
+
+def render_sample(name: str, value: float, labels: Optional[Dict[str, str]] = None) -> str:
+    return f"{name}{_labels(labels)} {value}"
+
+
+def render_histogram(name: str, snapshot: Dict, labels: Optional[Dict[str, str]] = None,
+                     scale: float = 1.0) -> List[str]:
+    """
+    Sample lines of one histogram
+
+    Args:
+        name: Metric name (without _bucket/_sum/_count)
+        snapshot: Histogram.snapshot() output
+        labels: Labels of this series
+        scale: Factor applied to bucket bounds and the sum (e.g. 0.001 for ms -> s)
+    """
+    labels = labels or {}
+    lines = []
+    for bound, count in snapshot["buckets"].items():
+        le = bound if bound == "+Inf" else repr(float(bound) * scale)
+        lines.append(render_sample(f"{name}_bucket", count, {**labels, "le": le}))
+    lines.append(render_sample(f"{name}_sum", snapshot["sum"] * scale, labels))
+    lines.append(render_sample(f"{name}_count", snapshot["count"], labels))
+    return lines
+
+
+class MetricsRegistry:
+    """Collectors rendered together at /metrics"""
+
+    def __init__(self):
+        self._collectors: List[Collector] = []
+        self._lock = threading.Lock()
+
+    def register(self, collector: Collector) -> Collector:
+        with self._lock:
+            self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        with self._lock:
+            collectors = list(self._collectors)
+        lines = []
+        for collector in collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                logger.warning(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class HttpMetrics:
+    """Request latency per (method, route, status) and in-flight request count"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self._latency: Dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, str(status))
+        histogram = self._latency.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._latency.setdefault(key, Histogram(LATENCY_MS_BUCKETS))
+        histogram.observe(seconds * 1000)
+
+    def collect(self) -> List[str]:
+        lines = render_header("http_requests_in_flight", "gauge", "Requests currently being served")
+        lines.append(render_sample("http_requests_in_flight", self.in_flight))
+        lines += render_header("http_request_duration_seconds", "histogram", "Request latency by route")
+        with self._lock:
+            series = list(self._latency.items())
+        for (method, route, status), histogram in sorted(series):
+            labels = {"method": method, "route": route, "status": status}
+            lines += render_histogram("http_request_duration_seconds", histogram.snapshot(), labels, scale=0.001)
+        return lines
+
+
+class PrometheusMiddleware:
+    """ASGI middleware feeding HttpMetrics (plain ASGI: no per-request task or body copy)"""
+
+    def __init__(self, app, metrics: HttpMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            # The router stores the matched route in the scope; label by its
+            # path template so /results/{analysis_id} is one series
+            route = scope.get("route")
+            metrics.observe(scope["method"], getattr(route, "path", "unmatched"), status,
+                            time.perf_counter() - started)
+
+
+def install_metrics(app: FastAPI, registry: MetricsRegistry = REGISTRY) -> HttpMetrics:
+    """Add request metrics middleware and the GET /metrics endpoint to `app`"""
+    http_metrics = HttpMetrics()
+    registry.register(http_metrics.collect)
+    app.add_middleware(PrometheusMiddleware, metrics=http_metrics)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
+
+    return http_metrics
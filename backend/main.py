@@ -2,6 +2,9 @@ from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
+from backend.api import analysis
+from backend.api import auth as analysis_auth
+from backend.api.metrics import install_metrics
 import hashlib
 import secrets
 from jose import jwt
@@ -10,6 +13,9 @@ import os
 
 app = FastAPI(title="GenomeGuard API", version="1.0.0")
 
+# Request metrics and GET /metrics (Prometheus text format)
+install_metrics(app)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -186,6 +192,11 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         print(f"Get user error: {e}")
         raise HTTPException(status_code=401, detail="Authentication failed")
 
+# Analysis API (upload, results, events, queue) with its startup/shutdown
+# hooks and /metrics collector; its routes accept the tokens issued above
+app.include_router(analysis.router)
+app.dependency_overrides[analysis_auth.get_current_user] = get_current_user
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=80)
\ No newline at end of file
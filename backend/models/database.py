@@ -36,11 +36,24 @@ def connect_to_mongo():
         
         db.database = db.client[settings.DATABASE_NAME]
         logger.info(f"✓ Connected to MongoDB: {settings.DATABASE_NAME}")
+        ensure_indexes(db.database)
         
     except Exception as e:
         logger.warning(f"MongoDB not available: {e}. Running without database.")
         # Don't raise - allow the app to run without MongoDB
 
+def ensure_indexes(database):
+    """Create indexes the services query by (no-op when they exist)"""
+    try:
+        # Lookup of the user's earlier results for re-uploaded files
+        database.analyses.create_index(
+            [("user_id", 1), ("content_hash", 1), ("pipeline_version", 1), ("model_version", 1), ("status", 1)]
+        )
+        # Periodic sweep for analyses whose owner stopped heartbeating
+        database.analyses.create_index([("status", 1), ("heartbeat_at", 1)])
+    except Exception as e:
+        logger.warning(f"Could not create indexes: {e}")
+
 def close_mongo_connection():
     """Close database connection"""
     if db.client:
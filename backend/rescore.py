@@ -0,0 +1,39 @@
+"""
+Re-score stored analyses with the current model
+
+Uses the feature vectors persisted on each completed analysis, so no VCF is
+re-parsed or re-annotated.
+
+Usage:
+    python -m backend.rescore [--force] [--batch-size N]
+"""
+
+import argparse
+import time
+
+from loguru import logger
+
+from backend.models.database import connect_to_mongo, get_database
+from backend.services.analysis_service import AnalysisService
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--force', action='store_true',
+                        help="also re-score analyses already scored by the current model version")
+    parser.add_argument('--batch-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    connect_to_mongo()
+    if get_database() is None:
+        logger.error("MongoDB is not available; nothing to re-score")
+        raise SystemExit(1)
+
+    service = AnalysisService(remote_annotation=False)
+    started = time.perf_counter()
+    total = service.rescore_all(force=args.force, batch_size=args.batch_size)
+    logger.info(f"Re-scored {total} analyses in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
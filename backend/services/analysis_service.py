@@ -1,20 +1,120 @@
-from datetime import datetime
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+import socket
+import threading
 import uuid
 import os
+import numpy as np
 from loguru import logger
+from pymongo import UpdateOne
 from backend.models.database import get_database
 from backend.models.schemas import AnalysisResult, AnalysisStatus
-from backend.services.ml_pipeline import MLPipeline
+from backend.services.batch_inference import BatchInferenceService
+from backend.services.events import AnalysisEventBus
+from backend.services.executor import create_executor, default_workers
+from backend.services.job_queue import AnalysisJobQueue, QueueFullError
+from backend.services.metrics import StageMetrics
+from backend.services.ml_pipeline import PIPELINE_VERSION, MLPipeline
+from backend.services.remote_annotation import RemoteAnnotationQueue
+from config.settings import settings
+from scripts.predict import score_features
+
+# Fields copied from an earlier analysis of the same file
+CACHED_RESULT_FIELDS = (
+    "total_variants", "high_risk_variants", "medium_risk_variants", "low_risk_variants",
+    "pathogenic_variants", "risk_probability", "risk_classification", "variants",
+    "features", "model_version", "remote_annotation_status",
+)
+
+# Fields pushed to event subscribers when they change
+EVENT_FIELDS = (
+    "status", "stage", "progress", "error_message", "total_variants",
+    "risk_probability", "risk_classification", "remote_annotation_status",
+)
 
 class AnalysisService:
-    def __init__(self):
+    def __init__(self, remote_annotation: bool = None, executor=None):
         self._db = get_database()
         # fallback in-memory store when DB is not available
         self._store = {}
+        if remote_annotation is None:
+            remote_annotation = settings.REMOTE_ANNOTATION
         # Initialize ML pipeline
-        self.ml_pipeline = MLPipeline()
+        self.ml_pipeline = MLPipeline(
+            defer_remote=remote_annotation,
+            max_deferred=settings.REMOTE_ANNOTATION_MAX_VARIANTS,
+            checkpoint=settings.ANALYSIS_CHECKPOINTS,
+            checkpoint_min_bytes=settings.ANALYSIS_CHECKPOINT_MIN_BYTES,
+            annotation_db=settings.ANNOTATION_DB,
+        )
+        # Concurrent analyses share batched model calls. Only pipelines on
+        # threads of this process can share a batcher: a worker process runs
+        # one analysis at a time, so a batcher there would only add
+        # max_wait_ms to every analysis. With the process executor, scoring
+        # is unbatched and isolation from the API's GIL is the tradeoff taken.
+        self.executor_kind = executor.kind if executor is not None else settings.ANALYSIS_EXECUTOR
+        self.batch_inference = None
+        if settings.INFERENCE_BATCHING and self.executor_kind == "thread":
+            self.batch_inference = BatchInferenceService(
+                self.ml_pipeline.model_registry.get,
+                max_batch_rows=settings.INFERENCE_MAX_BATCH_ROWS,
+                max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            )
+            self.ml_pipeline.batch_inference = self.batch_inference
+        # Region-only variants are upgraded with remote annotations after completion
+        self.remote_annotations = RemoteAnnotationQueue() if remote_annotation else None
+        # Pipeline workers (created on first use, see executor.py). Uploads and
+        # the recovery sweep both start pipelines, from different threads
+        self._executor = executor
+        self._executor_lock = threading.Lock()
+        self._pipeline_options = {
+            "defer_remote": remote_annotation,
+            "max_deferred": settings.REMOTE_ANNOTATION_MAX_VARIANTS,
+            "checkpoint": settings.ANALYSIS_CHECKPOINTS,
+            "checkpoint_min_bytes": settings.ANALYSIS_CHECKPOINT_MIN_BYTES,
+            "annotation_db": settings.ANNOTATION_DB,
+        }
+        # Analyses record the instance that queued them; it heartbeats them
+        # until they finish, so other instances can tell stuck ones apart.
+        # The same loop sweeps for analyses whose owner stopped heartbeating
+        self.instance_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._heartbeat_thread = None
+        self._heartbeat_lock = threading.Lock()
+        self._stopping = threading.Event()
+        # Status and progress updates for /results/{id}/events subscribers
+        self.events = AnalysisEventBus()
+        # Per-stage histograms from the spans of finished analyses
+        self.stage_metrics = StageMetrics()
+        # Bounded queue in front of the executor
+        self.job_queue = AnalysisJobQueue(
+            self._start_pipeline,
+            max_running=settings.ANALYSIS_MAX_CONCURRENT or settings.ANALYSIS_WORKERS or default_workers(),
+            max_queued=settings.ANALYSIS_MAX_QUEUED,
+        )
+    
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = create_executor(
+                        settings.ANALYSIS_EXECUTOR, settings.ANALYSIS_WORKERS,
+                        self.ml_pipeline, self._pipeline_options, progress=self._on_progress,
+                    )
+        return self._executor
+    
+    def shutdown(self):
+        """Stop pipeline workers and background loops"""
+        self._stopping.set()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        if self.remote_annotations is not None:
+            self.remote_annotations.shutdown()
+        if self.batch_inference is not None:
+            self.batch_inference.close()
 
-    async def create_analysis(self, user_id: str, filename: str) -> str:
+    async def create_analysis(self, user_id: str, filename: str, content_hash: str = None,
+                              file_path: str = None) -> str:
         analysis_id = str(uuid.uuid4())
         now = datetime.utcnow()
         record = {
@@ -31,6 +131,13 @@ class AnalysisService:
             "created_at": now,
             "completed_at": None,
             "error_message": None,
+            # sha256 of the uploaded file, for reusing results of re-uploads
+            "content_hash": content_hash,
+            "pipeline_version": PIPELINE_VERSION,
+            # Saved upload, so an interrupted analysis can be resumed
+            "file_path": file_path,
+            "owner": self.instance_id,
+            "heartbeat_at": now,
         }
 
         if self._db:
@@ -45,6 +152,68 @@ class AnalysisService:
 
         return analysis_id
 
+    def find_cached_result(self, content_hash: str, user_id: str):
+        """
+        Latest completed analysis of the same file by the current pipeline and model
+        
+        Only the user's own analyses are considered: a hit on someone else's
+        would tell the uploader that another user submitted the same genome.
+        
+        Args:
+            content_hash: sha256 of the uploaded file
+            user_id: Owner of the new upload
+        
+        Returns:
+            The analysis record, or None
+        """
+        query = {
+            "user_id": user_id,
+            "content_hash": content_hash,
+            "pipeline_version": PIPELINE_VERSION,
+            "model_version": self.ml_pipeline.model_registry.version,
+            "status": AnalysisStatus.COMPLETED.value,
+        }
+        # Results still waiting for remote annotations are not final yet
+        if self._db is not None:
+            try:
+                return self._db.analyses.find_one(
+                    {**query, "remote_annotation_status": {"$ne": "pending"}},
+                    sort=[("completed_at", -1)],
+                )
+            except Exception as e:
+                logger.warning(f"DB read failed: {e}")
+        matches = [
+            record for record in self._store.values()
+            if all(record.get(key) == value for key, value in query.items())
+            and record.get("remote_annotation_status") != "pending"
+        ]
+        return max(matches, key=lambda record: record["completed_at"], default=None)
+    
+    def reuse_cached_result(self, analysis_id: str, content_hash: str, user_id: str):
+        """
+        Complete a new analysis with the results of the user's identical earlier upload
+        
+        Returns:
+            ID of the analysis whose results were copied, or None if there is
+            no usable earlier result (the analysis must then be processed)
+        """
+        if not content_hash:
+            return None
+        self.ml_pipeline.model_registry.reload_if_changed()
+        source = self.find_cached_result(content_hash, user_id)
+        if source is None:
+            return None
+        
+        update_data = {field: source.get(field) for field in CACHED_RESULT_FIELDS if field in source}
+        update_data.update({
+            "status": AnalysisStatus.COMPLETED.value,
+            "completed_at": datetime.utcnow(),
+            "cached_from": source["_id"],
+        })
+        self._update_analysis(analysis_id, update_data)
+        logger.info(f"✓ Analysis {analysis_id} reused results of {source['_id']}")
+        return source["_id"]
+    
     async def get_analysis(self, analysis_id: str):
         if self._db:
             try:
@@ -72,7 +241,7 @@ class AnalysisService:
 
     def process_vcf(self, analysis_id: str, file_path: str):
         """
-        Process VCF file through complete ML pipeline
+        Process VCF file through complete ML pipeline in the calling thread
         1. Preprocess VCF
         2. Annotate variants
         3. Predict disease risk
@@ -86,58 +255,415 @@ class AnalysisService:
             self._update_status(analysis_id, AnalysisStatus.PROCESSING.value)
             
             # Run complete ML pipeline
-            results = self.ml_pipeline.process_vcf_file(file_path, analysis_id)
-            
-            # Check if pipeline succeeded
-            if results['status'] == 'completed':
-                # Update database with actual results
-                update_data = {
-                    "status": AnalysisStatus.COMPLETED.value,
-                    "completed_at": datetime.utcnow(),
-                    "total_variants": results['total_variants'],
-                    "high_risk_variants": results['high_risk_variants'],
-                    "pathogenic_variants": results['pathogenic_variants'],
-                    "risk_probability": results['risk_probability'],
-                    "risk_classification": results['risk_classification'],
-                    "error_message": None
-                }
-                
-                # Add optional fields if available
-                if 'medium_risk_variants' in results:
-                    update_data['medium_risk_variants'] = results['medium_risk_variants']
-                if 'low_risk_variants' in results:
-                    update_data['low_risk_variants'] = results['low_risk_variants']
-                
-                self._update_analysis(analysis_id, update_data)
-                
-                logger.info(f"✓ Analysis {analysis_id} completed successfully")
-                logger.info(f"  Total variants: {results['total_variants']}")
-                logger.info(f"  High risk: {results['high_risk_variants']}")
-                logger.info(f"  Risk: {results['risk_classification']} ({results['risk_probability']:.2%})")
-                
-            else:
-                # Pipeline failed
-                error_msg = results.get('error_message', 'Unknown pipeline error')
-                logger.error(f"Pipeline failed for {analysis_id}: {error_msg}")
+            results = self.ml_pipeline.process_vcf_file(
+                file_path, analysis_id, progress=lambda stage, percent: self._on_progress(analysis_id, stage, percent)
+            )
+            self._apply_results(analysis_id, results)
                 
+        except Exception as e:
+            self._fail_analysis(analysis_id, e)
+    
+    def submit_analysis(self, analysis_id: str, file_path: str, user_id: str = '',
+                        priority: str = 'interactive') -> Future:
+        """
+        Queue the analysis for the configured executor (see executor.py)
+        
+        Returns immediately; the analysis stays PENDING while it waits in the
+        job queue and results are written back in this process when the
+        pipeline finishes. Running slots are shared fairly between users,
+        weighted by priority class (see job_queue.py).
+        
+        Raises:
+            QueueFullError: if the job queue is full
+        """
+        future = self.job_queue.submit(analysis_id, file_path, user_id, priority)
+        future.add_done_callback(lambda f: self._on_pipeline_done(analysis_id, f))
+        self._ensure_heartbeat()
+        return future
+    
+    def start(self):
+        """Resume stuck analyses now and keep sweeping for them on every heartbeat
+        
+        An instance restarted within ANALYSIS_STALE_SECONDS still sees its
+        predecessor's heartbeats as fresh, so a single sweep at startup would
+        skip those analyses for good; the periodic sweep claims them once
+        they go stale.
+        """
+        if settings.ANALYSIS_RECOVERY:
+            self.recover_stuck_analyses()
+        self._ensure_heartbeat()
+    
+    def _ensure_heartbeat(self):
+        with self._heartbeat_lock:
+            if self._heartbeat_thread is not None:
+                return
+            self._heartbeat_thread = threading.Thread(
+                target=self._heartbeat_loop, name="analysis-heartbeat", daemon=True
+            )
+            self._heartbeat_thread.start()
+    
+    def _heartbeat_loop(self):
+        while not self._stopping.wait(settings.ANALYSIS_HEARTBEAT_SECONDS):
+            self._heartbeat()
+            if settings.ANALYSIS_RECOVERY:
+                try:
+                    self.recover_stuck_analyses()
+                except Exception as e:
+                    logger.warning(f"Recovery sweep failed: {e}")
+    
+    def _heartbeat(self):
+        """Mark this instance's queued and running analyses as alive"""
+        analysis_ids = self.job_queue.analysis_ids()
+        if not analysis_ids:
+            return
+        now = datetime.utcnow()
+        if self._db is not None:
+            try:
+                self._db.analyses.update_many(
+                    {"_id": {"$in": analysis_ids}, "owner": self.instance_id},
+                    {"$set": {"heartbeat_at": now}},
+                )
+            except Exception as e:
+                logger.warning(f"Heartbeat update failed: {e}")
+            return
+        for analysis_id in analysis_ids:
+            if analysis_id in self._store:
+                self._store[analysis_id]["heartbeat_at"] = now
+    
+    def recover_stuck_analyses(self) -> list:
+        """
+        Resume analyses left pending or processing by an instance that stopped
+        
+        An analysis is stuck when its owner has not heartbeated it for
+        ANALYSIS_STALE_SECONDS. Each one is claimed with a compare-and-set on
+        (owner, heartbeat_at), so when several instances start together only
+        one resumes it. The pipeline picks up its stage checkpoint, if any.
+        
+        Returns:
+            IDs of the analyses queued again
+        """
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.ANALYSIS_STALE_SECONDS)
+        resumed = []
+        for record in self._stuck_analyses(cutoff):
+            analysis_id = record["_id"]
+            if not self._claim_analysis(record):
+                continue
+            file_path = record.get("file_path")
+            if not file_path or not os.path.exists(file_path):
                 self._update_analysis(analysis_id, {
                     "status": AnalysisStatus.FAILED.value,
-                    "error_message": error_msg
+                    "error_message": "Analysis was interrupted and its upload is no longer available, please upload again",
                 })
-                
+                continue
+            try:
+                self.submit_analysis(analysis_id, file_path, record.get("user_id", ""))
+            except QueueFullError:
+                # Hand it back so the next sweep retries it
+                self._update_analysis(analysis_id, {"owner": record.get("owner"), "heartbeat_at": record.get("heartbeat_at")})
+                logger.warning("Job queue full, leaving remaining stuck analyses for the next recovery sweep")
+                break
+            resumed.append(analysis_id)
+        if resumed:
+            logger.info(f"Resumed {len(resumed)} interrupted analyses")
+        return resumed
+    
+    def _stuck_analyses(self, cutoff: datetime) -> list:
+        active = [AnalysisStatus.PENDING.value, AnalysisStatus.PROCESSING.value]
+        if self._db is not None:
+            try:
+                return list(self._db.analyses.find({
+                    "status": {"$in": active},
+                    "owner": {"$ne": self.instance_id},
+                    "$or": [{"heartbeat_at": {"$lt": cutoff}}, {"heartbeat_at": None}],
+                }))
+            except Exception as e:
+                logger.warning(f"DB read failed: {e}")
+                return []
+        return [
+            dict(record) for record in self._store.values()
+            if record["status"] in active
+            and record.get("owner") != self.instance_id
+            and (record.get("heartbeat_at") is None or record["heartbeat_at"] < cutoff)
+        ]
+    
+    def _claim_analysis(self, record: dict) -> bool:
+        """Take over a stuck analysis unless another instance already has"""
+        claim = {"owner": self.instance_id, "heartbeat_at": datetime.utcnow()}
+        if self._db is not None:
+            try:
+                return self._db.analyses.find_one_and_update(
+                    {"_id": record["_id"], "owner": record.get("owner"), "heartbeat_at": record.get("heartbeat_at")},
+                    {"$set": claim},
+                ) is not None
+            except Exception as e:
+                logger.warning(f"Could not claim analysis {record['_id']}: {e}")
+                return False
+        current = self._store.get(record["_id"])
+        if current is None or current.get("owner") != record.get("owner"):
+            return False
+        current.update(claim)
+        return True
+    
+    def _start_pipeline(self, analysis_id: str, file_path: str) -> Future:
+        """Called by the job queue when the analysis gets a running slot"""
+        logger.info(f"Starting analysis {analysis_id} on {self.executor.kind} executor")
+        self._update_status(analysis_id, AnalysisStatus.PROCESSING.value)
+        return self.executor.run_pipeline(file_path, analysis_id)
+    
+    def event_snapshot(self, analysis: dict) -> dict:
+        """Current state of an analysis record in the shape of its events"""
+        event = {field: analysis[field] for field in EVENT_FIELDS if field in analysis}
+        event["analysis_id"] = analysis.get("_id")
+        position = self.queue_position(event["analysis_id"])
+        if position is not None:
+            event["queue_position"] = position
+        return event
+    
+    def queue_position(self, analysis_id: str):
+        """Place of the analysis in the job queue (0 = running, None = not queued)"""
+        return self.job_queue.position(analysis_id)
+    
+    def queue_stats(self, user_id: str):
+        """Job queue totals plus the running and queued analyses of one user"""
+        stats = self.job_queue.stats()
+        stats.pop('users')
+        stats['user'] = self.job_queue.user_counts(user_id)
+        return stats
+    
+    def discard_analysis(self, analysis_id: str):
+        """Remove an analysis record that was never queued"""
+        if self._db is not None:
+            try:
+                self._db.analyses.delete_one({"_id": analysis_id})
+            except Exception as e:
+                logger.warning(f"DB delete failed: {e}")
+        self._store.pop(analysis_id, None)
+    
+    def _on_progress(self, analysis_id: str, stage: str, percent: int):
+        """Stage progress reported by the executor"""
+        self._update_analysis(analysis_id, {"stage": stage, "progress": percent})
+    
+    def _publish(self, analysis_id: str, update_data: dict):
+        event = {field: update_data[field] for field in EVENT_FIELDS if field in update_data}
+        if event:
+            self.events.publish(analysis_id, {"analysis_id": analysis_id, **event})
+    
+    def _on_pipeline_done(self, analysis_id: str, future: Future):
+        try:
+            self._apply_results(analysis_id, future.result())
         except Exception as e:
-            error_msg = f"Processing error: {str(e)}"
-            logger.error(f"Failed to process {analysis_id}: {error_msg}")
+            self._fail_analysis(analysis_id, e)
+    
+    def _apply_results(self, analysis_id: str, results: dict):
+        """Write pipeline results to the analysis record"""
+        stages = results.get('stages') or []
+        self.stage_metrics.record(stages)
+        # Check if pipeline succeeded
+        if results['status'] == 'completed':
+            # Update database with actual results
+            update_data = {
+                "status": AnalysisStatus.COMPLETED.value,
+                "completed_at": datetime.utcnow(),
+                "total_variants": results['total_variants'],
+                "high_risk_variants": results['high_risk_variants'],
+                "pathogenic_variants": results['pathogenic_variants'],
+                "risk_probability": results['risk_probability'],
+                "risk_classification": results['risk_classification'],
+                # Kept so later models can re-score without re-parsing the VCF
+                "features": results.get('features'),
+                "model_version": results.get('model_version'),
+                "stages": stages,
+                "progress": 100,
+                "error_message": None
+            }
+            
+            # Add optional fields if available
+            if 'medium_risk_variants' in results:
+                update_data['medium_risk_variants'] = results['medium_risk_variants']
+            if 'low_risk_variants' in results:
+                update_data['low_risk_variants'] = results['low_risk_variants']
+            
+            deferred = results.get('deferred_variants') or []
+            if deferred:
+                # Complete with local annotations now, upgrade them later
+                update_data['variants'] = deferred
+                update_data['remote_annotation_status'] = (
+                    'pending' if self.remote_annotations else 'disabled'
+                )
             
-            import traceback
-            logger.error(traceback.format_exc())
+            self._update_analysis(analysis_id, update_data)
+            
+            if deferred and self.remote_annotations:
+                self.remote_annotations.submit(analysis_id, deferred, self._apply_remote_annotations)
+            
+            logger.info(f"✓ Analysis {analysis_id} completed successfully")
+            logger.info(f"  Total variants: {results['total_variants']}")
+            logger.info(f"  High risk: {results['high_risk_variants']}")
+            logger.info(f"  Risk: {results['risk_classification']} ({results['risk_probability']:.2%})")
+            
+        else:
+            # Pipeline failed
+            error_msg = results.get('error_message', 'Unknown pipeline error')
+            logger.error(f"Pipeline failed for {analysis_id}: {error_msg}")
             
-            # Update status to FAILED
             self._update_analysis(analysis_id, {
                 "status": AnalysisStatus.FAILED.value,
+                "stages": stages,
                 "error_message": error_msg
             })
     
+    def _fail_analysis(self, analysis_id: str, error: Exception):
+        error_msg = f"Processing error: {str(error)}"
+        logger.error(f"Failed to process {analysis_id}: {error_msg}")
+        
+        import traceback
+        logger.error(''.join(traceback.format_exception(error)))
+        
+        # Update status to FAILED
+        self._update_analysis(analysis_id, {
+            "status": AnalysisStatus.FAILED.value,
+            "error_message": error_msg
+        })
+    
+    def rescore_all(self, model=None, model_version: str = None, force: bool = False,
+                    batch_size: int = 100_000) -> int:
+        """
+        Re-score completed analyses from their stored feature vectors
+        
+        Feature vectors are loaded in batches of `batch_size` rows, scored with
+        one vectorized model call per batch and written back with unordered
+        bulk updates. No VCF is re-parsed.
+        
+        Args:
+            model: Model to score with (default: current registry model)
+            model_version: Version recorded on re-scored analyses
+            force: Also re-score analyses already scored by `model_version`
+            batch_size: Analyses per scoring call / bulk write
+            
+        Returns:
+            Number of analyses re-scored
+        """
+        if model is None:
+            model, model_version = self.ml_pipeline.model_registry.current()
+        
+        query = {"status": AnalysisStatus.COMPLETED.value, "features": {"$type": "array"}}
+        if not force and model_version:
+            query["model_version"] = {"$ne": model_version}
+        
+        if self._db is not None:
+            records = self._db.analyses.find(query, {"features": 1}).batch_size(10_000)
+        else:
+            records = (
+                r for r in self._store.values()
+                if r.get("status") == AnalysisStatus.COMPLETED.value and r.get("features")
+                and (force or not model_version or r.get("model_version") != model_version)
+            )
+        
+        total = 0
+        ids, rows = [], []
+        for record in records:
+            ids.append(record["_id"])
+            rows.append(record["features"])
+            if len(ids) >= batch_size:
+                total += self._rescore_batch(ids, rows, model, model_version)
+                ids, rows = [], []
+        if ids:
+            total += self._rescore_batch(ids, rows, model, model_version)
+        
+        logger.info(f"Re-scored {total} analyses with model {model_version}")
+        return total
+    
+    def _rescore_batch(self, ids, rows, model, model_version) -> int:
+        X = np.array(rows, dtype=np.float64)
+        classes, probs = score_features(model, X)
+        labels = np.where(classes == 1, "high_risk", "low_risk")
+        now = datetime.utcnow()
+        
+        updates = [
+            {
+                "risk_probability": float(prob),
+                "risk_classification": str(label),
+                "model_version": model_version,
+                "rescored_at": now,
+            }
+            for prob, label in zip(probs, labels)
+        ]
+        
+        if self._db is not None:
+            self._db.analyses.bulk_write(
+                [UpdateOne({"_id": _id}, {"$set": update}) for _id, update in zip(ids, updates)],
+                ordered=False,
+            )
+        else:
+            for _id, update in zip(ids, updates):
+                self._store[_id].update(update)
+        return len(ids)
+    
+    def pipeline_stats(self) -> dict:
+        """Wall time, CPU time and input-row histograms per pipeline stage"""
+        return self.stage_metrics.snapshot()
+    
+    def annotation_cache_stats(self):
+        """Hit/miss counters of the remote annotation cache (None until it is used)"""
+        annotator = self.remote_annotations.annotator if self.remote_annotations else None
+        return annotator.cache.stats() if annotator is not None else None
+    
+    def inference_stats(self) -> dict:
+        """Batch-size and latency histograms of the batched scorer"""
+        if self.batch_inference is None:
+            return {"enabled": False, "executor": self.executor_kind}
+        return {"enabled": True, **self.batch_inference.stats()}
+    
+    def _apply_remote_annotations(self, analysis_id: str, annotations):
+        """Upgrade deferred variants in place with remote annotations
+        
+        Called from the remote annotation queue. Variant counts are adjusted by
+        the difference between the local and remote classification.
+        """
+        if annotations is None:
+            self._update_analysis(analysis_id, {"remote_annotation_status": "failed"})
+            return
+        
+        try:
+            record = (self._db.analyses.find_one({"_id": analysis_id}) if self._db is not None
+                      else self._store.get(analysis_id))
+        except Exception as e:
+            logger.error(f"Failed to read analysis {analysis_id}: {e}")
+            return
+        if not record:
+            return
+        
+        variants = [dict(v) for v in record.get('variants', [])]
+        high_risk_delta = 0
+        pathogenic_delta = 0
+        for index, remote in annotations.items():
+            if index >= len(variants):
+                continue
+            variant = variants[index]
+            high_risk_delta -= variant.get('disease_risk') == 'high'
+            pathogenic_delta -= variant.get('pathogenicity') == 'Pathogenic'
+            
+            variant.update({
+                'gene': remote.get('gene') or variant.get('gene'),
+                'disease_risk': str(remote.get('risk_level', 'Low')).lower(),
+                'pathogenicity': remote.get('pathogenicity', variant.get('pathogenicity')),
+                'clinical_significance': remote.get('clinical_significance'),
+                'diseases': remote.get('disease', []),
+                'rsid': remote.get('rsid'),
+                'annotation_source': 'myvariant',
+            })
+            high_risk_delta += variant['disease_risk'] == 'high'
+            pathogenic_delta += variant['pathogenicity'] == 'Pathogenic'
+        
+        self._update_analysis(analysis_id, {
+            "variants": variants,
+            "high_risk_variants": max(0, record.get('high_risk_variants', 0) + high_risk_delta),
+            "pathogenic_variants": max(0, record.get('pathogenic_variants', 0) + pathogenic_delta),
+            "remote_annotation_status": "completed",
+            "remote_annotated_at": datetime.utcnow(),
+        })
+        logger.info(f"Upgraded {len(annotations)} variants of {analysis_id} with remote annotations")
+    
     def _update_status(self, analysis_id: str, status: str):
         """Update analysis status"""
         try:
@@ -150,6 +676,7 @@ class AnalysisService:
                 self._store[analysis_id]["status"] = status
         except Exception as e:
             logger.warning(f"Failed to update status: {e}")
+        self._publish(analysis_id, {"status": status})
     
     def _update_analysis(self, analysis_id: str, update_data: dict):
         """Update analysis record with results"""
@@ -163,3 +690,4 @@ class AnalysisService:
                 self._store[analysis_id].update(update_data)
         except Exception as e:
             logger.error(f"Failed to update analysis: {e}")
+        self._publish(analysis_id, update_data)
@@ -0,0 +1,159 @@
+"""
+Annotation Cache
+Two-tier cache for remote variant annotations:
+1. In-process LRU (bounded, no I/O)
+2. SQLite store on disk (shared by worker processes, survives restarts, TTL expiry)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+project_root = Path(__file__).parent.parent.parent
+DEFAULT_CACHE_PATH = str(project_root / "data" / "cache" / "annotations.sqlite")
+DEFAULT_CACHE_SIZE = 10_000
+DEFAULT_CACHE_TTL = 30 * 24 * 3600  # 30 days
+
+
+class AnnotationCache:
+    """Bounded LRU in front of an optional SQLite store, with hit/miss counters"""
+
+    def __init__(self, max_size: int = DEFAULT_CACHE_SIZE, db_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 ttl_seconds: float = DEFAULT_CACHE_TTL, clock: Callable[[], float] = time.time):
+        """
+        Initialize cache
+
+        Args:
+            max_size: Maximum number of entries kept in memory
+            db_path: SQLite file for the persistent tier (None for memory only)
+            ttl_seconds: Entries older than this are treated as misses
+            clock: Time source, injectable for tests
+        """
+        self.max_size = max_size
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+
+        self._memory = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.db_path:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            with self._connection() as conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS annotations ("
+                    "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets several processes read while one writes"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, key: str, value: Dict, expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_size:
+                self._memory.popitem(last=False)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """Look up several keys; returns only the ones found and not expired"""
+        now = self.clock()
+        found, missing = {}, []
+        disk_hits = 0
+
+        with self._lock:
+            for key in keys:
+                entry = self._memory.get(key)
+                if entry is not None and entry[0] > now:
+                    self._memory.move_to_end(key)
+                    found[key] = entry[1]
+                else:
+                    missing.append(key)
+            self.memory_hits += len(found)
+
+        if missing and self.db_path:
+            try:
+                conn = self._connection()
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, value, expires_at FROM annotations "
+                        f"WHERE key IN ({','.join('?' * len(batch))}) AND expires_at > ?",
+                        (*batch, now),
+                    ).fetchall()
+                    for key, value, expires_at in rows:
+                        found[key] = json.loads(value)
+                        self._remember(key, found[key], expires_at)
+                        disk_hits += 1
+            except sqlite3.Error as e:
+                logger.warning(f"Annotation cache read failed: {e}")
+
+        # Counters are shared by the API and remote-annotation threads
+        with self._lock:
+            self.disk_hits += disk_hits
+            self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Dict[str, Dict]):
+        """Store annotations in both tiers"""
+        expires_at = self.clock() + self.ttl_seconds
+        for key, value in items.items():
+            self._remember(key, value, expires_at)
+
+        if items and self.db_path:
+            try:
+                with self._connection() as conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO annotations (key, value, expires_at) VALUES (?, ?, ?)",
+                        [(key, json.dumps(value), expires_at) for key, value in items.items()],
+                    )
+            except sqlite3.Error as e:
+                logger.warning(f"Annotation cache write failed: {e}")
+
+    def set(self, key: str, value: Dict):
+        self.set_many({key: value})
+
+    def purge_expired(self) -> int:
+        """Delete expired rows from the disk tier; returns the number removed"""
+        if not self.db_path:
+            return 0
+        with self._connection() as conn:
+            return conn.execute("DELETE FROM annotations WHERE expires_at <= ?", (self.clock(),)).rowcount
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring"""
+        hits = self.memory_hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": hits / lookups if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "max_size": self.max_size,
+        }
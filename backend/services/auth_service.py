@@ -34,6 +34,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
+STREAM_TOKEN_SCOPE = "analysis-events"
+
+def create_stream_token(user_id: str, analysis_id: str, expires_seconds: int) -> str:
+    """Short-lived token that only opens the event stream of one analysis
+    
+    It carries no "sub", so it is not accepted as an access token, and it
+    expires quickly, so copies in access logs are of little use.
+    """
+    expire = datetime.utcnow() + timedelta(seconds=expires_seconds)
+    claims = {"uid": user_id, "aid": analysis_id, "scope": STREAM_TOKEN_SCOPE, "exp": expire}
+    return jwt.encode(claims, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+
 # In-memory user storage for fallback when DB not available
 _memory_users = {}
 
@@ -0,0 +1,149 @@
+"""
+Batch Inference Service
+Micro-batches risk-model calls from concurrent analyses.
+
+Each analysis scores a single feature row. Instead of calling the model once
+per analysis, callers hand their rows to a shared scoring thread that waits
+up to `max_wait_ms` (or until `max_batch_rows` rows are queued), scores the
+whole batch with one model call and hands each caller its own results.
+"""
+
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, Tuple
+
+import numpy as np
+from loguru import logger
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from backend.services.metrics import BATCH_SIZE_BUCKETS, LATENCY_MS_BUCKETS, Histogram
+from scripts.predict import score_features
+
+
+class BatchInferenceService:
+    """Scores feature rows from many threads in shared batches"""
+
+    def __init__(self, model_provider: Callable, max_batch_rows: int = 64, max_wait_ms: float = 5.0):
+        """
+        Initialize service
+
+        Args:
+            model_provider: Returns the model to score with (called once per
+                            batch, so registry hot-swaps apply to the next batch)
+            max_batch_rows: Rows that trigger a batch immediately
+            max_wait_ms: Longest time the first queued row waits for company
+        """
+        self.model_provider = model_provider
+        self.max_batch_rows = max_batch_rows
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.latency_ms = Histogram(LATENCY_MS_BUCKETS)
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("BatchInferenceService is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._worker, name="batch-inference", daemon=True)
+                self._thread.start()
+
+    def predict_with_proba(self, X) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score rows as part of the next batch (blocks until scored)
+
+        Args:
+            X: (N, 8) feature matrix or a single feature row
+
+        Returns:
+            (classes, probabilities) for the submitted rows, like the models'
+            own predict_with_proba()
+        """
+        rows = np.asarray(X, dtype=np.float64)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((rows, future, time.perf_counter()))
+        return future.result()
+
+    def _collect(self):
+        """Block for one request, then gather more until the batch is full or the wait expires"""
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        rows = len(first[0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while rows < self.max_batch_rows:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)  # let the outer loop see the shutdown
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+            self._score(batch)
+
+    def _score(self, batch):
+        try:
+            stacked = np.vstack([rows for rows, _, _ in batch])
+            classes, probs = score_features(self.model_provider(), stacked)
+        except Exception as e:
+            logger.error(f"Batch inference failed for {len(batch)} requests: {e}")
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        self.batch_sizes.observe(len(stacked))
+        done = time.perf_counter()
+        offset = 0
+        for rows, future, enqueued in batch:
+            end = offset + len(rows)
+            future.set_result((classes[offset:end], probs[offset:end]))
+            self.latency_ms.observe((done - enqueued) * 1000)
+            offset = end
+
+    def stats(self) -> Dict:
+        """Batch-size and per-request latency histograms"""
+        return {
+            'max_batch_rows': self.max_batch_rows,
+            'max_wait_ms': self.max_wait * 1000,
+            'batch_size': self.batch_sizes.snapshot(),
+            'latency_ms': self.latency_ms.snapshot(),
+        }
+
+    def close(self):
+        """Stop the scoring thread after the queued requests are served"""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout=5)
@@ -0,0 +1,80 @@
+"""
+Analysis Events
+In-process pub/sub of analysis status and progress updates.
+
+AnalysisService publishes every status/progress change; the SSE endpoint
+subscribes per analysis and pushes the events to the browser, so clients no
+longer poll /analysis/results/{id}. Publishers may run on any thread (job
+queue callbacks, the progress listener); each subscription belongs to the
+event loop that created it and receives events through call_soon_threadsafe.
+"""
+
+import asyncio
+import threading
+from typing import Dict, List
+
+from loguru import logger
+
+
+class Subscription:
+    """Events of one analysis for one client"""
+
+    def __init__(self, analysis_id: str, loop: asyncio.AbstractEventLoop, max_events: int):
+        self.analysis_id = analysis_id
+        self.loop = loop
+        self._queue = asyncio.Queue(maxsize=max_events)
+
+    def _put(self, event: Dict):
+        # Events are snapshots of the latest state: on overflow, drop the oldest
+        if self._queue.full():
+            self._queue.get_nowait()
+        self._queue.put_nowait(event)
+
+    async def get(self) -> Dict:
+        return await self._queue.get()
+
+
+class AnalysisEventBus:
+    """Fan-out of analysis events to the subscriptions of each analysis"""
+
+    def __init__(self, max_events: int = 100):
+        """
+        Initialize bus
+
+        Args:
+            max_events: Events buffered per subscription for slow clients
+        """
+        self.max_events = max_events
+        self._subscriptions: Dict[str, List[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, analysis_id: str) -> Subscription:
+        """Subscribe from inside the event loop that will consume the events"""
+        subscription = Subscription(analysis_id, asyncio.get_running_loop(), self.max_events)
+        with self._lock:
+            self._subscriptions.setdefault(analysis_id, []).append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.analysis_id, [])
+            if subscription in subscriptions:
+                subscriptions.remove(subscription)
+            if not subscriptions:
+                self._subscriptions.pop(subscription.analysis_id, None)
+
+    def publish(self, analysis_id: str, event: Dict):
+        """Deliver `event` to every subscription of the analysis (thread-safe, non-blocking)"""
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(analysis_id, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription._put, event)
+            except RuntimeError:
+                # The subscriber's loop has closed
+                logger.debug(f"Dropping event for closed subscription of {analysis_id}")
+                self.unsubscribe(subscription)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._subscriptions.values())
@@ -0,0 +1,153 @@
+"""
+Analysis Executors
+Where VCF pipelines run, selected with ANALYSIS_EXECUTOR:
+- "process": bounded pool of worker processes (default). Pandas work runs
+  outside the API process, so request handling never competes with it for
+  the GIL, and all cores are used. Each worker runs one analysis at a time,
+  so risk scoring is not micro-batched across analyses.
+- "thread": thread pool inside the API process (development, tests); the
+  threads share one BatchInferenceService when INFERENCE_BATCHING is on.
+
+Executors only run the pipeline and return its results dict; persisting the
+results stays with AnalysisService in the API process. Stage progress is
+passed to an optional progress(analysis_id, stage, percent) callback in the
+API process; worker processes send it through a multiprocessing queue.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+from backend.services.ml_pipeline import MLPipeline
+
+# progress(analysis_id, stage, percent)
+AnalysisProgress = Callable[[str, str, int], None]
+
+# Pipeline of the current worker process (created by the pool initializer)
+_worker_pipeline: Optional[MLPipeline] = None
+_worker_progress = None
+
+
+def _init_worker(pipeline_options: Dict, progress_queue=None):
+    """Pool initializer: build and warm one pipeline per worker process"""
+    global _worker_pipeline, _worker_progress
+    _worker_pipeline = MLPipeline(**pipeline_options)
+    _worker_progress = progress_queue
+    logger.info(f"Pipeline worker {os.getpid()} ready")
+
+
+def _send_progress(analysis_id: str, stage: str, percent: int):
+    _worker_progress.put((analysis_id, stage, percent))
+
+
+def _run_in_worker(vcf_path: str, analysis_id: str) -> Dict:
+    progress = partial(_send_progress, analysis_id) if _worker_progress is not None else None
+    return _worker_pipeline.process_vcf_file(vcf_path, analysis_id, progress=progress)
+
+
+class ThreadAnalysisExecutor:
+    """Runs pipelines on threads of the API process, sharing its pipeline"""
+
+    kind = "thread"
+
+    def __init__(self, pipeline: MLPipeline, max_workers: int, progress: Optional[AnalysisProgress] = None):
+        self.pipeline = pipeline
+        self.max_workers = max_workers
+        self.progress = progress
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="analysis")
+
+    def run_pipeline(self, vcf_path: str, analysis_id: str) -> Future:
+        """Start the pipeline; the future resolves to its results dict"""
+        progress = partial(self.progress, analysis_id) if self.progress is not None else None
+        return self._pool.submit(self.pipeline.process_vcf_file, vcf_path, analysis_id, progress=progress)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+class ProcessAnalysisExecutor:
+    """Runs pipelines in a bounded pool of worker processes"""
+
+    kind = "process"
+
+    def __init__(self, pipeline_options: Dict, max_workers: int, progress: Optional[AnalysisProgress] = None):
+        """
+        Initialize executor
+
+        Args:
+            pipeline_options: MLPipeline keyword arguments for each worker
+            max_workers: Number of worker processes
+            progress: Receives stage progress of worker pipelines
+        """
+        self.pipeline_options = pipeline_options
+        self.max_workers = max_workers
+        self.progress = progress
+        # spawn: workers must not inherit the API process's threads and locks
+        context = multiprocessing.get_context("spawn")
+        self._progress_queue = context.Queue() if progress is not None else None
+        self._listener = None
+        if self._progress_queue is not None:
+            self._listener = threading.Thread(target=self._forward_progress, name="analysis-progress", daemon=True)
+            self._listener.start()
+        self._pool = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(pipeline_options, self._progress_queue),
+        )
+
+    def _forward_progress(self):
+        """Hand progress messages from the workers to the callback"""
+        while True:
+            message = self._progress_queue.get()
+            if message is None:
+                return
+            try:
+                self.progress(*message)
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {e}")
+
+    def run_pipeline(self, vcf_path: str, analysis_id: str) -> Future:
+        """Start the pipeline in a worker; the future resolves to its results dict"""
+        return self._pool.submit(_run_in_worker, vcf_path, analysis_id)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait, cancel_futures=not wait)
+        if self._listener is not None:
+            self._progress_queue.put(None)
+            self._listener.join(timeout=5)
+
+
+def default_workers() -> int:
+    return os.cpu_count() or 1
+
+
+def create_executor(kind: str, workers: int, pipeline: MLPipeline, pipeline_options: Dict,
+                    progress: Optional[AnalysisProgress] = None):
+    """
+    Build the executor configured in settings
+
+    Args:
+        kind: "process" or "thread"
+        workers: Pool size (0 = one per CPU core)
+        pipeline: The API process's pipeline (used by the thread executor)
+        pipeline_options: MLPipeline arguments for worker processes
+        progress: Receives (analysis_id, stage, percent) as stages start
+
+    Returns:
+        ThreadAnalysisExecutor or ProcessAnalysisExecutor
+    """
+    workers = workers or default_workers()
+    if kind == "thread":
+        executor = ThreadAnalysisExecutor(pipeline, workers, progress)
+    elif kind == "process":
+        executor = ProcessAnalysisExecutor(pipeline_options, workers, progress)
+    else:
+        raise ValueError(f"Unknown ANALYSIS_EXECUTOR: {kind!r} (expected 'process' or 'thread')")
+    logger.info(f"Analysis executor: {kind} pool with {workers} workers")
+    return executor
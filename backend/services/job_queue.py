@@ -0,0 +1,209 @@
+"""
+Analysis Job Queue
+Admission control in front of the analysis executor.
+
+At most `max_running` analyses run at once; up to `max_queued` more wait in
+line. Anything beyond that is rejected with QueueFullError instead of piling
+up unbounded work, so a burst of uploads cannot exhaust memory or stretch the
+latency of analyses that were already accepted.
+
+Waiting analyses are ordered by start-time fair queuing across users: each
+job gets a virtual start tag max(virtual time, the user's last finish tag)
+and advances the user's finish tag by 1 / weight of its priority class. A
+user who queues 200 files only competes for their fair share of slots, and
+interactive uploads (weight 4) move ahead of bulk ones (weight 1).
+"""
+
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future
+from typing import Callable, Dict, Optional
+
+from loguru import logger
+
+# start(analysis_id, file_path) -> future resolving to the pipeline results
+StartJob = Callable[[str, str], Future]
+
+PRIORITY_WEIGHTS = {
+    'interactive': 4.0,
+    'bulk': 1.0,
+}
+
+
+class QueueFullError(Exception):
+    """Raised when the queue has no room for another analysis"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Analysis queue is full, retry in {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AnalysisJobQueue:
+    """Bounded, per-user fair queue of analyses with a concurrency limit"""
+
+    def __init__(self, start: StartJob, max_running: int, max_queued: int,
+                 initial_job_seconds: float = 30.0):
+        """
+        Initialize queue
+
+        Args:
+            start: Starts one analysis (called when it leaves the queue)
+            max_running: Analyses allowed to run at the same time
+            max_queued: Analyses allowed to wait; more are rejected
+            initial_job_seconds: Job duration assumed for Retry-After until
+                                 real durations have been observed
+        """
+        self.start = start
+        self.max_running = max(1, max_running)
+        self.max_queued = max(0, max_queued)
+
+        self._lock = threading.Lock()
+        self._waiting = []  # heap of (start_tag, seq, analysis_id, file_path, user_id, future)
+        self._running = {}  # analysis_id -> user_id
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._finish_tags = {}  # user_id -> finish tag of their last queued job
+        self._user_running = Counter()
+        self._user_queued = Counter()
+        self._job_seconds = initial_job_seconds
+        self.rejected = 0
+
+    def _has_room(self) -> bool:
+        return len(self._running) < self.max_running or len(self._waiting) < self.max_queued
+
+    def retry_after(self) -> int:
+        """Seconds until a slot is likely to free up (for Retry-After)"""
+        with self._lock:
+            backlog = len(self._waiting) + 1
+            return max(1, math.ceil(self._job_seconds * backlog / self.max_running))
+
+    def check_admission(self):
+        """Raise QueueFullError if a new analysis would be rejected right now"""
+        with self._lock:
+            if self._has_room():
+                return
+            self.rejected += 1
+        raise QueueFullError(self.retry_after())
+
+    def submit(self, analysis_id: str, file_path: str, user_id: str = '',
+               priority: str = 'interactive') -> Future:
+        """
+        Queue an analysis
+
+        Args:
+            analysis_id: Analysis to run
+            file_path: VCF file of the analysis
+            user_id: Owner; slots are shared fairly between owners
+            priority: Key of PRIORITY_WEIGHTS
+
+        Returns:
+            Future resolving to the pipeline results once the analysis has run
+
+        Raises:
+            QueueFullError: if both the running slots and the queue are full
+            ValueError: for an unknown priority
+        """
+        if priority not in PRIORITY_WEIGHTS:
+            raise ValueError(f"Unknown priority {priority!r}; expected one of {sorted(PRIORITY_WEIGHTS)}")
+        future = Future()
+        with self._lock:
+            if not self._has_room():
+                self.rejected += 1
+                full = True
+            else:
+                full = False
+                start_tag = max(self._virtual_time, self._finish_tags.get(user_id, 0.0))
+                self._finish_tags[user_id] = start_tag + 1.0 / PRIORITY_WEIGHTS[priority]
+                heapq.heappush(self._waiting, (start_tag, next(self._seq), analysis_id, file_path, user_id, future))
+                self._user_queued[user_id] += 1
+        if full:
+            raise QueueFullError(self.retry_after())
+        self._dispatch()
+        return future
+
+    def position(self, analysis_id: str) -> Optional[int]:
+        """1-based place in line, 0 while running, None if not queued here"""
+        with self._lock:
+            if analysis_id in self._running:
+                return 0
+            for index, job in enumerate(sorted(self._waiting)):
+                if job[2] == analysis_id:
+                    return index + 1
+        return None
+
+    def analysis_ids(self):
+        """IDs of all running and waiting analyses"""
+        with self._lock:
+            return list(self._running) + [job[2] for job in self._waiting]
+
+    def _dispatch(self):
+        """Start waiting analyses, lowest start tag first, while running slots are free"""
+        while True:
+            with self._lock:
+                if not self._waiting or len(self._running) >= self.max_running:
+                    return
+                start_tag, _, analysis_id, file_path, user_id, future = heapq.heappop(self._waiting)
+                self._virtual_time = max(self._virtual_time, start_tag)
+                self._user_queued[user_id] -= 1
+                self._user_running[user_id] += 1
+                self._running[analysis_id] = user_id
+
+            started = time.perf_counter()
+            try:
+                job = self.start(analysis_id, file_path)
+            except Exception as e:
+                logger.error(f"Failed to start analysis {analysis_id}: {e}")
+                self._finish(analysis_id)
+                future.set_exception(e)
+                continue
+            job.add_done_callback(
+                lambda done, a=analysis_id, f=future, s=started: self._on_done(a, f, s, done)
+            )
+
+    def _finish(self, analysis_id: str, started: Optional[float] = None):
+        """Release the running slot; `started` is set only for jobs that actually ran"""
+        with self._lock:
+            user_id = self._running.pop(analysis_id)
+            self._user_running[user_id] -= 1
+            if not self._user_running[user_id] and not self._user_queued[user_id]:
+                del self._user_running[user_id], self._user_queued[user_id]
+                # An idle user's tag only matters while it is ahead of virtual time
+                if self._finish_tags.get(user_id, 0.0) <= self._virtual_time:
+                    self._finish_tags.pop(user_id, None)
+            # Moving average of job durations, for Retry-After. Failed starts
+            # take ~0 s and would otherwise drag Retry-After towards zero
+            if started is not None:
+                self._job_seconds = 0.8 * self._job_seconds + 0.2 * (time.perf_counter() - started)
+
+    def _on_done(self, analysis_id: str, future: Future, started: float, done: Future):
+        self._finish(analysis_id, started)
+        self._dispatch()
+        if done.exception() is not None:
+            future.set_exception(done.exception())
+        else:
+            future.set_result(done.result())
+
+    def user_counts(self, user_id: str) -> Dict:
+        """Running and queued analyses of one user"""
+        with self._lock:
+            return {'running': self._user_running.get(user_id, 0), 'queued': self._user_queued.get(user_id, 0)}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            users = set(self._user_running) | set(self._user_queued)
+            return {
+                'running': len(self._running),
+                'queued': len(self._waiting),
+                'max_running': self.max_running,
+                'max_queued': self.max_queued,
+                'rejected': self.rejected,
+                'avg_job_seconds': round(self._job_seconds, 3),
+                'users': {
+                    user_id: {'running': self._user_running[user_id], 'queued': self._user_queued[user_id]}
+                    for user_id in users
+                },
+            }
@@ -0,0 +1,197 @@
+"""
+Metrics
+Lightweight in-process histograms and pipeline stage spans for service
+instrumentation
+"""
+
+import bisect
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional, Sequence
+
+# Bucket upper bounds
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+LATENCY_MS_BUCKETS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+STAGE_MS_BUCKETS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 300000)
+ROWS_BUCKETS = (10, 100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram (Prometheus-style cumulative buckets)"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> Dict:
+        """Cumulative bucket counts plus count, sum and mean"""
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(list(self.buckets) + ['+Inf'], counts):
+            running += bucket_count
+            cumulative[str(bound)] = running
+        return {
+            'buckets': cumulative,
+            'count': count,
+            'sum': total,
+            'mean': total / count if count else 0.0,
+        }
+
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> Optional[float]:
+    """Current resident memory of this process in MB (None where /proc is unavailable)"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def reset_peak_rss() -> bool:
+    """Reset this process's resident-memory high-water mark (Linux only)
+
+    Returns:
+        True if VmHWM now starts again from the current RSS
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Resident-memory high-water mark (VmHWM) of this process in MB"""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class StageSpan:
+    """
+    Resource use of one pipeline stage, measured as a context manager
+
+    Wall time, CPU time and resident memory are taken on entry and exit; the
+    stage sets rows_out and adds to bytes_written as it goes.
+
+    cpu_ms is the CPU time of the calling thread only: work that numpy/BLAS
+    or xgboost spread over their own threads is not included, so it can be
+    well below wall_ms for multi-threaded stages.
+
+    peak_rss_mb is the highest RSS reached during the stage: on Linux the
+    process high-water mark is reset on entry and read on exit. The mark
+    is per process, so it is exact with the process executor (one analysis
+    per worker); with the thread executor, concurrent stages share and
+    reset it. Where it cannot be reset, peak_rss_mb falls back to the
+    larger of the RSS on entry and exit, which misses transient peaks.
+    rss_mb and rss_delta_mb are the RSS at the end of the stage and its
+    growth during the stage.
+    """
+
+    def __init__(self, name: str, rows_in: Optional[int] = None, bytes_read: int = 0):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.bytes_read = bytes_read
+        self.bytes_written = 0
+        self.wall_ms = None
+        self.cpu_ms = None
+        self.rss_mb = None
+        self.rss_delta_mb = None
+        self.peak_rss_mb = None
+        self.ok = False
+        # True when the stage output was loaded from a checkpoint
+        self.resumed = False
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._rss = current_rss_mb()
+        self._peak_reset = reset_peak_rss()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.wall_ms = (time.perf_counter() - self._wall) * 1000
+        self.cpu_ms = (time.thread_time() - self._cpu) * 1000
+        self.rss_mb = current_rss_mb()
+        if self.rss_mb is not None and self._rss is not None:
+            self.rss_delta_mb = self.rss_mb - self._rss
+        self.peak_rss_mb = peak_rss_mb() if self._peak_reset else None
+        if self.peak_rss_mb is None and self.rss_mb is not None and self._rss is not None:
+            self.peak_rss_mb = max(self.rss_mb, self._rss)
+        self.ok = exc_type is None and self.rows_out is not None
+        return False
+
+    def to_dict(self) -> Dict:
+        return {
+            'stage': self.name,
+            'ok': self.ok,
+            'wall_ms': round(self.wall_ms, 3),
+            'cpu_ms': round(self.cpu_ms, 3),
+            'rss_mb': None if self.rss_mb is None else round(self.rss_mb, 1),
+            'rss_delta_mb': None if self.rss_delta_mb is None else round(self.rss_delta_mb, 1),
+            'peak_rss_mb': None if self.peak_rss_mb is None else round(self.peak_rss_mb, 1),
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'bytes_read': self.bytes_read,
+            'bytes_written': self.bytes_written,
+            'resumed': self.resumed,
+        }
+
+
+class StageMetrics:
+    """Per-stage histograms aggregated from the spans of finished analyses"""
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def _histograms(self, stage: str) -> Dict[str, Histogram]:
+        with self._lock:
+            if stage not in self._stages:
+                self._stages[stage] = {
+                    'wall_ms': Histogram(STAGE_MS_BUCKETS),
+                    'cpu_ms': Histogram(STAGE_MS_BUCKETS),
+                    'rows_in': Histogram(ROWS_BUCKETS),
+                }
+            return self._stages[stage]
+
+    def record(self, spans: Iterable[Dict]):
+        """Add the spans (StageSpan.to_dict() output) of one analysis"""
+        for span in spans:
+            histograms = self._histograms(span['stage'])
+            histograms['wall_ms'].observe(span['wall_ms'])
+            histograms['cpu_ms'].observe(span['cpu_ms'])
+            if span.get('rows_in') is not None:
+                histograms['rows_in'].observe(span['rows_in'])
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            stages = dict(self._stages)
+        return {
+            stage: {name: histogram.snapshot() for name, histogram in histograms.items()}
+            for stage, histograms in stages.items()
+        }
@@ -4,61 +4,153 @@ Orchestrates the complete genomic analysis workflow:
 1. Preprocess VCF → 2. Annotate variants → 3. Predict disease risk
 """
 
+import json
 import os
 import sys
 from pathlib import Path
 from loguru import logger
-from typing import Dict, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import traceback
 
 # Add project root to path
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
-from scripts.preprocess import preprocess_vcf
-from scripts.annotate import annotate_variants
-from scripts.predict import predict_disease_risk, load_model
+import numpy as np
+import pandas as pd
+
+from backend.services.metrics import StageSpan
+from scripts.preprocess import load_vcf
+from scripts.annotate import annotate_frame, use_annotation_db
+from scripts.predict import predict_risk_from_frame
+from scripts.model_registry import get_registry
+from scripts.table_io import COLUMNAR_EXT, read_table, write_table
+
+# Bump when a change alters the results for the same input file; stored on
+# analyses so re-uploads only reuse results computed by the same pipeline
+PIPELINE_VERSION = "1"
+
+# Percent complete reported when each stage starts
+STAGE_PROGRESS = {'preprocess': 0, 'annotate': 35, 'predict': 70}
+
+# progress(stage, percent), called as stages start
+ProgressCallback = Callable[[str, int], None]
 
 
 class MLPipeline:
     """Complete ML pipeline for genomic variant analysis"""
     
-    def __init__(self):
-        """Initialize pipeline with necessary directories"""
+    def __init__(self, persist_intermediates: bool = False, export_csv: bool = False,
+                 defer_remote: bool = False, max_deferred: int = 1000,
+                 batch_inference=None, checkpoint: bool = False,
+                 checkpoint_min_bytes: int = 0, annotation_db: Optional[str] = None):
+        """
+        Initialize pipeline with necessary directories
+
+        Args:
+            persist_intermediates: If True, write the processed and annotated
+                        tables to data/processed in the columnar format.
+                        By default stages hand DataFrames to each other in
+                        memory and nothing is written.
+            export_csv: If True, also write CSV copies of any persisted
+                        intermediate tables for debugging
+            defer_remote: If True, return variants that the local index only
+                        resolved to a gene region as `deferred_variants`, so
+                        the caller can upgrade them with remote annotations
+            max_deferred: Upper bound on deferred variants per analysis
+            batch_inference: Optional BatchInferenceService; when given, risk
+                        scoring is batched with concurrent analyses instead of
+                        calling the model directly
+            checkpoint: If True, write each stage's output table plus a
+                        checkpoint manifest, so a run interrupted by a crash
+                        or restart resumes after the last completed stage.
+                        Checkpoints are removed once the analysis finishes.
+            checkpoint_min_bytes: Only checkpoint VCFs at least this large;
+                        for small inputs rerunning from scratch is cheaper
+                        than writing stage tables on every analysis
+            annotation_db: Annotation store directory (relative paths are
+                        resolved against the project root); defaults to
+                        scripts/annotate.py's ANNOTATION_DB_PATH
+        """
+        self.persist_intermediates = persist_intermediates
+        self.export_csv = export_csv
+        self.defer_remote = defer_remote
+        self.max_deferred = max_deferred
+        self.batch_inference = batch_inference
+        self.checkpoint = checkpoint
+        self.checkpoint_min_bytes = checkpoint_min_bytes
         self.base_dir = project_root
         self.upload_dir = self.base_dir / "data" / "uploads"
         self.processed_dir = self.base_dir / "data" / "processed"
         self.models_dir = self.base_dir / "models"
+        if annotation_db:
+            use_annotation_db(str(self.base_dir / annotation_db))
         
         # Create directories if they don't exist
         self.upload_dir.mkdir(parents=True, exist_ok=True)
         self.processed_dir.mkdir(parents=True, exist_ok=True)
         self.models_dir.mkdir(parents=True, exist_ok=True)
         
-        # Check if model exists
-        self.model_path = self.models_dir / "model.pkl"
-        if not self.model_path.exists():
-            logger.warning("Model file not found. Run scripts/train.py first!")
-            self.model = None
-        else:
-            try:
-                self.model = load_model()
-                logger.info("ML model loaded successfully")
-            except Exception as e:
-                logger.error(f"Failed to load model: {e}")
-                self.model = None
+        # Shared per-process model; loaded and warmed once, hot-swapped on change
+        self.model_registry = get_registry()
+        try:
+            version = self.model_registry.warm()
+            logger.info(f"ML model {version} loaded in {self.model_registry.load_seconds * 1000:.1f} ms")
+        except Exception as e:
+            logger.error(f"Failed to warm ML model: {e}")
+    
+    @property
+    def model(self):
+        """Current model from the process-wide registry"""
+        return self.model_registry.get()
     
-    def process_vcf_file(self, vcf_path: str, analysis_id: str) -> Dict:
+    def process_vcf_file(self, vcf_path: str, analysis_id: str,
+                         persist_intermediates: Optional[bool] = None,
+                         progress: Optional[ProgressCallback] = None) -> Dict:
         """
         Run complete pipeline on a VCF file
         
         Args:
             vcf_path: Path to uploaded VCF file
             analysis_id: Unique identifier for this analysis
+            persist_intermediates: Override the pipeline default for writing
+                                   intermediate tables to disk
+            progress: Called with (stage, percent complete) as each stage starts
             
         Returns:
             Dictionary with analysis results
         """
+        if persist_intermediates is None:
+            persist_intermediates = self.persist_intermediates
+
+        checkpoint = self._checkpoints(vcf_path)
+        results = self._run_stages(vcf_path, analysis_id, persist_intermediates, progress, checkpoint)
+        # Checkpoints only need to outlive interrupted runs, not finished ones
+        if checkpoint:
+            self._clear_checkpoint(analysis_id, keep_tables=persist_intermediates)
+        return results
+    
+    def _checkpoints(self, vcf_path: str) -> bool:
+        """Whether this input is large enough to checkpoint"""
+        if not self.checkpoint:
+            return False
+        try:
+            return os.path.getsize(vcf_path) >= self.checkpoint_min_bytes
+        except OSError:
+            return False
+    
+    def _run_stages(self, vcf_path: str, analysis_id: str, persist_intermediates: bool,
+                    progress: Optional[ProgressCallback] = None, checkpoint: bool = False) -> Dict:
+        """Run (or resume) the stages of one analysis; never raises"""
+        def report(stage):
+            if progress is not None:
+                try:
+                    progress(stage, STAGE_PROGRESS[stage])
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {e}")
+
+        # With checkpointing, stage outputs are written even when not kept
+        persist = persist_intermediates or checkpoint
         results = {
             'analysis_id': analysis_id,
             'status': 'failed',
@@ -70,6 +162,9 @@ class MLPipeline:
             'risk_probability': 0.0,
             'risk_classification': 'Unknown',
             'variants': [],
+            'deferred_variants': [],
+            # StageSpan.to_dict() of each stage that ran
+            'stages': [],
             'error_message': None
         }
         
@@ -77,29 +172,64 @@ class MLPipeline:
             logger.info(f"Starting pipeline for analysis {analysis_id}")
             logger.info(f"Input VCF: {vcf_path}")
             
+            resume_from = self._load_checkpoint(analysis_id, vcf_path) if checkpoint else None
+            if resume_from:
+                logger.info(f"Resuming analysis {analysis_id} after checkpointed stage '{resume_from}'")
+            
             # Step 1: Preprocess VCF
-            logger.info("Step 1/3: Preprocessing VCF file...")
-            processed_file = self._preprocess_step(vcf_path, analysis_id)
-            if not processed_file:
-                results['error_message'] = "Failed to preprocess VCF file"
-                return results
+            variants = None
+            if resume_from != 'annotate':
+                logger.info("Step 1/3: Preprocessing VCF file...")
+                report('preprocess')
+                with StageSpan('preprocess', bytes_read=os.path.getsize(vcf_path)) as span:
+                    if resume_from == 'preprocess':
+                        variants = self._read_checkpoint_table(analysis_id, 'processed', span)
+                    else:
+                        variants = self._preprocess_step(vcf_path, analysis_id, persist, span)
+                        if variants is not None and checkpoint:
+                            self._save_checkpoint(analysis_id, vcf_path, 'preprocess')
+                    span.rows_out = None if variants is None else len(variants)
+                results['stages'].append(span.to_dict())
+                if variants is None:
+                    results['error_message'] = "Failed to preprocess VCF file"
+                    return results
             
             # Step 2: Annotate variants
             logger.info("Step 2/3: Annotating variants with disease associations...")
-            annotated_file = self._annotate_step(processed_file, analysis_id)
-            if not annotated_file:
+            report('annotate')
+            with StageSpan('annotate', rows_in=None if variants is None else len(variants)) as span:
+                if resume_from == 'annotate':
+                    annotation = self._read_annotated_checkpoint(analysis_id, span)
+                else:
+                    annotation = self._annotate_step(variants, analysis_id, persist, span)
+                    if annotation is not None and checkpoint:
+                        self._save_checkpoint(analysis_id, vcf_path, 'annotate', region_only=annotation[1])
+                span.rows_out = None if annotation is None else len(annotation[0])
+            results['stages'].append(span.to_dict())
+            if annotation is None:
                 results['error_message'] = "Failed to annotate variants"
                 return results
+            annotated, unresolved = annotation
             
             # Step 3: Predict disease risk
             logger.info("Step 3/3: Predicting disease risk using ML model...")
-            prediction_results = self._predict_step(annotated_file, vcf_path)
+            report('predict')
+            if self.model_registry.reload_if_changed():
+                logger.info(f"Switched to ML model {self.model_registry.version}")
+            model, model_version = self.model_registry.current()
+            scorer = self.batch_inference if self.batch_inference is not None else model
+            with StageSpan('predict', rows_in=len(annotated)) as span:
+                prediction_results = self._predict_step(annotated, vcf_path, scorer, model_version)
+                span.rows_out = 1 if prediction_results else None
+            results['stages'].append(span.to_dict())
             if not prediction_results:
                 results['error_message'] = "Failed to generate risk prediction"
                 return results
             
             # Combine results
             results.update(prediction_results)
+            if self.defer_remote:
+                results['deferred_variants'] = self._deferred_variants(annotated, unresolved)
             results['status'] = 'completed'
             
             logger.info(f"Pipeline completed successfully for {analysis_id}")
@@ -116,61 +246,70 @@ class MLPipeline:
             results['error_message'] = error_msg
             return results
     
-    def _preprocess_step(self, vcf_path: str, analysis_id: str) -> Optional[str]:
-        """Step 1: Preprocess VCF to CSV"""
+    def _preprocess_step(self, vcf_path: str, analysis_id: str, persist: bool = False,
+                         span: Optional[StageSpan] = None) -> Optional[pd.DataFrame]:
+        """Step 1: Parse the VCF into a variant table"""
         try:
-            base_name = Path(vcf_path).stem
-            processed_file = self.processed_dir / f"{analysis_id}_processed.csv"
-            
-            success = preprocess_vcf(vcf_path, str(processed_file))
+            variants = load_vcf(vcf_path)
             
-            if success and processed_file.exists():
-                logger.info(f"✓ Preprocessing complete: {processed_file}")
-                return str(processed_file)
-            else:
-                logger.error("Preprocessing failed")
+            if variants.empty:
+                logger.error("Preprocessing failed: no variants found in VCF file")
                 return None
+            
+            logger.info(f"✓ Preprocessing complete: {len(variants)} variants")
+            if persist:
+                self._persist_table(variants, f"{analysis_id}_processed", span)
+            return variants
                 
         except Exception as e:
             logger.error(f"Preprocessing error: {e}")
             return None
     
-    def _annotate_step(self, processed_file: str, analysis_id: str) -> Optional[str]:
-        """Step 2: Annotate variants with disease info"""
+    def _annotate_step(self, variants: pd.DataFrame, analysis_id: str, persist: bool = False,
+                       span: Optional[StageSpan] = None) -> Optional[Tuple[pd.DataFrame, np.ndarray]]:
+        """Step 2: Annotate variants with disease info
+        
+        Returns the annotated table and a mask of variants resolved only to a
+        gene region (no exact-allele record).
+        """
         try:
-            annotated_file = self.processed_dir / f"{analysis_id}_annotated.csv"
-            
-            success = annotate_variants(processed_file, str(annotated_file))
+            annotated, unresolved = annotate_frame(variants, return_unresolved=True)
             
-            if success and annotated_file.exists():
-                logger.info(f"✓ Annotation complete: {annotated_file}")
-                return str(annotated_file)
-            else:
-                logger.error("Annotation failed")
-                return None
+            logger.info(f"✓ Annotation complete ({int(unresolved.sum())} region-only matches)")
+            if persist:
+                self._persist_table(annotated, f"{analysis_id}_annotated", span)
+            return annotated, unresolved
                 
         except Exception as e:
             logger.error(f"Annotation error: {e}")
             return None
     
-    def _predict_step(self, annotated_file: str, original_vcf: str) -> Optional[Dict]:
-        """Step 3: Predict disease risk"""
+    def _predict_step(self, annotated: pd.DataFrame, original_vcf: str, model=None,
+                      model_version: Optional[str] = None) -> Optional[Dict]:
+        """Step 3: Predict disease risk
+        
+        Results hold plain Python numbers (not numpy scalars) so they can be
+        stored as-is, including the feature vector used for re-scoring.
+        """
         try:
-            # Use the prediction function from predict.py with explicit annotated file path
-            report = predict_disease_risk(original_vcf, annotated_file)
+            report = predict_risk_from_frame(annotated, original_vcf, model)
             
             if report:
                 # Convert report to our result format
                 results = {
-                    'total_variants': report['total_variants'],
-                    'high_risk_variants': report['high_risk_variants'],
-                    'pathogenic_variants': report['pathogenic_variants'],
-                    'risk_probability': report['disease_risk_probability'],
+                    'total_variants': int(report['total_variants']),
+                    'high_risk_variants': int(report['high_risk_variants']),
+                    'pathogenic_variants': int(report['pathogenic_variants']),
+                    'risk_probability': float(report['disease_risk_probability']),
                     'risk_classification': report['risk_classification'].lower().replace(' ', '_'),
                     
                     # Add more detailed breakdown
-                    'medium_risk_variants': report.get('medium_risk_variants', 0),
-                    'low_risk_variants': report.get('low_risk_variants', 0),
+                    'medium_risk_variants': int(report.get('medium_risk_variants', 0)),
+                    'low_risk_variants': int(report.get('low_risk_variants', 0)),
+                    
+                    # Feature vector (FEATURE_NAMES order) for re-scoring with later models
+                    'features': [float(value) for value in report['features']],
+                    'model_version': model_version,
                 }
                 
                 logger.info(f"✓ Prediction complete")
@@ -184,10 +323,141 @@ class MLPipeline:
             logger.error(traceback.format_exc())
             return None
     
+    def _deferred_variants(self, annotated: pd.DataFrame, unresolved: np.ndarray) -> List[Dict]:
+        """Local annotations of region-only variants, in the Variant schema shape"""
+        rows = annotated.loc[unresolved].head(self.max_deferred)
+        if unresolved.sum() > self.max_deferred:
+            logger.warning(f"Deferring only the first {self.max_deferred} of "
+                           f"{int(unresolved.sum())} region-only variants")
+        
+        quals = rows['QUAL'].astype('float64')
+        return [
+            {
+                'chrom': str(chrom),
+                'pos': int(pos),
+                'ref': str(ref),
+                'alt': str(alt),
+                'qual': None if pd.isna(qual) else float(qual),
+                'gene': str(gene) or None,
+                'disease_risk': str(risk).lower(),
+                'pathogenicity': str(pathogenicity),
+                'clinical_significance': str(clinical_sig),
+                'annotation_source': 'local',
+            }
+            for chrom, pos, ref, alt, qual, gene, risk, pathogenicity, clinical_sig in zip(
+                rows['CHROM'].astype(object), rows['POS'], rows['REF'].astype(object),
+                rows['ALT'].astype(object), quals, rows['GENE'].astype(object),
+                rows['DISEASE_RISK'].astype(object), rows['PATHOGENICITY'].astype(object),
+                rows['CLINICAL_SIG'].astype(object),
+            )
+        ]
+    
+    def _checkpoint_path(self, analysis_id: str) -> Path:
+        return self.processed_dir / f"{analysis_id}_checkpoint.json"
+    
+    def _save_checkpoint(self, analysis_id: str, vcf_path: str, stage: str,
+                         region_only: Optional[np.ndarray] = None):
+        """
+        Record `stage` as completed for `analysis_id`
+        
+        The manifest names the stage's output tables (written by the step)
+        with their sizes and identifies the input VCF, so a checkpoint is only
+        reused for the same file and pipeline version with intact artifacts.
+        """
+        artifacts = {'processed': f"{analysis_id}_processed{COLUMNAR_EXT}"}
+        if stage == 'annotate':
+            artifacts['annotated'] = f"{analysis_id}_annotated{COLUMNAR_EXT}"
+            artifacts['region_only'] = f"{analysis_id}_region_only.npy"
+            np.save(self.processed_dir / artifacts['region_only'], region_only)
+        
+        vcf_stat = os.stat(vcf_path)
+        manifest = {
+            'pipeline_version': PIPELINE_VERSION,
+            'stage': stage,
+            'vcf_path': str(vcf_path),
+            'vcf_size': vcf_stat.st_size,
+            'vcf_mtime_ns': vcf_stat.st_mtime_ns,
+            'artifacts': {
+                name: {'file': file, 'size': (self.processed_dir / file).stat().st_size}
+                for name, file in artifacts.items()
+            },
+        }
+        path = self._checkpoint_path(analysis_id)
+        tmp_path = path.with_suffix('.json.tmp')
+        tmp_path.write_text(json.dumps(manifest))
+        os.replace(tmp_path, path)
+    
+    def _load_checkpoint(self, analysis_id: str, vcf_path: str) -> Optional[str]:
+        """Last completed stage of a usable checkpoint, or None to start over"""
+        path = self._checkpoint_path(analysis_id)
+        if not path.exists():
+            return None
+        try:
+            manifest = json.loads(path.read_text())
+            vcf_stat = os.stat(vcf_path)
+            if (manifest['pipeline_version'] != PIPELINE_VERSION
+                    or manifest['vcf_size'] != vcf_stat.st_size
+                    or manifest['vcf_mtime_ns'] != vcf_stat.st_mtime_ns):
+                logger.warning(f"Ignoring stale checkpoint of {analysis_id}")
+                return None
+            for artifact in manifest['artifacts'].values():
+                artifact_path = self.processed_dir / artifact['file']
+                if not artifact_path.exists() or artifact_path.stat().st_size != artifact['size']:
+                    logger.warning(f"Ignoring checkpoint of {analysis_id}: {artifact['file']} missing or changed")
+                    return None
+            return manifest['stage']
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint of {analysis_id}: {e}")
+            return None
+    
+    def _read_checkpoint_table(self, analysis_id: str, name: str,
+                               span: Optional[StageSpan] = None) -> pd.DataFrame:
+        table_file = self.processed_dir / f"{analysis_id}_{name}{COLUMNAR_EXT}"
+        if span is not None:
+            span.resumed = True
+            span.bytes_read = table_file.stat().st_size
+        return read_table(str(table_file))
+    
+    def _read_annotated_checkpoint(self, analysis_id: str,
+                                   span: Optional[StageSpan] = None) -> Tuple[pd.DataFrame, np.ndarray]:
+        annotated = self._read_checkpoint_table(analysis_id, 'annotated', span)
+        unresolved = np.load(self.processed_dir / f"{analysis_id}_region_only.npy")
+        return annotated, unresolved
+    
+    def _clear_checkpoint(self, analysis_id: str, keep_tables: bool = False):
+        """Remove the checkpoint manifest (and stage tables unless they are kept)"""
+        for name in [f"{analysis_id}_checkpoint.json", f"{analysis_id}_region_only.npy"]:
+            path = self.processed_dir / name
+            if path.exists():
+                path.unlink()
+        if not keep_tables:
+            self.cleanup_intermediate_files(analysis_id)
+    
+    def _persist_table(self, df: pd.DataFrame, name: str, span: Optional[StageSpan] = None) -> Path:
+        """Write an intermediate table (plus a debug CSV copy if enabled)"""
+        table_file = self.processed_dir / f"{name}{COLUMNAR_EXT}"
+        write_table(df, str(table_file))
+        logger.info(f"Saved intermediate table: {table_file}")
+        if span is not None:
+            span.bytes_written += table_file.stat().st_size
+        
+        if self.export_csv:
+            try:
+                csv_file = table_file.with_suffix('.csv')
+                write_table(df, str(csv_file))
+                logger.debug(f"Exported debug CSV: {csv_file}")
+                if span is not None:
+                    span.bytes_written += csv_file.stat().st_size
+            except Exception as e:
+                logger.warning(f"Debug CSV export failed: {e}")
+        return table_file
+    
     def cleanup_intermediate_files(self, analysis_id: str):
         """Clean up intermediate processing files"""
         try:
             patterns = [
+                f"{analysis_id}_processed{COLUMNAR_EXT}",
+                f"{analysis_id}_annotated{COLUMNAR_EXT}",
                 f"{analysis_id}_processed.csv",
                 f"{analysis_id}_annotated.csv"
             ]
@@ -0,0 +1,242 @@
+"""
+MyVariant.info Client
+Async batch client for the MyVariant.info annotation API:
+- POST /variant with up to 1000 HGVS ids per request
+- Pooled keep-alive connections and a cap on concurrent requests
+- Token-bucket rate limiting instead of fixed sleeps
+
+The connection pool, rate limit and concurrency cap belong to the client and
+live on its own background event loop (asyncio primitives are bound to one
+loop). fetch() awaited on any other loop hands the requests to that loop, and
+blocking callers go through run_sync(), so every caller in the process shares
+one pool and the configured rate applies to all of them together.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+
+import httpx
+from loguru import logger
+
+MYVARIANT_URL = "https://myvariant.info/v1"
+MYVARIANT_FIELDS = "clinvar,dbsnp,cadd,dbnsfp.genename,dbnsfp.clinvar"
+MAX_BATCH_SIZE = 1000  # Upper limit of the batch endpoint
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second, bursts of up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep=asyncio.sleep):
+        """
+        Initialize bucket
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum stored tokens (defaults to `rate`, i.e. one second of burst,
+                      but at least one token)
+            clock: Time source, injectable for tests
+            sleep: Async sleep function, injectable for tests
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until `tokens` are available and take them"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await self.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class MyVariantClient:
+    """Fetch MyVariant.info documents for many variants with few requests"""
+
+    def __init__(self, base_url: str = MYVARIANT_URL, fields: str = MYVARIANT_FIELDS,
+                 assembly: str = "hg38", batch_size: int = MAX_BATCH_SIZE,
+                 max_concurrency: int = 4, requests_per_second: float = 5.0,
+                 timeout: float = 30.0, max_retries: int = 3,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        Initialize client
+
+        Args:
+            base_url: API root (point at a stub server in tests)
+            fields: Comma-separated fields to return
+            assembly: Genome assembly of the HGVS ids
+            batch_size: Ids per POST request (at most 1000)
+            max_concurrency: Requests in flight at once
+            requests_per_second: Sustained request rate allowed by the token bucket
+            timeout: Per-request timeout in seconds
+            max_retries: Retries for 429/5xx responses and transport errors
+            transport: Optional httpx transport (e.g. httpx.MockTransport)
+        """
+        self.base_url = base_url.rstrip("/")
+        self.fields = fields
+        self.assembly = assembly
+        self.batch_size = min(batch_size, MAX_BATCH_SIZE)
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.transport = transport
+
+        self.requests_sent = 0
+        self._lock = threading.Lock()
+        self._loop = None
+        self._loop_thread = None
+        # Created on and only used from self._loop
+        self._http = None
+        self._bucket = None
+        self._semaphore = None
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        """Background loop that owns the connection pool, rate limit and concurrency cap"""
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._loop.run_forever, name="myvariant-client", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+    def _resources(self):
+        """HTTP client, rate limiter and concurrency cap (call on the background loop)"""
+        if self._http is None:
+            limits = httpx.Limits(max_connections=self.max_concurrency,
+                                  max_keepalive_connections=self.max_concurrency)
+            self._http = httpx.AsyncClient(timeout=self.timeout, limits=limits, transport=self.transport)
+            self._bucket = TokenBucket(self.requests_per_second)
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._http, self._bucket, self._semaphore
+
+    async def _on_loop(self, coroutine: Awaitable):
+        """Await `coroutine` on the background loop from whichever loop is running"""
+        loop = self._ensure_loop()
+        if asyncio.get_running_loop() is loop:
+            return await coroutine
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+    def _batches(self, ids: List[str]) -> Iterable[List[str]]:
+        for start in range(0, len(ids), self.batch_size):
+            yield ids[start:start + self.batch_size]
+
+    async def _post_batch(self, client: httpx.AsyncClient, bucket: TokenBucket,
+                          semaphore: asyncio.Semaphore, batch: List[str]) -> Dict[str, Dict]:
+        data = {"ids": ",".join(batch), "fields": self.fields, "assembly": self.assembly}
+
+        for attempt in range(self.max_retries + 1):
+            async with semaphore:
+                await bucket.acquire()
+                self.requests_sent += 1
+                try:
+                    response = await client.post(f"{self.base_url}/variant", data=data)
+                except httpx.TransportError as e:
+                    if attempt == self.max_retries:
+                        logger.error(f"MyVariant.info request failed: {e}")
+                        return {}
+                    retry_after = 2 ** attempt
+                else:
+                    if response.status_code == 200:
+                        return self._index_documents(response.json())
+                    if response.status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                        logger.warning(f"MyVariant.info returned status {response.status_code}")
+                        return {}
+                    retry_after = float(response.headers.get("Retry-After", 2 ** attempt))
+
+            # Back off outside the semaphore so other batches keep flowing
+            await asyncio.sleep(retry_after)
+
+        return {}
+
+    @staticmethod
+    def _index_documents(documents: List[Dict]) -> Dict[str, Dict]:
+        """Map query id -> document, skipping ids the service does not know"""
+        found = {}
+        for doc in documents:
+            if doc.get("notfound") or "query" not in doc:
+                continue
+            # Ids with several hits return one document each; keep the first
+            found.setdefault(doc["query"], doc)
+        return found
+
+    async def fetch(self, ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Fetch documents for HGVS ids
+
+        Args:
+            ids: HGVS ids such as "chr17:g.43094464A>C"
+
+        Returns:
+            Dictionary of id -> raw MyVariant.info document (unknown ids omitted)
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return {}
+        return await self._on_loop(self._fetch(ids))
+
+    async def _fetch(self, ids: List[str]) -> Dict[str, Dict]:
+        client, bucket, semaphore = self._resources()
+        results = await asyncio.gather(*(
+            self._post_batch(client, bucket, semaphore, batch) for batch in self._batches(ids)
+        ))
+
+        found = {}
+        for result in results:
+            found.update(result)
+        logger.info(f"MyVariant.info: {len(found)}/{len(ids)} variants found")
+        return found
+
+    async def _aclose(self):
+        if self._http is not None:
+            http, self._http = self._http, None
+            await http.aclose()
+
+    def run_sync(self, coroutine: Awaitable):
+        """
+        Run a coroutine that uses this client on its background loop and wait
+
+        Raises:
+            RuntimeError: if called from a running event loop, which it would
+                          block; await the coroutine there instead
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            pass
+        else:
+            coroutine.close()
+            raise RuntimeError("MyVariantClient.run_sync() cannot be called from a running event loop; "
+                               "await the coroutine instead")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
+
+    def fetch_sync(self, ids: Iterable[str]) -> Dict[str, Dict]:
+        """Blocking wrapper around fetch() for callers outside an event loop"""
+        return self.run_sync(self.fetch(ids))
+
+    def close(self):
+        """Close the connection pool and stop the background loop"""
+        with self._lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self._aclose(), loop).result(timeout=5)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+            loop.close()
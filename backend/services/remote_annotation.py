@@ -0,0 +1,103 @@
+"""
+Remote Annotation Queue
+Background upgrade of local annotations with MyVariant.info data.
+
+Analyses complete with local (region-level) annotations; variants that could
+not be resolved to an exact allele are submitted here and annotated remotely
+on a dedicated event-loop thread, so the request path never waits on the API.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+
+from backend.services.variant_annotator import VariantAnnotator
+
+# callback(analysis_id, annotations) where annotations maps the index of each
+# submitted variant to its remote annotation, or is None if the lookup failed
+RemoteCallback = Callable[[str, Optional[Dict[int, Dict]]], None]
+
+
+class RemoteAnnotationQueue:
+    """Runs remote annotation jobs on a background event loop"""
+
+    def __init__(self, annotator: Optional[VariantAnnotator] = None):
+        """
+        Initialize queue
+
+        Args:
+            annotator: API-mode annotator; defaults to VariantAnnotator(use_api=True),
+                       created on the first submitted job
+        """
+        self.annotator = annotator
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._loop.run_forever, name="remote-annotation", daemon=True
+                )
+                self._thread.start()
+            return self._loop
+
+    async def _run(self, analysis_id: str, variants: List[Dict], callback: RemoteCallback):
+        try:
+            if self.annotator is None:
+                self.annotator = VariantAnnotator(use_api=True)
+            annotated = await self.annotator.abatch_annotate([dict(v) for v in variants])
+            annotations = {
+                index: result for index, (result, original) in enumerate(zip(annotated, variants))
+                if result != original
+            }
+        except Exception as e:
+            logger.error(f"Remote annotation failed for {analysis_id}: {e}")
+            annotations = None
+
+        try:
+            # Callbacks write to the database; keep them off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, callback, analysis_id, annotations)
+        except Exception as e:
+            logger.error(f"Remote annotation callback failed for {analysis_id}: {e}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def submit(self, analysis_id: str, variants: List[Dict], callback: RemoteCallback) -> Future:
+        """
+        Queue variants for remote annotation
+
+        Args:
+            analysis_id: Analysis the variants belong to
+            variants: Variant dictionaries with chrom, pos, ref, alt
+            callback: Called with (analysis_id, annotations) when done
+
+        Returns:
+            Future that resolves once the callback has run
+        """
+        loop = self._ensure_loop()
+        with self._lock:
+            self._pending += 1
+        logger.info(f"Queued {len(variants)} variants of {analysis_id} for remote annotation")
+        return asyncio.run_coroutine_threadsafe(self._run(analysis_id, variants, callback), loop)
+
+    @property
+    def pending(self) -> int:
+        """Number of submitted jobs that have not finished"""
+        return self._pending
+
+    def shutdown(self):
+        """Stop the background loop (pending jobs are abandoned)"""
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._loop.stop)
+                self._thread.join(timeout=5)
+                self._loop = None
+                self._thread = None
@@ -3,10 +3,11 @@ Variant Annotation Service
 Provides both local (fast, reliable) and API-based (comprehensive) annotation options
 """
 
-import requests
 from typing import Dict, List, Optional
 from loguru import logger
-import time
+
+from backend.services.annotation_cache import AnnotationCache
+from backend.services.myvariant_client import MyVariantClient
 
 class VariantAnnotator:
     """
@@ -15,17 +16,22 @@ class VariantAnnotator:
     2. MyVariant.info API (comprehensive, real-time)
     """
     
-    def __init__(self, use_api: bool = False):
+    def __init__(self, use_api: bool = False, cache: Optional[AnnotationCache] = None,
+                 client: Optional[MyVariantClient] = None):
         """
         Initialize annotator
         
         Args:
             use_api: If True, uses MyVariant.info API for real-time annotations
                     If False, uses local curated database (recommended for demos)
+            cache: Annotation cache; defaults to a bounded LRU backed by the
+                   shared on-disk SQLite store
+            client: MyVariant.info client; defaults to the public API with
+                    batched requests and rate limiting
         """
         self.use_api = use_api
-        self.api_base_url = "https://myvariant.info/v1"
-        self.cache = {}  # Simple in-memory cache
+        self.cache = cache if cache is not None else AnnotationCache()
+        self.client = client if client is not None else MyVariantClient()
         
     def annotate_variant(self, chrom: str, pos: int, ref: str, alt: str) -> Optional[Dict]:
         """
@@ -44,49 +50,37 @@ class VariantAnnotator:
             logger.info("Using local annotation database (fast mode)")
             return None  # Fallback to local annotations in annotate.py
         
-        # Build HGVS identifier for API query
-        hgvs_id = f"chr{chrom}:g.{pos}{ref}>{alt}"
-        
-        # Check cache first
-        if hgvs_id in self.cache:
-            logger.debug(f"Cache hit for {hgvs_id}")
-            return self.cache[hgvs_id]
+        hgvs_id = self._hgvs_id(chrom, pos, ref, alt)
+        return self._annotate_ids([hgvs_id]).get(hgvs_id)
+    
+    @staticmethod
+    def _hgvs_id(chrom, pos, ref, alt) -> str:
+        """Build the HGVS identifier used as API query and cache key"""
+        return f"chr{chrom}:g.{pos}{ref}>{alt}"
+    
+    async def _annotate_ids_async(self, hgvs_ids: List[str]) -> Dict[str, Dict]:
+        """Resolve HGVS ids from the cache, fetching only the misses from the API"""
+        annotations = self.cache.get_many(hgvs_ids)
+        missing = [hgvs_id for hgvs_id in dict.fromkeys(hgvs_ids) if hgvs_id not in annotations]
+        if not missing:
+            return annotations
         
+        logger.info(f"Querying MyVariant.info for {len(missing)} variants "
+                    f"({len(annotations)} served from cache)")
         try:
-            logger.info(f"Querying MyVariant.info API for {hgvs_id}")
-            
-            # Query MyVariant.info API
-            url = f"{self.api_base_url}/variant/{hgvs_id}"
-            params = {
-                'fields': 'clinvar,dbsnp,cadd,dbnsfp.genename,dbnsfp.clinvar',
-                'assembly': 'hg38'
-            }
-            
-            response = requests.get(url, params=params, timeout=5)
-            
-            if response.status_code == 200:
-                data = response.json()
-                
-                # Parse relevant information
-                annotation = self._parse_myvariant_response(data)
-                
-                # Cache the result
-                self.cache[hgvs_id] = annotation
-                
-                # Rate limiting: be nice to the API
-                time.sleep(0.1)
-                
-                return annotation
-            else:
-                logger.warning(f"API returned status {response.status_code}")
-                return None
-                
-        except requests.exceptions.Timeout:
-            logger.error("MyVariant.info API timeout")
-            return None
+            documents = await self.client.fetch(missing)
         except Exception as e:
             logger.error(f"Error querying MyVariant.info: {e}")
-            return None
+            return annotations
+        
+        fetched = {hgvs_id: self._parse_myvariant_response(doc) for hgvs_id, doc in documents.items()}
+        self.cache.set_many(fetched)
+        annotations.update(fetched)
+        return annotations
+    
+    def _annotate_ids(self, hgvs_ids: List[str]) -> Dict[str, Dict]:
+        """Blocking wrapper around _annotate_ids_async()"""
+        return self.client.run_sync(self._annotate_ids_async(hgvs_ids))
     
     def _parse_myvariant_response(self, data: Dict) -> Dict:
         """Parse MyVariant.info API response"""
@@ -153,23 +147,27 @@ class VariantAnnotator:
             logger.info("Batch annotation using local database")
             return variants
         
+        return self.client.run_sync(self.abatch_annotate(variants))
+    
+    async def abatch_annotate(self, variants: List[Dict]) -> List[Dict]:
+        """Async batch_annotate() for callers already inside an event loop"""
+        if not self.use_api:
+            return variants
+        
         logger.info(f"Batch annotating {len(variants)} variants via API")
         
-        annotated_variants = []
-        for variant in variants:
-            annotation = self.annotate_variant(
-                variant['chrom'],
-                variant['pos'],
-                variant['ref'],
-                variant['alt']
-            )
-            
+        hgvs_ids = [
+            self._hgvs_id(variant['chrom'], variant['pos'], variant['ref'], variant['alt'])
+            for variant in variants
+        ]
+        annotations = await self._annotate_ids_async(hgvs_ids)
+        
+        for variant, hgvs_id in zip(variants, hgvs_ids):
+            annotation = annotations.get(hgvs_id)
             if annotation:
                 variant.update(annotation)
-            
-            annotated_variants.append(variant)
         
-        return annotated_variants
+        return variants
 
 
 # Example usage and testing
@@ -197,7 +195,7 @@ if __name__ == "__main__":
     print("\n2. API MODE (Comprehensive, Real-time):")
     print("-" * 60)
     print("⚠️  Requires internet connection")
-    print("⚠️  Subject to API rate limits (60/min)")
+    print("⚠️  Batched (1000 ids/request) and rate limited client-side")
     print("Example: Would query MyVariant.info for real ClinVar data")
     
     # Uncomment to actually test API (requires internet)
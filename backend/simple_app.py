@@ -1,6 +1,7 @@
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from pydantic import BaseModel
+from backend.api.metrics import install_metrics
 import bcrypt
 from jose import jwt
 from datetime import datetime, timedelta
@@ -8,6 +9,9 @@ from typing import Optional
 
 app = FastAPI(title="GenomeGuard API", version="1.0.0")
 
+# Request metrics and GET /metrics (Prometheus text format)
+install_metrics(app)
+
 # CORS will be configured in main.py
 
 # Settings
@@ -19,6 +19,29 @@ class Settings(BaseSettings):
     
     # ML Models
     MODEL_DIR: str = "models"
+    ANNOTATION_DB: str = "data/annotation_db"  # relative to the project root
+    
+    # Remote annotation (local first, MyVariant.info upgrade in the background)
+    REMOTE_ANNOTATION: bool = False
+    REMOTE_ANNOTATION_MAX_VARIANTS: int = 1000
+    
+    # Micro-batched risk scoring across concurrent analyses (thread executor only)
+    INFERENCE_BATCHING: bool = True
+    INFERENCE_MAX_BATCH_ROWS: int = 64
+    INFERENCE_MAX_WAIT_MS: float = 5.0
+    
+    # Where VCF pipelines run: "process" (worker pool) or "thread"
+    ANALYSIS_EXECUTOR: str = "process"
+    ANALYSIS_WORKERS: int = 0  # 0 = one per CPU core
+    ANALYSIS_MAX_CONCURRENT: int = 0  # 0 = ANALYSIS_WORKERS
+    ANALYSIS_MAX_QUEUED: int = 100  # further uploads get 429
+    
+    # Stage checkpoints and recovery of analyses interrupted by a restart
+    ANALYSIS_CHECKPOINTS: bool = True
+    ANALYSIS_CHECKPOINT_MIN_BYTES: int = 50 * 1024 * 1024  # smaller VCFs just rerun
+    ANALYSIS_RECOVERY: bool = True
+    ANALYSIS_HEARTBEAT_SECONDS: float = 30.0  # also the interval of recovery sweeps
+    ANALYSIS_STALE_SECONDS: float = 120.0  # no heartbeat for this long = stuck
     
     # Logging
     LOG_LEVEL: str = "INFO"
@@ -10,5 +10,9 @@ db.users.createIndex({ "username": 1 }, { unique: true });
 db.users.createIndex({ "email": 1 }, { unique: true });
 db.analyses.createIndex({ "user_id": 1 });
 db.analyses.createIndex({ "created_at": -1 });
+// Lookup of the user's earlier results for re-uploaded files
+db.analyses.createIndex({ "user_id": 1, "content_hash": 1, "pipeline_version": 1, "model_version": 1, "status": 1 });
+// Periodic sweep for analyses whose owner stopped heartbeating
+db.analyses.createIndex({ "status": 1, "heartbeat_at": 1 });
 
 print('Database initialized successfully');
\ No newline at end of file
@@ -1,5 +1,13 @@
 import pandas as pd
 import os
+import sys
+from pathlib import Path
+
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.annotation_db import load_annotation_db
+from scripts.table_io import read_table, write_table
 
 # Comprehensive disease variant database (simulated ClinVar/dbSNP annotations)
 # Maps chromosome regions to known disease genes
@@ -99,56 +107,78 @@ DISEASE_VARIANTS = {
     'FMR1': {'chrom': 'X', 'pos_range': (147910000, 147950000), 'genes': ['FMR1'], 'diseases': ['Fragile X Syndrome'], 'risk': 'High'},
 }
 
-def annotate_variants(input_file, output_file):
-    """Annotate variants with disease associations"""
-    df = pd.read_csv(input_file)
-    
-    # Add annotation columns
-    df['GENE'] = ''
-    df['DISEASE_RISK'] = 'Low'
-    df['PATHOGENICITY'] = 'Benign'
-    df['CLINICAL_SIG'] = 'Unknown'
-    
-    annotated_count = 0
-    
-    for idx, row in df.iterrows():
-        chrom = str(row['CHROM']).replace('chr', '')  # Normalize chromosome format
-        pos = int(row['POS']) if 'POS' in row and pd.notna(row['POS']) else 0
-        
-        # Position-based annotation with quality filter
-        if row.get('QUAL') and row['QUAL'] > 20:  # Quality threshold
-            for variant_name, info in DISEASE_VARIANTS.items():
-                if chrom == info['chrom']:
-                    # Check if position falls within gene range
-                    if 'pos_range' in info:
-                        start, end = info['pos_range']
-                        if start <= pos <= end:
-                            df.at[idx, 'GENE'] = info['genes'][0]
-                            df.at[idx, 'DISEASE_RISK'] = info['risk']
-                            df.at[idx, 'PATHOGENICITY'] = 'Pathogenic' if info['risk'] == 'High' else 'Likely Pathogenic'
-                            df.at[idx, 'CLINICAL_SIG'] = ', '.join(info['diseases'])
-                            annotated_count += 1
-                            break
-                    else:
-                        # Fallback for variants without position range (chromosome match only)
-                        df.at[idx, 'GENE'] = info['genes'][0]
-                        df.at[idx, 'DISEASE_RISK'] = info.get('risk', 'Medium')
-                        df.at[idx, 'PATHOGENICITY'] = 'Likely Pathogenic'
-                        df.at[idx, 'CLINICAL_SIG'] = ', '.join(info['diseases'])
-                        annotated_count += 1
-                        break
-    
-    df.to_csv(output_file, index=False)
+# Compiled annotation store (see scripts/build_annotation_db.py). When no store
+# has been built, the index is built from DISEASE_VARIANTS instead.
+ANNOTATION_DB_PATH = os.getenv(
+    'ANNOTATION_DB', str(Path(__file__).resolve().parent.parent / 'data' / 'annotation_db')
+)
+
+_annotation_db = None
+
+def get_annotation_db():
+    """Open (memory-map) the annotation store once per process"""
+    global _annotation_db
+    if _annotation_db is None:
+        _annotation_db = load_annotation_db(ANNOTATION_DB_PATH, DISEASE_VARIANTS)
+    return _annotation_db
+
+def use_annotation_db(path):
+    """Point get_annotation_db() at another store (reopened on next use)"""
+    global ANNOTATION_DB_PATH, _annotation_db
+    if path != ANNOTATION_DB_PATH:
+        ANNOTATION_DB_PATH = path
+        _annotation_db = None
+
+# Variants at or below this quality score are left unannotated
+MIN_QUALITY = 20
+
+def annotate_frame(df, return_unresolved=False):
+    """Annotate an in-memory variant DataFrame with disease associations (adds columns in place)
+
+    With `return_unresolved`, also returns a boolean mask of the variants that
+    passed the quality filter and fell inside a disease gene but matched no
+    exact-allele record; those are the candidates for remote annotation.
+    """
+    db = get_annotation_db()
+    positions = pd.to_numeric(df['POS'], errors='coerce').fillna(0).to_numpy(dtype='int64')
+    
+    # Exact-allele records first, gene-region records as the fallback
+    has_alleles = 'REF' in df.columns and 'ALT' in df.columns
+    records = db.lookup(
+        df['CHROM'], positions,
+        df['REF'] if has_alleles else None,
+        df['ALT'] if has_alleles else None,
+    )
+    
+    # Position-based annotation with quality filter
+    if 'QUAL' in df.columns:
+        passes_quality = (pd.to_numeric(df['QUAL'], errors='coerce') > MIN_QUALITY).to_numpy()
+        records[~passes_quality] = -1
+    else:
+        records[:] = -1
+    
+    for name, values in db.annotations.take(records).items():
+        df[name] = values
+    
+    annotated_count = int((records >= 0).sum())
     print(f"Annotated {len(df)} variants ({annotated_count} matched disease genes)")
+    if return_unresolved:
+        return df, db.region_only(records)
+    return df
+
+def annotate_variants(input_file, output_file):
+    """Annotate variants with disease associations (CSV or columnar `.npz` in and out)"""
+    df = annotate_frame(read_table(input_file))
+    write_table(df, output_file)
     return True
 
 if __name__ == "__main__":
     processed_dir = "data/processed"
     
     for file in os.listdir(processed_dir):
-        if file.endswith('_processed.csv'):
+        if file.endswith(('_processed.csv', '_processed.npz')):
             input_path = os.path.join(processed_dir, file)
-            output_path = os.path.join(processed_dir, file.replace('_processed.csv', '_annotated.csv'))
+            output_path = os.path.join(processed_dir, file.replace('_processed.', '_annotated.'))
             
             print(f"Annotating {file}...")
             annotate_variants(input_path, output_path)
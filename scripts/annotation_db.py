@@ -0,0 +1,495 @@
+"""
+Annotation lookup structures and the on-disk annotation store
+
+IntervalIndex answers "which annotation record covers (chrom, pos)?" for whole
+arrays of variants at once. Intervals are flattened at build time into sorted,
+non-overlapping segments per chromosome, so each lookup is a single
+np.searchsorted call per chromosome. Where intervals overlap, the record that
+comes first in the input wins, matching the first-match order of the original
+DISEASE_VARIANTS scan.
+
+AlleleIndex answers "is there a record for exactly this (chrom, pos, ref, alt)?".
+Keys are 64-bit integers, (pos << 32) | allele hash, kept sorted per
+chromosome; a second, independent hash is stored alongside and checked on every
+hit, so a false match needs two 32-bit hashes to collide at the same position.
+
+AnnotationTable holds the annotation columns (GENE, DISEASE_RISK, ...) for each
+record as categorical codes, so turning lookup results into DataFrame columns
+is an integer take.
+
+AnnotationDB bundles both and can be saved as a directory of .npy arrays plus
+meta.json. Opening a store memory-maps the arrays, so startup does no parsing
+and worker processes share the same pages through the OS page cache. Stores
+are compiled from TSV or ClinVar-style VCF sources with
+scripts/build_annotation_db.py.
+"""
+
+import gzip
+import heapq
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+STORE_VERSION = 1
+
+# Upper bound used for records that match a whole chromosome
+WHOLE_CHROMOSOME_END = 2 ** 62
+
+# Annotation columns and the value used when no record matches
+ANNOTATION_DEFAULTS = {
+    'GENE': '',
+    'DISEASE_RISK': 'Low',
+    'PATHOGENICITY': 'Benign',
+    'CLINICAL_SIG': 'Unknown',
+}
+
+
+def normalize_chrom(chrom):
+    """Normalize a chromosome name the way preprocess.py does ('chr17' -> '17')"""
+    return str(chrom).replace('chr', '')
+
+
+def _flatten_intervals(starts, ends, records):
+    """Turn possibly-overlapping intervals into sorted segment bounds.
+
+    Returns (bounds, segment_records): segment i covers [bounds[i], bounds[i+1])
+    and maps to segment_records[i] (-1 for gaps). Lower record ids win overlaps.
+    """
+    points = np.unique(np.concatenate([starts, ends + 1]))
+    order = np.argsort(starts, kind='stable')
+    segment_records = np.empty(len(points), dtype=np.int32)
+
+    active = []  # heap of (record, end); expired entries are dropped lazily
+    j = 0
+    for k, point in enumerate(points):
+        while j < len(order) and starts[order[j]] <= point:
+            heapq.heappush(active, (int(records[order[j]]), int(ends[order[j]])))
+            j += 1
+        while active and active[0][1] < point:
+            heapq.heappop(active)
+        segment_records[k] = active[0][0] if active else -1
+
+    # Merge neighbouring segments that map to the same record
+    keep = np.ones(len(points), dtype=bool)
+    keep[1:] = segment_records[1:] != segment_records[:-1]
+    return points[keep].astype(np.int64), segment_records[keep]
+
+
+class IntervalIndex:
+    """Per-chromosome sorted segment index for vectorized interval lookups"""
+
+    def __init__(self, segments):
+        # chrom -> (bounds, records) as produced by _flatten_intervals
+        self.segments = segments
+
+    def save(self, path):
+        """Write segments as two concatenated arrays; returns {chrom: [offset, length]}"""
+        chroms = sorted(self.segments)
+        offsets, offset = {}, 0
+        for chrom in chroms:
+            length = len(self.segments[chrom][0])
+            offsets[chrom] = [offset, length]
+            offset += length
+        bounds = [self.segments[c][0] for c in chroms] or [np.empty(0, dtype=np.int64)]
+        records = [self.segments[c][1] for c in chroms] or [np.empty(0, dtype=np.int32)]
+        np.save(os.path.join(path, 'region_bounds.npy'), np.concatenate(bounds).astype(np.int64))
+        np.save(os.path.join(path, 'region_records.npy'), np.concatenate(records).astype(np.int32))
+        return offsets
+
+    @classmethod
+    def open(cls, path, offsets):
+        """Memory-map segments written by save(); per-chromosome arrays are views, not copies"""
+        bounds = np.load(os.path.join(path, 'region_bounds.npy'), mmap_mode='r')
+        records = np.load(os.path.join(path, 'region_records.npy'), mmap_mode='r')
+        return cls({
+            chrom: (bounds[offset:offset + length], records[offset:offset + length])
+            for chrom, (offset, length) in offsets.items()
+        })
+
+    @classmethod
+    def build(cls, chroms, starts, ends):
+        """Build from parallel arrays; the record id of each interval is its position in the input"""
+        chroms = np.asarray([normalize_chrom(c) for c in chroms], dtype=object)
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        records = np.arange(len(starts), dtype=np.int32)
+
+        segments = {}
+        for chrom in pd.unique(chroms):
+            mask = chroms == chrom
+            segments[chrom] = _flatten_intervals(starts[mask], ends[mask], records[mask])
+        return cls(segments)
+
+    def lookup(self, chroms, positions):
+        """Return the covering record id for each variant (-1 where none covers it)"""
+        codes, uniques = pd.factorize(pd.Series(chroms), use_na_sentinel=True)
+        positions = np.asarray(positions, dtype=np.int64)
+        result = np.full(len(positions), -1, dtype=np.int32)
+
+        for code, chrom in enumerate(uniques):
+            segment = self.segments.get(normalize_chrom(chrom))
+            if segment is None:
+                continue
+            bounds, records = segment
+            mask = codes == code
+            idx = np.searchsorted(bounds, positions[mask], side='right') - 1
+            result[mask] = np.where(idx >= 0, records[np.maximum(idx, 0)], -1)
+        return result
+
+
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+_LOW_32 = np.uint64(0xFFFFFFFF)
+
+
+def allele_hashes(refs, alts):
+    """Two independent 32-bit hashes of each (ref, alt) pair.
+
+    Categorical inputs are hashed per category, so this stays cheap on large frames.
+    """
+    ref_hash = pd.util.hash_pandas_object(pd.Series(refs), index=False).to_numpy()
+    alt_hash = pd.util.hash_pandas_object(pd.Series(alts), index=False).to_numpy()
+    combined = (ref_hash * _HASH_MIX) ^ alt_hash
+    return (combined & _LOW_32).astype(np.uint32), (combined >> np.uint64(32)).astype(np.uint32)
+
+
+def _allele_keys(positions, primary):
+    return (np.asarray(positions, dtype=np.uint64) << np.uint64(32)) | primary.astype(np.uint64)
+
+
+class AlleleIndex:
+    """Per-chromosome sorted (position, allele) keys for exact-variant lookups"""
+
+    def __init__(self, tables):
+        # chrom -> (keys, checks, records), sorted by keys
+        self.tables = tables
+
+    def __len__(self):
+        return sum(len(keys) for keys, _, _ in self.tables.values())
+
+    @classmethod
+    def build(cls, chroms, positions, refs, alts, records):
+        """Build from parallel arrays; the first record wins for duplicate alleles"""
+        chroms = np.asarray([normalize_chrom(c) for c in chroms], dtype=object)
+        primary, check = allele_hashes(refs, alts)
+        keys = _allele_keys(positions, primary)
+        records = np.asarray(records, dtype=np.int32)
+
+        tables = {}
+        for chrom in pd.unique(chroms):
+            mask = chroms == chrom
+            c_keys, c_checks, c_records = keys[mask], check[mask], records[mask]
+            order = np.lexsort((c_checks, c_keys))
+            c_keys, c_checks, c_records = c_keys[order], c_checks[order], c_records[order]
+            first = np.ones(len(c_keys), dtype=bool)
+            first[1:] = (c_keys[1:] != c_keys[:-1]) | (c_checks[1:] != c_checks[:-1])
+            tables[chrom] = (c_keys[first], c_checks[first], c_records[first])
+        return cls(tables)
+
+    def lookup(self, chroms, positions, refs, alts):
+        """Return the record id for each exact (chrom, pos, ref, alt) match (-1 where none)"""
+        codes, uniques = pd.factorize(pd.Series(chroms), use_na_sentinel=True)
+        primary, check = allele_hashes(refs, alts)
+        query_keys = _allele_keys(np.maximum(np.asarray(positions, dtype=np.int64), 0), primary)
+        result = np.full(len(query_keys), -1, dtype=np.int32)
+
+        for code, chrom in enumerate(uniques):
+            table = self.tables.get(normalize_chrom(chrom))
+            if table is None:
+                continue
+            keys, checks, records = table
+            rows = np.flatnonzero(codes == code)
+            q_keys, q_checks = query_keys[rows], check[rows]
+            idx = np.searchsorted(keys, q_keys, side='left')
+
+            # Walk forward over equal keys; more than one step only happens
+            # when two alleles at a position share the primary hash
+            pending = idx < len(keys)
+            pending[pending] = keys[idx[pending]] == q_keys[pending]
+            while pending.any():
+                match = pending.copy()
+                match[pending] = checks[idx[pending]] == q_checks[pending]
+                result[rows[match]] = records[idx[match]]
+                pending &= ~match
+                idx[pending] += 1
+                pending[pending] = idx[pending] < len(keys)
+                pending[pending] = keys[idx[pending]] == q_keys[pending]
+        return result
+
+    def save(self, path):
+        """Write tables as three concatenated arrays; returns {chrom: [offset, length]}"""
+        chroms = sorted(self.tables)
+        offsets, offset = {}, 0
+        for chrom in chroms:
+            length = len(self.tables[chrom][0])
+            offsets[chrom] = [offset, length]
+            offset += length
+        for i, (name, dtype) in enumerate([('keys', np.uint64), ('checks', np.uint32), ('records', np.int32)]):
+            parts = [self.tables[c][i] for c in chroms] or [np.empty(0, dtype=dtype)]
+            np.save(os.path.join(path, f'allele_{name}.npy'), np.concatenate(parts).astype(dtype))
+        return offsets
+
+    @classmethod
+    def open(cls, path, offsets):
+        """Memory-map tables written by save()"""
+        arrays = [
+            np.load(os.path.join(path, f'allele_{name}.npy'), mmap_mode='r')
+            for name in ('keys', 'checks', 'records')
+        ]
+        return cls({
+            chrom: tuple(array[offset:offset + length] for array in arrays)
+            for chrom, (offset, length) in offsets.items()
+        })
+
+
+class AnnotationTable:
+    """Annotation columns per record, stored as categorical codes"""
+
+    def __init__(self, columns):
+        # name -> (codes, categories); codes has one extra trailing entry that
+        # points at the column default, so record id -1 selects the default
+        self.columns = columns
+
+    def __len__(self):
+        codes, _ = next(iter(self.columns.values()))
+        return len(codes) - 1
+
+    def save(self, path):
+        for name, (codes, categories) in self.columns.items():
+            np.save(os.path.join(path, f'{name}.codes.npy'), np.asarray(codes, dtype=np.int32))
+            np.save(os.path.join(path, f'{name}.categories.npy'), np.asarray(categories, dtype=str))
+
+    @classmethod
+    def open(cls, path):
+        columns = {}
+        for name in ANNOTATION_DEFAULTS:
+            codes = np.load(os.path.join(path, f'{name}.codes.npy'), mmap_mode='r')
+            categories = np.load(os.path.join(path, f'{name}.categories.npy'), mmap_mode='r')
+            columns[name] = (codes, pd.Index(categories, dtype=object))
+        return cls(columns)
+
+    @classmethod
+    def from_values(cls, values):
+        """Build from {column: list of per-record values}"""
+        columns = {}
+        for name, default in ANNOTATION_DEFAULTS.items():
+            categorical = pd.Categorical(list(values[name]) + [default])
+            columns[name] = (categorical.codes.astype(np.int32), np.asarray(categorical.categories, dtype=object))
+        return cls(columns)
+
+    def take(self, records):
+        """Annotation columns for the given record ids (-1 -> defaults)"""
+        return {
+            name: pd.Categorical.from_codes(codes[records], categories=categories)
+            for name, (codes, categories) in self.columns.items()
+        }
+
+
+class AnnotationDB:
+    """Region index, optional exact-allele index and their annotation records.
+
+    Region records come first in the annotation table, followed by allele
+    records, so `allele_offset` tells the two kinds of match apart.
+    """
+
+    def __init__(self, regions, annotations, alleles=None, allele_offset=None, source='builtin'):
+        self.regions = regions
+        self.annotations = annotations
+        self.alleles = alleles
+        self.allele_offset = len(annotations) if allele_offset is None else allele_offset
+        self.source = source
+
+    @classmethod
+    def build(cls, regions, alleles=None, source='builtin'):
+        """Build from a region table (chrom, start, end + ANNOTATION_DEFAULTS columns)
+        and an optional allele table (chrom, pos, ref, alt + ANNOTATION_DEFAULTS columns)"""
+        region_index = IntervalIndex.build(regions['chrom'].to_numpy(), regions['start'].to_numpy(), regions['end'].to_numpy())
+        if alleles is None or alleles.empty:
+            return cls(region_index, AnnotationTable.from_values(regions), source=source)
+
+        columns = list(ANNOTATION_DEFAULTS)
+        allele_offset = len(regions)
+        allele_index = AlleleIndex.build(
+            alleles['chrom'].to_numpy(), alleles['pos'].to_numpy(), alleles['ref'], alleles['alt'],
+            np.arange(allele_offset, allele_offset + len(alleles)),
+        )
+        records = pd.concat([regions[columns], alleles[columns]], ignore_index=True)
+        return cls(region_index, AnnotationTable.from_values(records), allele_index, allele_offset, source)
+
+    def lookup(self, chroms, positions, refs=None, alts=None):
+        """Record id per variant (-1 if unannotated).
+
+        Exact-allele records take precedence when alleles are given and the
+        store has an allele index; otherwise the covering region record is used.
+        """
+        records = self.regions.lookup(chroms, positions)
+        if self.alleles is not None and refs is not None and alts is not None:
+            exact = self.alleles.lookup(chroms, positions, refs, alts)
+            records = np.where(exact >= 0, exact, records)
+        return records
+
+    def region_only(self, records):
+        """Mask of lookups that hit a gene region but no exact-allele record"""
+        records = np.asarray(records)
+        return (records >= 0) & (records < self.allele_offset)
+
+    def save(self, path):
+        """Write the store to directory `path`, replacing any existing store atomically"""
+        path = os.path.abspath(path)
+        tmp_path = f'{path}.tmp-{os.getpid()}'
+        os.makedirs(tmp_path)
+        try:
+            meta = {
+                'version': STORE_VERSION,
+                'source': self.source,
+                'records': len(self.annotations),
+                'regions': self.regions.save(tmp_path),
+                'allele_offset': self.allele_offset,
+                'alleles': self.alleles.save(tmp_path) if self.alleles is not None else None,
+            }
+            self.annotations.save(tmp_path)
+            with open(os.path.join(tmp_path, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+
+            old_path = f'{path}.old-{os.getpid()}'
+            if os.path.exists(path):
+                os.rename(path, old_path)
+            os.rename(tmp_path, path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+
+    @classmethod
+    def open(cls, path):
+        """Open a store written by save() with all arrays memory-mapped"""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported annotation store version: {meta.get('version')}")
+        alleles = AlleleIndex.open(path, meta['alleles']) if meta.get('alleles') is not None else None
+        return cls(
+            IntervalIndex.open(path, meta['regions']), AnnotationTable.open(path),
+            alleles, meta.get('allele_offset'), meta.get('source', path),
+        )
+
+
+def disease_variant_regions(disease_variants):
+    """Region table for a DISEASE_VARIANTS-style dict, in dict order"""
+    chroms, starts, ends = [], [], []
+    values = {name: [] for name in ANNOTATION_DEFAULTS}
+
+    for info in disease_variants.values():
+        chroms.append(info['chrom'])
+        if 'pos_range' in info:
+            start, end = info['pos_range']
+            risk = info['risk']
+            pathogenicity = 'Pathogenic' if risk == 'High' else 'Likely Pathogenic'
+        else:
+            # Chromosome match only
+            start, end = 0, WHOLE_CHROMOSOME_END
+            risk = info.get('risk', 'Medium')
+            pathogenicity = 'Likely Pathogenic'
+        starts.append(start)
+        ends.append(end)
+        values['GENE'].append(info['genes'][0])
+        values['DISEASE_RISK'].append(risk)
+        values['PATHOGENICITY'].append(pathogenicity)
+        values['CLINICAL_SIG'].append(', '.join(info['diseases']))
+
+    return pd.DataFrame({'chrom': chroms, 'start': starts, 'end': ends, **values})
+
+
+def classify_clinical_significance(clnsig):
+    """Map a ClinVar CLNSIG value to (PATHOGENICITY, DISEASE_RISK)"""
+    sig = clnsig.lower().replace('_', ' ')
+    if 'conflicting' in sig:
+        return 'Uncertain Significance', 'Low'
+    if sig.startswith('pathogenic'):
+        return 'Pathogenic', 'High'
+    if sig.startswith('likely pathogenic'):
+        return 'Likely Pathogenic', 'Medium'
+    if 'benign' in sig:
+        return 'Benign', 'Low'
+    return 'Uncertain Significance', 'Low'
+
+
+def read_region_tsv(path):
+    """Read a region TSV: chrom, start, end, gene and optional risk, diseases, pathogenicity columns"""
+    df = pd.read_csv(path, sep='\t', dtype={'chrom': str})
+    df.columns = [c.lstrip('#').strip().lower() for c in df.columns]
+    missing = {'chrom', 'start', 'end', 'gene'} - set(df.columns)
+    if missing:
+        raise ValueError(f"Region TSV is missing columns: {', '.join(sorted(missing))}")
+
+    risk = df['risk'].fillna('Medium') if 'risk' in df.columns else pd.Series('Medium', index=df.index)
+    if 'pathogenicity' in df.columns:
+        pathogenicity = df['pathogenicity']
+    else:
+        pathogenicity = risk.map(lambda r: 'Pathogenic' if r == 'High' else 'Likely Pathogenic')
+    diseases = df['diseases'].fillna('Unknown') if 'diseases' in df.columns else pd.Series('Unknown', index=df.index)
+
+    return pd.DataFrame({
+        'chrom': df['chrom'].map(normalize_chrom),
+        'start': df['start'].astype(np.int64),
+        'end': df['end'].astype(np.int64),
+        'GENE': df['gene'].fillna(''),
+        'DISEASE_RISK': risk,
+        'PATHOGENICITY': pathogenicity,
+        'CLINICAL_SIG': diseases.str.replace(';', ', ', regex=False),
+    })
+
+
+def read_clinvar_vcf(path):
+    """Read a ClinVar-style VCF (GENEINFO, CLNSIG, CLNDN in INFO) into one row per record"""
+    rows = []
+    opener = gzip.open if str(path).endswith('.gz') else open
+    with opener(path, 'rt') as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) < 8 or not fields[1].isdigit():
+                continue
+
+            info = dict(item.split('=', 1) for item in fields[7].split(';') if '=' in item)
+            pathogenicity, risk = classify_clinical_significance(info.get('CLNSIG', ''))
+            diseases = info.get('CLNDN', 'Unknown').replace('_', ' ').replace('|', ', ')
+            gene = info.get('GENEINFO', '').split(':')[0]
+            rows.append((
+                normalize_chrom(fields[0]), int(fields[1]), fields[3], fields[4].split(',')[0],
+                gene, risk, pathogenicity, diseases,
+            ))
+
+    return pd.DataFrame(rows, columns=['chrom', 'pos', 'ref', 'alt', 'GENE', 'DISEASE_RISK', 'PATHOGENICITY', 'CLINICAL_SIG'])
+
+
+def clinvar_regions(variants):
+    """Gene regions spanned by the records of a ClinVar source, one per (chrom, gene)
+
+    Only the gene is carried over: significance belongs to a single allele, so
+    a different allele at a record's position must not inherit it.
+    """
+    genes = variants[variants['GENE'] != ''].assign(
+        start=variants['pos'].astype(np.int64),
+        end=variants['pos'].astype(np.int64) + variants['ref'].str.len().clip(lower=1) - 1,
+    )
+    regions = genes.groupby(['chrom', 'GENE'], sort=False).agg(start=('start', 'min'), end=('end', 'max')).reset_index()
+    return pd.DataFrame({
+        'chrom': regions['chrom'],
+        'start': regions['start'],
+        'end': regions['end'],
+        'GENE': regions['GENE'],
+        'DISEASE_RISK': ANNOTATION_DEFAULTS['DISEASE_RISK'],
+        'PATHOGENICITY': 'Uncertain Significance',
+        'CLINICAL_SIG': ANNOTATION_DEFAULTS['CLINICAL_SIG'],
+    })
+
+
+def load_annotation_db(path, disease_variants):
+    """Open the store at `path` if there is one, else build from the in-code gene list"""
+    if path and os.path.exists(os.path.join(path, 'meta.json')):
+        return AnnotationDB.open(path)
+    return AnnotationDB.build(disease_variant_regions(disease_variants), source='builtin')
@@ -0,0 +1,199 @@
+"""
+Pipeline benchmarks on synthetic VCF data
+
+Usage:
+    python scripts/benchmark.py intermediate [--variants N]
+    python scripts/benchmark.py scoring [--rows N]
+    python scripts/benchmark.py metrics [--requests N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.annotate import DISEASE_VARIANTS, annotate_variants
+from scripts.predict import SimpleRiskModel, predict_disease_risk, score_features
+from scripts.preprocess import preprocess_vcf
+from scripts.table_io import read_table, write_table
+
+CHROMOSOMES = [str(c) for c in range(1, 23)] + ['X']
+BASES = np.array(['A', 'C', 'G', 'T'])
+
+
+def write_synthetic_vcf(path, n_variants, seed=42, gene_fraction=0.2):
+    """Write a VCF with `n_variants` records, `gene_fraction` of them inside known disease genes"""
+    rng = np.random.default_rng(seed)
+    regions = [(info['chrom'], *info['pos_range']) for info in DISEASE_VARIANTS.values()]
+
+    in_gene = rng.random(n_variants) < gene_fraction
+    region_idx = rng.integers(0, len(regions), n_variants)
+    chroms = np.where(
+        in_gene,
+        np.array([regions[i][0] for i in region_idx]),
+        np.array(CHROMOSOMES)[rng.integers(0, len(CHROMOSOMES), n_variants)],
+    )
+    starts = np.array([regions[i][1] for i in region_idx])
+    ends = np.array([regions[i][2] for i in region_idx])
+    positions = np.where(
+        in_gene,
+        starts + (rng.random(n_variants) * (ends - starts)).astype(np.int64),
+        rng.integers(1, 150_000_000, n_variants),
+    )
+    refs = BASES[rng.integers(0, 4, n_variants)]
+    alts = BASES[(np.searchsorted(BASES, refs) + rng.integers(1, 4, n_variants)) % 4]
+    quals = rng.integers(5, 99, n_variants)
+    genotypes = np.where(rng.random(n_variants) < 0.7, '0/1', '1/1')
+
+    with open(path, 'w') as f:
+        f.write('##fileformat=VCFv4.2\n##source=HelixMindBenchmark\n')
+        f.write('#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tSAMPLE1\n')
+        for i in range(n_variants):
+            f.write(f'{chroms[i]}\t{positions[i]}\t.\t{refs[i]}\t{alts[i]}\t{quals[i]}\tPASS\t.\tGT\t{genotypes[i]}\n')
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def _run_stages(vcf_path, work_dir, ext):
+    processed = os.path.join(work_dir, f'bench_processed{ext}')
+    annotated = os.path.join(work_dir, f'bench_annotated{ext}')
+
+    _, t_pre = _timed(preprocess_vcf, vcf_path, processed)
+    _, t_ann = _timed(annotate_variants, processed, annotated)
+    _, t_pred = _timed(predict_disease_risk, vcf_path, annotated)
+    table = read_table(processed)
+    _, t_write = _timed(write_table, table, processed)
+    _, t_read = _timed(read_table, processed)
+
+    return {
+        'preprocess': t_pre,
+        'annotate': t_ann,
+        'predict': t_pred,
+        'table write': t_write,
+        'table read': t_read,
+        'size (MB)': (os.path.getsize(processed) + os.path.getsize(annotated)) / 1e6,
+    }
+
+
+def bench_intermediate(args):
+    """Stage times with CSV hand-offs (before) vs the columnar format (after)"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        vcf_path = os.path.join(work_dir, 'bench.vcf')
+        write_synthetic_vcf(vcf_path, args.variants)
+
+        before = _run_stages(vcf_path, work_dir, '.csv')
+        after = _run_stages(vcf_path, work_dir, '.npz')
+
+    print(f"\n=== Intermediate format: {args.variants} variants ===")
+    print(f"{'stage':<14}{'csv':>12}{'npz':>12}{'speedup':>10}")
+    for stage in before:
+        unit = '' if stage.startswith('size') else 's'
+        speedup = before[stage] / after[stage] if after[stage] else float('inf')
+        print(f"{stage:<14}{before[stage]:>11.3f}{unit:1}{after[stage]:>11.3f}{unit:1}{speedup:>9.1f}x")
+
+
+def synthetic_features(n_rows, seed=42):
+    """Feature matrix shaped like create_features() output, one row per analysis"""
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.poisson(1.5, n_rows), rng.poisson(3, n_rows), rng.poisson(15, n_rows),
+        rng.poisson(0.8, n_rows), rng.normal(35, 12, n_rows),
+        rng.poisson(0.3, n_rows), rng.poisson(0.2, n_rows), rng.poisson(0.15, n_rows),
+    ]).astype(np.float64)
+
+
+def bench_scoring(args):
+    """Per-analysis predict()+predict_proba() calls (before) vs one batched scoring call (after)"""
+    model = SimpleRiskModel()
+    X = synthetic_features(args.rows)
+
+    def per_row():
+        return [(model.predict([row])[0], model.predict_proba([row])[0][1]) for row in X]
+
+    _, t_before = _timed(per_row)
+    _, t_after = _timed(score_features, model, X)
+
+    print(f"\n=== Risk scoring: {args.rows} feature rows ===")
+    print(f"per-row calls : {t_before:.4f}s ({args.rows / t_before:,.0f} rows/s)")
+    print(f"batched       : {t_after:.4f}s ({args.rows / t_after:,.0f} rows/s)")
+    print(f"speedup       : {t_before / t_after:.1f}x")
+
+
+def bench_metrics(args):
+    """Per-request cost of the /metrics middleware on a no-op ASGI app, plus scrape time"""
+    from backend.api.metrics import HttpMetrics, MetricsRegistry, PrometheusMiddleware
+    from backend.services.metrics import LATENCY_MS_BUCKETS, Histogram
+
+    class Route:
+        path = '/analysis/results/{analysis_id}'
+
+    async def endpoint(scope, receive, send):
+        scope['route'] = Route
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        pass
+
+    async def serve(app):
+        scope = {'type': 'http', 'method': 'GET', 'path': '/analysis/results/1'}
+        for _ in range(args.requests):
+            await app(dict(scope), receive, send)
+
+    registry = MetricsRegistry()
+    http_metrics = HttpMetrics()
+    registry.register(http_metrics.collect)
+    _, t_before = _timed(asyncio.run, serve(endpoint))
+    _, t_after = _timed(asyncio.run, serve(PrometheusMiddleware(endpoint, http_metrics)))
+
+    histogram = Histogram(LATENCY_MS_BUCKETS)
+    values = np.random.default_rng(0).exponential(20, args.requests).tolist()
+    _, t_observe = _timed(lambda: [histogram.observe(v) for v in values])
+    _, t_render = _timed(registry.render)
+
+    overhead_us = (t_after - t_before) / args.requests * 1e6
+    print(f"\n=== Metrics overhead: {args.requests} requests ===")
+    print(f"no middleware      : {t_before / args.requests * 1e6:.2f} us/request")
+    print(f"with middleware    : {t_after / args.requests * 1e6:.2f} us/request")
+    print(f"overhead           : {overhead_us:.2f} us/request")
+    print(f"Histogram.observe  : {t_observe / args.requests * 1e9:.0f} ns")
+    print(f"/metrics render    : {t_render * 1000:.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    intermediate = subparsers.add_parser('intermediate', help=bench_intermediate.__doc__)
+    intermediate.add_argument('--variants', type=int, default=20_000)
+    intermediate.set_defaults(func=bench_intermediate)
+
+    scoring = subparsers.add_parser('scoring', help=bench_scoring.__doc__)
+    scoring.add_argument('--rows', type=int, default=100_000)
+    scoring.set_defaults(func=bench_scoring)
+
+    metrics = subparsers.add_parser('metrics', help=bench_metrics.__doc__)
+    metrics.add_argument('--requests', type=int, default=100_000)
+    metrics.set_defaults(func=bench_metrics)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Compile annotation sources into a memory-mappable annotation store
+
+Usage:
+    python scripts/build_annotation_db.py <source> [output_dir] [--alleles clinvar.vcf[.gz]]
+
+<source> provides the gene-region annotation and is one of:
+    regions.tsv        tab-separated: chrom, start, end, gene [, risk, diseases, pathogenicity]
+    clinvar.vcf[.gz]   ClinVar-style VCF with GENEINFO, CLNSIG and CLNDN in INFO
+                       (records are indexed by exact allele; the region fallback
+                       is the builtin gene list plus the span of each other gene)
+    builtin            the DISEASE_VARIANTS gene list from scripts/annotate.py
+
+--alleles adds a ClinVar-style VCF as the exact-allele index, keyed on
+(chrom, pos, ref, alt). annotate.py checks it before the region annotation.
+
+The store is written to data/annotation_db by default, which is where
+annotate.py looks for it (override with the ANNOTATION_DB environment variable).
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.annotate import ANNOTATION_DB_PATH, DISEASE_VARIANTS
+from scripts.annotation_db import (
+    AnnotationDB, clinvar_regions, disease_variant_regions, read_clinvar_vcf, read_region_tsv,
+)
+
+
+def _is_vcf(path):
+    return str(path).endswith(('.vcf', '.vcf.gz'))
+
+
+def build_annotation_db(source, output_dir=ANNOTATION_DB_PATH, alleles_source=None):
+    """Parse the sources and write the compiled store to `output_dir`"""
+    start = time.perf_counter()
+    alleles = None
+
+    if source == 'builtin':
+        regions = disease_variant_regions(DISEASE_VARIANTS)
+    elif _is_vcf(source):
+        alleles = read_clinvar_vcf(source)
+        # Builtin genes first: overlapping regions resolve to the first record
+        regions = pd.concat([disease_variant_regions(DISEASE_VARIANTS), clinvar_regions(alleles)], ignore_index=True)
+    else:
+        regions = read_region_tsv(source)
+
+    if alleles_source:
+        alleles = read_clinvar_vcf(alleles_source)
+
+    db = AnnotationDB.build(regions, alleles, source=Path(source).name)
+    db.save(output_dir)
+
+    print(f"Compiled {len(regions)} region records from {source}")
+    if db.alleles is not None:
+        print(f"Indexed {len(db.alleles)} exact alleles from {alleles_source or source}")
+    print(f"Saved to {output_dir} in {time.perf_counter() - start:.2f}s")
+    return db
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('source')
+    parser.add_argument('output_dir', nargs='?', default=ANNOTATION_DB_PATH)
+    parser.add_argument('--alleles', dest='alleles_source')
+    args = parser.parse_args()
+
+    build_annotation_db(args.source, args.output_dir, args.alleles_source)
@@ -0,0 +1,214 @@
+"""
+Build a training matrix from annotated pipeline outputs
+
+Walks the annotated tables (``*_annotated.csv`` / ``*_annotated.npz``),
+extracts one feature vector per analysis in a process pool and writes a
+single ``.npz`` with ``X`` (float32 features), ``y``, ``files`` and
+``content_hashes``. Annotated outputs carry no outcome, so ``y`` is the
+rule-based label from ``train.label_features``.
+
+Features are cached by file content hash, and a (path, size, mtime) table
+maps unchanged files to their hash without re-reading them. Files that miss
+that table (new, copied, renamed or touched) are hashed and looked up by
+hash, so re-runs only extract features of content not seen before.
+
+Usage:
+    python scripts/build_dataset.py [input_dir] [output.npz] [--workers N] [--no-cache]
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.features import FEATURE_NAMES, FeatureAccumulator
+from scripts.table_io import iter_table_chunks
+
+project_root = Path(__file__).resolve().parent.parent
+DEFAULT_INPUT_DIR = str(project_root / 'data' / 'processed')
+DEFAULT_OUTPUT = str(project_root / 'data' / 'training' / 'dataset.npz')
+DEFAULT_CACHE = str(project_root / 'data' / 'cache' / 'dataset_features.sqlite')
+
+ANNOTATED_PATTERNS = ('*_annotated.csv', '*_annotated.npz')
+
+
+def find_annotated_files(input_dir):
+    """Annotated tables under `input_dir`, sorted for a stable row order"""
+    files = set()
+    for pattern in ANNOTATED_PATTERNS:
+        files.update(glob.glob(os.path.join(input_dir, '**', pattern), recursive=True))
+    return sorted(files)
+
+
+def file_hash(path):
+    """sha256 of the file contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def extract_file_features(path, content_hash=None):
+    """Worker: (content hash, features, rows) for one annotated table, streamed chunk by chunk
+
+    The file is only hashed here when the caller has not hashed it already.
+    """
+    if content_hash is None:
+        content_hash = file_hash(path)
+    accumulator = FeatureAccumulator()
+    for chunk in iter_table_chunks(path):
+        accumulator.update(chunk)
+    return content_hash, accumulator.features(), accumulator.rows
+
+
+def _chunksize(jobs, workers):
+    return max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+
+
+class FeatureCache:
+    """SQLite cache: content hash -> features, plus a stat fast path per file"""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            "CREATE TABLE IF NOT EXISTS features (content_hash TEXT PRIMARY KEY, features TEXT, rows INTEGER);"
+            "CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, content_hash TEXT);"
+        )
+
+    def lookup(self, path, stat):
+        """Cached (content hash, features) if the file is unchanged since it was cached"""
+        row = self.conn.execute(
+            "SELECT f.content_hash, f.features FROM files s JOIN features f USING (content_hash) "
+            "WHERE s.path = ? AND s.size = ? AND s.mtime_ns = ?",
+            (path, stat.st_size, stat.st_mtime_ns),
+        ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def lookup_hash(self, content_hash):
+        """Cached features of any file with this content"""
+        row = self.conn.execute("SELECT features FROM features WHERE content_hash = ?", (content_hash,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def store(self, path, stat, content_hash, features, rows):
+        self.conn.execute("INSERT OR REPLACE INTO features VALUES (?, ?, ?)",
+                          (content_hash, json.dumps(features), rows))
+        self.store_file(path, stat, content_hash)
+
+    def store_file(self, path, stat, content_hash):
+        self.conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                          (path, stat.st_size, stat.st_mtime_ns, content_hash))
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def build_dataset(input_dir=DEFAULT_INPUT_DIR, output_file=DEFAULT_OUTPUT, workers=None,
+                  cache_path=DEFAULT_CACHE):
+    """Extract features of every annotated table into one training matrix
+
+    Args:
+        input_dir: Directory searched (recursively) for annotated tables
+        output_file: Destination .npz
+        workers: Process pool size (None = all cores)
+        cache_path: Feature cache database (None disables caching)
+
+    Returns:
+        Number of analyses in the dataset
+    """
+    started = time.perf_counter()
+    files = find_annotated_files(input_dir)
+    if not files:
+        print(f"No annotated files found in {input_dir}")
+        return 0
+
+    cache = FeatureCache(cache_path) if cache_path else None
+    results = {}
+    unresolved = []
+    for path in files:
+        stat = os.stat(path)
+        cached = cache.lookup(path, stat) if cache else None
+        if cached:
+            results[path] = cached
+        else:
+            unresolved.append((path, stat))
+
+    # Workers start on the first submitted job, so a fully cached run spawns none
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # (path, stat, content hash if already known)
+        pending = [(path, stat, None) for path, stat in unresolved]
+        if cache and unresolved:
+            # Copied, renamed or touched files: same content, same features
+            pending = []
+            hashes = pool.map(file_hash, [path for path, _ in unresolved], chunksize=_chunksize(unresolved, workers))
+            for (path, stat), content_hash in zip(unresolved, hashes):
+                features = cache.lookup_hash(content_hash)
+                if features is None:
+                    pending.append((path, stat, content_hash))
+                else:
+                    results[path] = (content_hash, features)
+                    cache.store_file(path, stat, content_hash)
+
+        print(f"Found {len(files)} annotated files ({len(results)} cached, {len(pending)} to process)")
+
+        extracted = pool.map(extract_file_features, [path for path, _, _ in pending],
+                             [content_hash for _, _, content_hash in pending],
+                             chunksize=_chunksize(pending, workers))
+        for (path, stat, _), (content_hash, features, rows) in zip(pending, extracted):
+            results[path] = (content_hash, features)
+            if cache:
+                cache.store(path, stat, content_hash, features, rows)
+    if cache:
+        cache.commit()
+        cache.close()
+
+    # Imported here so pool workers do not load the training stack
+    from scripts.train import label_features
+
+    X = np.array([results[path][1] for path in files], dtype=np.float32).reshape(-1, len(FEATURE_NAMES))
+    y = label_features(X)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    tmp_file = f'{output_file}.tmp.npz'
+    np.savez(tmp_file, X=X, y=y, files=np.array(files), content_hashes=np.array([results[p][0] for p in files]),
+             feature_names=np.array(FEATURE_NAMES))
+    os.replace(tmp_file, output_file)
+
+    print(f"Wrote {len(files)} samples to {output_file} in {time.perf_counter() - started:.2f}s")
+    return len(files)
+
+
+def load_dataset(path):
+    """(X, y) from a file written by build_dataset()"""
+    with np.load(path) as data:
+        return data['X'], data['y']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input_dir', nargs='?', default=DEFAULT_INPUT_DIR)
+    parser.add_argument('output_file', nargs='?', default=DEFAULT_OUTPUT)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true', help="re-extract every file")
+    args = parser.parse_args()
+
+    build_dataset(args.input_dir, args.output_file, args.workers, None if args.no_cache else DEFAULT_CACHE)
+
+
+if __name__ == "__main__":
+    main()
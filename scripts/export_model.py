@@ -0,0 +1,49 @@
+"""
+Export a pickled model to the pickle-free artifact format
+
+Usage:
+    python scripts/export_model.py [model.pkl] [output_dir] [--version VERSION]
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.model_artifact import export_model, load_model_artifact
+from scripts.model_registry import DEFAULT_MODEL_PATH, load_model_file, load_model_path
+
+
+def export_pickled_model(model_path, output_dir, version=None):
+    """Convert `model_path` to an artifact in `output_dir` and report both load times"""
+    model, _ = load_model_file(model_path)
+    meta_path = export_model(model, output_dir, version)
+
+    # Load both forms in this process to report the cold-start difference
+    _, _, pickle_seconds = load_model_path(model_path)
+    _, artifact_version, artifact_seconds = load_model_artifact(meta_path)
+
+    print(f"Exported {type(model).__name__} to {meta_path}")
+    print(f"  Version: {artifact_version}")
+    print(f"  Load time: pickle {pickle_seconds * 1000:.1f} ms, artifact {artifact_seconds * 1000:.1f} ms")
+    return meta_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('model', nargs='?', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('output_dir', nargs='?', default=None)
+    parser.add_argument('--version', default=None)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Model file not found: {args.model}")
+        sys.exit(1)
+    export_pickled_model(args.model, args.output_dir or os.path.dirname(os.path.abspath(args.model)), args.version)
+
+
+if __name__ == "__main__":
+    main()
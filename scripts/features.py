@@ -0,0 +1,99 @@
+"""
+Feature extraction for the disease risk model.
+
+All eight model features come from per-category counts: each text column is
+reduced to its categorical codes once, the codes are counted with
+``np.bincount``, and label and gene-name tests run on the (few) categories
+instead of on every row. Counts add up across chunks, so a streamed table can
+be featurized without ever holding all of it in memory.
+"""
+
+import numpy as np
+import pandas as pd
+
+FEATURE_NAMES = [
+    'high_risk_variants',
+    'medium_risk_variants',
+    'low_risk_variants',
+    'pathogenic_variants',
+    'avg_quality',
+    'brca_variants',
+    'apoe_variants',
+    'tp53_variants',
+]
+
+# Gene-name substrings counted as features, in FEATURE_NAMES order
+GENE_MARKERS = ['BRCA', 'APOE', 'TP53']
+
+
+def _category_counts(column):
+    """(categories, count per category) of a column, ignoring missing values"""
+    values = column.array if isinstance(column.dtype, pd.CategoricalDtype) else pd.Categorical(column)
+    codes = np.asarray(values.codes)
+    counts = np.bincount(codes[codes >= 0], minlength=len(values.categories))
+    return values.categories, counts
+
+
+def _count_matching(column, predicate):
+    """Rows whose value satisfies `predicate`, evaluated once per category"""
+    categories, counts = _category_counts(column)
+    matches = np.fromiter((predicate(str(c)) for c in categories), dtype=bool, count=len(categories))
+    return int(counts[matches].sum())
+
+
+class FeatureAccumulator:
+    """Accumulates model features over one or more annotated chunks"""
+
+    def __init__(self):
+        self.rows = 0
+        self.high_risk = 0
+        self.medium_risk = 0
+        self.low_risk = 0
+        self.pathogenic = 0
+        self.gene_counts = [0] * len(GENE_MARKERS)
+        self.has_quality = False
+        self.quality_sum = 0.0
+        self.quality_count = 0
+
+    def update(self, df):
+        """Add the counts of one annotated chunk"""
+        self.rows += len(df)
+
+        risk_categories, risk_counts = _category_counts(df['DISEASE_RISK'])
+        by_risk = dict(zip(map(str, risk_categories), risk_counts.tolist()))
+        self.high_risk += by_risk.get('High', 0)
+        self.medium_risk += by_risk.get('Medium', 0)
+        self.low_risk += by_risk.get('Low', 0)
+
+        self.pathogenic += _count_matching(df['PATHOGENICITY'], lambda label: label == 'Pathogenic')
+
+        gene_categories, gene_counts = _category_counts(df['GENE'])
+        gene_names = [str(c) for c in gene_categories]
+        for i, marker in enumerate(GENE_MARKERS):
+            matches = np.fromiter((marker in name for name in gene_names), dtype=bool, count=len(gene_names))
+            self.gene_counts[i] += int(gene_counts[matches].sum())
+
+        if 'QUAL' in df.columns:
+            self.has_quality = True
+            quality = pd.to_numeric(df['QUAL'], errors='coerce').to_numpy(dtype=np.float64)
+            valid = ~np.isnan(quality)
+            self.quality_sum += float(quality[valid].sum())
+            self.quality_count += int(valid.sum())
+        return self
+
+    @property
+    def avg_quality(self):
+        if self.quality_count:
+            return self.quality_sum / self.quality_count
+        return float('nan') if self.has_quality else 0
+
+    def features(self):
+        """Feature vector in FEATURE_NAMES order"""
+        brca, apoe, tp53 = self.gene_counts
+        return [self.high_risk, self.medium_risk, self.low_risk, self.pathogenic,
+                self.avg_quality, brca, apoe, tp53]
+
+
+def extract_features(df):
+    """Model features of a whole annotated DataFrame"""
+    return FeatureAccumulator().update(df).features()
@@ -0,0 +1,122 @@
+"""
+Pickle-free model artifacts.
+
+An artifact is a JSON metadata file plus, for XGBoost models, the booster in
+XGBoost's native UBJSON format::
+
+    models/model.meta.json          format version, model type, version,
+                                    feature names, binary file name
+    models/model-<digest>.ubj       XGBoost booster (absent for rule models)
+
+Binaries are named by content hash and the metadata file is replaced last, so
+a reader always sees a complete artifact, even while a new one is exported.
+The binary of the previous export is kept until the next one, so a process
+that read the old metadata just before the swap can still load it. Loading
+needs no class definitions from the exporting process.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.features import FEATURE_NAMES
+from scripts.predict import SimpleRiskModel
+from scripts.quick_model import QuickGenomicsModel
+
+ARTIFACT_FORMAT_VERSION = 1
+META_FILE = 'model.meta.json'
+DEFAULT_ARTIFACT_PATH = str(Path(__file__).resolve().parent.parent / 'models' / META_FILE)
+
+# Rule-based models carry no parameters; the metadata names the class
+RULE_MODELS = {
+    'SimpleRiskModel': SimpleRiskModel,
+    'QuickGenomicsModel': QuickGenomicsModel,
+}
+
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+
+def _current_model_file(meta_path):
+    """Binary named by an existing metadata file, if any"""
+    try:
+        with open(meta_path) as f:
+            return json.load(f).get('model_file')
+    except (OSError, ValueError):
+        return None
+
+
+def export_model(model, output_dir, version=None):
+    """Write `model` as an artifact in `output_dir`; returns the metadata path"""
+    os.makedirs(output_dir, exist_ok=True)
+    meta_path = os.path.join(output_dir, META_FILE)
+    previous_file = _current_model_file(meta_path)
+    meta = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'feature_names': list(getattr(model, 'feature_names', FEATURE_NAMES)),
+        'created_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+    model_class = type(model).__name__
+    if model_class in RULE_MODELS:
+        meta.update(type='rules', model_class=model_class, model_file=None)
+        digest = hashlib.sha256(model_class.encode()).hexdigest()[:12]
+        version = version or getattr(model, 'model_version', None)
+    elif hasattr(model, 'get_booster'):
+        booster = bytes(model.get_booster().save_raw(raw_format='ubj'))
+        digest = hashlib.sha256(booster).hexdigest()[:12]
+        model_file = f'model-{digest}.ubj'
+        _write_atomic(os.path.join(output_dir, model_file), booster)
+        meta.update(type='xgboost', model_class=model_class, model_file=model_file)
+    else:
+        raise TypeError(f"Cannot export model of type {model_class}")
+
+    meta['version'] = f'{version}-{digest}' if version else digest
+    _write_atomic(meta_path, json.dumps(meta, indent=2).encode())
+
+    # Remove binaries of earlier exports, except the one readers of the
+    # previous metadata may still be loading
+    keep = {meta.get('model_file'), previous_file}
+    for name in os.listdir(output_dir):
+        if name.startswith('model-') and name.endswith('.ubj') and name not in keep:
+            os.remove(os.path.join(output_dir, name))
+    return meta_path
+
+
+def load_model_artifact(meta_path):
+    """Load an artifact, returning (model, version, load_seconds)"""
+    start = time.perf_counter()
+    with open(meta_path) as f:
+        meta = json.load(f)
+    if meta.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version: {meta.get('format_version')}")
+
+    if meta['type'] == 'rules':
+        model = RULE_MODELS[meta['model_class']]()
+    elif meta['type'] == 'xgboost':
+        import xgboost as xgb
+        model_path = os.path.join(os.path.dirname(meta_path), meta['model_file'])
+        if not os.path.exists(model_path):
+            raise ValueError(f"Model artifact {meta_path} names a missing binary {meta['model_file']}")
+        model = xgb.XGBClassifier()
+        model.load_model(model_path)
+    else:
+        raise ValueError(f"Unknown model artifact type: {meta['type']}")
+
+    return model, meta['version'], time.perf_counter() - start
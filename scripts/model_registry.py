@@ -0,0 +1,204 @@
+"""
+Process-wide model registry.
+
+The risk model is loaded once per process and shared by every analysis.
+Loading a new version builds the replacement completely before swapping it
+in under a lock, so in-flight predictions keep the model they started with
+and workers pick up a retrained artifact without restarting.
+
+The exported, pickle-free artifact (see model_artifact.py) is preferred over
+the legacy models/model.pkl. Only a missing model file falls back to the
+rule-based model: an artifact that exists but does not load is an error, so
+predictions are never silently downgraded.
+"""
+
+import hashlib
+import io
+import os
+import pickle
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.model_artifact import DEFAULT_ARTIFACT_PATH, load_model_artifact
+from scripts.predict import SimpleRiskModel, score_features
+
+# Legacy pickle, used only when no exported artifact exists
+DEFAULT_MODEL_PATH = str(Path(__file__).resolve().parent.parent / 'models' / 'model.pkl')
+
+FALLBACK_VERSION = 'rules-1.0'
+
+# Model classes that scripts pickle while running as __main__
+_SCRIPT_CLASSES = {
+    'QuickGenomicsModel': 'scripts.quick_model',
+    'SimpleRiskModel': 'scripts.predict',
+}
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    """Resolve classes pickled from `python scripts/<name>.py` to their module"""
+
+    def find_class(self, module, name):
+        if module == '__main__' and name in _SCRIPT_CLASSES:
+            module = _SCRIPT_CLASSES[name]
+        return super().find_class(module, name)
+
+
+def load_model_file(path):
+    """Load a pickled model artifact, returning (model, version).
+
+    Accepts the bare XGBoost classifier written by train.py and the
+    {'model': ..., 'version': ...} dict written by quick_model.py. Without an
+    explicit version, the version is a short hash of the file contents.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    obj = _ModelUnpickler(io.BytesIO(data)).load()
+    version = None
+    if isinstance(obj, dict) and 'model' in obj:
+        version = obj.get('version')
+        obj = obj['model']
+    if not hasattr(obj, 'predict_proba'):
+        raise TypeError(f"{path} does not contain a model with predict_proba()")
+
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    return obj, f"{version}-{digest}" if version else digest
+
+
+def load_model_path(path):
+    """Load a model from an artifact metadata file or a legacy pickle.
+
+    Returns (model, version, load_seconds).
+    """
+    if str(path).endswith('.meta.json'):
+        return load_model_artifact(path)
+    start = time.perf_counter()
+    model, version = load_model_file(path)
+    return model, version, time.perf_counter() - start
+
+
+class ModelRegistry:
+    """Holds the current model for this process and swaps it atomically"""
+
+    def __init__(self, path=None):
+        """`path` defaults to $MODEL_PATH, else the exported artifact, else models/model.pkl"""
+        if path is None:
+            path = os.getenv('MODEL_PATH')
+        self._candidates = [str(path)] if path else [DEFAULT_ARTIFACT_PATH, DEFAULT_MODEL_PATH]
+        self.path = self._resolve()
+        self._lock = threading.Lock()
+        self._model = None
+        self._version = None
+        self._mtime = None
+        self._failed = None  # (path, mtime) of the last artifact that failed to reload
+        self.load_seconds = None
+
+    def get(self):
+        """Current model, loading it on first use"""
+        model = self._model
+        if model is None:
+            with self._lock:
+                if self._model is None:
+                    self.path = self._resolve()
+                    self._swap(*self._load(self.path))
+                model = self._model
+        return model
+
+    @property
+    def version(self):
+        return self.current()[1]
+
+    def current(self):
+        """(model, version) read together, so a concurrent swap cannot mix them"""
+        self.get()
+        with self._lock:
+            return self._model, self._version
+
+    def _resolve(self):
+        """First candidate path that exists (the preferred one if none do)"""
+        return next((p for p in self._candidates if os.path.exists(p)), self._candidates[0])
+
+    def _load(self, path):
+        """Build a model from `path` without touching the current one"""
+        start = time.perf_counter()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            print(f"Model file not found ({path}), using rule-based model")
+            model, version, mtime = SimpleRiskModel(), FALLBACK_VERSION, None
+        else:
+            try:
+                model, version, _ = load_model_path(path)
+            except Exception as e:
+                # An exported artifact that does not load must not degrade
+                # predictions to the rule model; legacy pickles still may
+                if self._model is not None or str(path).endswith('.meta.json'):
+                    raise
+                print(f"Warning: Could not load model from {path} ({e}), using rule-based model")
+                model, version, mtime = SimpleRiskModel(), FALLBACK_VERSION, None
+        self.load_seconds = time.perf_counter() - start
+        return model, version, mtime
+
+    def _swap(self, model, version, mtime):
+        self._model, self._version, self._mtime = model, version, mtime
+
+    def load(self, path=None):
+        """Load `path` (default: the registry path) and make it the current model.
+
+        If a model is already loaded and the new artifact fails to load, the
+        exception propagates and the current model stays in place.
+        """
+        path = str(path or self.path)
+        model, version, mtime = self._load(path)
+        with self._lock:
+            self.path = path
+            self._swap(model, version, mtime)
+        print(f"Loaded model {version} in {self.load_seconds * 1000:.1f} ms")
+        return model
+
+    def reload_if_changed(self):
+        """Reload when the artifact on disk changed (or a preferred one appeared); True if swapped"""
+        path = self._resolve()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if self._model is not None and path == self.path and mtime == self._mtime:
+            return False
+        # A broken artifact is retried only once the file changes again
+        if (path, mtime) == self._failed:
+            return False
+        try:
+            self.load(path)
+        except Exception as e:
+            print(f"Warning: Keeping model {self._version}, reload failed: {e}")
+            self._failed = (path, mtime)
+            return False
+        self._failed = None
+        return True
+
+    def warm(self):
+        """Load the model and run one prediction so the first request pays no setup cost"""
+        score_features(self.get(), np.zeros((1, 8)))
+        return self._version
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """The process-wide registry for the default model location"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ModelRegistry()
+    return _registry
@@ -1,117 +1,111 @@
+import numpy as np
 import pandas as pd
 import pickle
 import sys
 import os
+from pathlib import Path
+
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.features import FeatureAccumulator, extract_features
+from scripts.table_io import iter_table_chunks
 
 class SimpleRiskModel:
     """Simple rule-based risk model that doesn't require pickle"""
     
-    def predict(self, X):
-        """Predict risk class (0=low, 1=high)"""
-        import numpy as np
-        X = np.array(X)
+    @staticmethod
+    def _scores(X):
+        """Weighted evidence score per row, before and after the low-quality discount"""
+        X = np.asarray(X, dtype=np.float64)
         if X.ndim == 1:
             X = X.reshape(1, -1)
         
-        predictions = []
-        for features in X:
-            high_risk = features[0]
-            medium_risk = features[1]
-            pathogenic = features[3]
-            brca = features[5]
-            tp53 = features[7]
-            
-            score = (high_risk * 4 + medium_risk * 2 + pathogenic * 5 + brca * 3.5 + tp53 * 4) / 25.0
-            pred = 1 if score > 0.6 else 0
-            predictions.append(pred)
+        score = (X[:, 0] * 4 + X[:, 1] * 2 + X[:, 3] * 5 + X[:, 5] * 3.5 + X[:, 7] * 4) / 25.0
+        adjusted = np.where(X[:, 4] < 20, score * 0.7, score)
+        return score, adjusted
+    
+    def predict_with_proba(self, X):
+        """Score an (N, 8) feature matrix in one pass
         
-        return np.array(predictions)
+        Returns (classes, probabilities): the risk class (0=low, 1=high) and the
+        probability of the high-risk class for every row.
+        """
+        score, adjusted = self._scores(X)
+        return (score > 0.6).astype(np.int64), np.clip(adjusted, 0.05, 0.95)
+    
+    def predict(self, X):
+        """Predict risk class (0=low, 1=high)"""
+        return self.predict_with_proba(X)[0]
     
     def predict_proba(self, X):
         """Predict probability of each class"""
-        import numpy as np
-        X = np.array(X)
-        if X.ndim == 1:
-            X = X.reshape(1, -1)
-        
-        probas = []
-        for features in X:
-            high_risk = features[0]
-            medium_risk = features[1]
-            pathogenic = features[3]
-            brca = features[5]
-            tp53 = features[7]
-            quality = features[4]
-            
-            score = (high_risk * 4 + medium_risk * 2 + pathogenic * 5 + brca * 3.5 + tp53 * 4) / 25.0
-            
-            if quality < 20:
-                score *= 0.7
-            
-            prob_high = min(max(score, 0.05), 0.95)
-            prob_low = 1 - prob_high
-            
-            probas.append([prob_low, prob_high])
-        
-        return np.array(probas)
+        prob_high = self.predict_with_proba(X)[1]
+        return np.column_stack([1 - prob_high, prob_high])
 
 def load_model():
-    """Load trained model"""
-    # Try to load pickled model, fall back to simple model
-    try:
-        if os.path.exists('models/model.pkl'):
-            # For now, just use the simple model to avoid pickle issues
-            return SimpleRiskModel()
-        else:
-            return SimpleRiskModel()
-    except Exception as e:
-        print(f"Warning: Could not load pickled model ({e}), using fallback model")
-        return SimpleRiskModel()
+    """Current trained model for this process (loaded once, see model_registry.py)"""
+    from scripts.model_registry import get_registry
+    return get_registry().get()
 
-def create_features(df):
-    """Extract features from annotated variants (same as train.py)"""
-    risk_counts = df['DISEASE_RISK'].value_counts()
-    high_risk = risk_counts.get('High', 0)
-    medium_risk = risk_counts.get('Medium', 0)
-    low_risk = risk_counts.get('Low', 0)
+def score_features(model, X):
+    """Risk classes and high-risk probabilities for an (N, 8) feature matrix
     
-    pathogenic_count = len(df[df['PATHOGENICITY'] == 'Pathogenic'])
-    avg_quality = df['QUAL'].mean() if 'QUAL' in df.columns else 0
+    Uses the model's combined predict_with_proba() when it has one; other
+    models (e.g. XGBoost) are scored with a single predict_proba() call.
+    """
+    if hasattr(model, 'predict_with_proba'):
+        return model.predict_with_proba(X)
     
-    brca_variants = len(df[df['GENE'].str.contains('BRCA', na=False)])
-    apoe_variants = len(df[df['GENE'].str.contains('APOE', na=False)])
-    tp53_variants = len(df[df['GENE'].str.contains('TP53', na=False)])
-    
-    return [high_risk, medium_risk, low_risk, pathogenic_count,
-            avg_quality, brca_variants, apoe_variants, tp53_variants]
+    prob_high = np.asarray(model.predict_proba(np.asarray(X, dtype=np.float64)))[:, 1]
+    return (prob_high > 0.5).astype(np.int64), prob_high
+
+def create_features(df):
+    """Extract features from annotated variants (shared with train.py, see features.py)"""
+    return extract_features(df)
 
 def predict_disease_risk(vcf_file, annotated_file=None):
     """Predict disease risk for a VCF file"""
-    # Find annotated file
+    # Find annotated file (columnar intermediate preferred over CSV)
     if annotated_file is None:
         base_name = os.path.splitext(os.path.basename(vcf_file))[0]
-        annotated_file = f"data/processed/{base_name}_annotated.csv"
+        annotated_file = f"data/processed/{base_name}_annotated.npz"
+        if not os.path.exists(annotated_file):
+            annotated_file = f"data/processed/{base_name}_annotated.csv"
     
     if not os.path.exists(annotated_file):
         print(f"Annotated file not found: {annotated_file}")
         print("Please run preprocess.py and annotate.py first")
         return None
     
-    # Load data and model
-    df = pd.read_csv(annotated_file)
-    model = load_model()
+    # Stream the table: features accumulate chunk by chunk
+    accumulator = FeatureAccumulator()
+    for chunk in iter_table_chunks(annotated_file):
+        accumulator.update(chunk)
+    
+    return predict_risk_from_features(accumulator.features(), accumulator.rows, vcf_file)
+
+def predict_risk_from_frame(df, vcf_file, model=None):
+    """Predict disease risk from an in-memory annotated variant DataFrame
     
-    # Extract features
-    features = create_features(df)
+    `model` defaults to the process-wide model from the registry.
+    """
+    return predict_risk_from_features(create_features(df), len(df), vcf_file, model)
+
+def predict_risk_from_features(features, total_variants, vcf_file, model=None):
+    """Predict disease risk from an extracted feature vector"""
+    if model is None:
+        model = load_model()
     
-    # Predict
-    risk_prob = model.predict_proba([features])[0][1]
-    risk_class = model.predict([features])[0]
+    # Predict (class and probability from one scoring pass)
+    risk_classes, risk_probs = score_features(model, [features])
+    risk_prob = risk_probs[0]
+    risk_class = risk_classes[0]
     
     # Generate detailed report
     report = {
         'file': vcf_file,
-        'total_variants': len(df),
+        'total_variants': total_variants,
         'high_risk_variants': features[0],
         'medium_risk_variants': features[1],
         'low_risk_variants': features[2],
@@ -121,7 +115,8 @@ def predict_disease_risk(vcf_file, annotated_file=None):
         'quality_score': features[4],
         'brca_variants': features[5],
         'apoe_variants': features[6],
-        'tp53_variants': features[7]
+        'tp53_variants': features[7],
+        'features': list(features)
     }
     
     return report
@@ -2,77 +2,127 @@ import pandas as pd
 import os
 import sys
 import re
+from pathlib import Path
 
-def preprocess_vcf(input_file, output_file):
-    """Preprocess VCF file and extract variant information (Windows-compatible, no pysam)"""
-    variants = []
-    
+# Make sibling modules importable when run as a script
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.table_io import categorize, concat_frames, open_table_writer
+
+# Number of variants held in memory at once when streaming a VCF
+DEFAULT_CHUNK_SIZE = 100_000
+
+VARIANT_COLUMNS = ['CHROM', 'POS', 'REF', 'ALT', 'QUAL', 'FILTER', 'GT']
+
+def _parse_variant_line(line):
+    """Parse one VCF data line into a tuple ordered like VARIANT_COLUMNS (None if malformed)"""
+    fields = line.strip().split('\t')
+
+    if len(fields) < 8:
+        return None
+
+    # Parse standard VCF fields
+    chrom = fields[0].replace('chr', '')  # Normalize chromosome
+    pos = int(fields[1]) if fields[1].isdigit() else 0
+    ref = fields[3]
+    alt = fields[4].split(',')[0] if fields[4] != '.' else ''
+
+    # Parse quality score
     try:
-        with open(input_file, 'r') as f:
-            for line in f:
-                # Skip header lines
-                if line.startswith('##'):
-                    continue
-                    
-                # Process column header line
-                if line.startswith('#CHROM'):
-                    headers = line.strip().split('\t')
-                    sample_columns = headers[9:] if len(headers) > 9 else []
-                    continue
-                
-                # Process variant lines
-                if line.strip():
-                    fields = line.strip().split('\t')
-                    
-                    if len(fields) < 8:
-                        continue
-                    
-                    # Parse standard VCF fields
-                    chrom = fields[0].replace('chr', '')  # Normalize chromosome
-                    pos = int(fields[1]) if fields[1].isdigit() else 0
-                    ref = fields[3]
-                    alt = fields[4].split(',')[0] if fields[4] != '.' else ''
-                    
-                    # Parse quality score
-                    try:
-                        qual = float(fields[5]) if fields[5] != '.' else None
-                    except ValueError:
-                        qual = None
-                    
-                    filter_val = fields[6] if fields[6] != '.' else 'PASS'
-                    
-                    # Extract genotype if sample data exists
-                    genotype = None
-                    if len(fields) > 9:
-                        format_fields = fields[8].split(':')
-                        sample_data = fields[9].split(':')
-                        
-                        if 'GT' in format_fields:
-                            gt_index = format_fields.index('GT')
-                            if gt_index < len(sample_data):
-                                genotype = sample_data[gt_index].replace('|', '/')
-                    
-                    variant = {
-                        'CHROM': chrom,
-                        'POS': pos,
-                        'REF': ref,
-                        'ALT': alt,
-                        'QUAL': qual,
-                        'FILTER': filter_val,
-                        'GT': genotype
-                    }
-                    
-                    variants.append(variant)
-        
-        if not variants:
+        qual = float(fields[5]) if fields[5] != '.' else None
+    except ValueError:
+        qual = None
+
+    filter_val = fields[6] if fields[6] != '.' else 'PASS'
+
+    # Extract genotype if sample data exists
+    genotype = None
+    if len(fields) > 9:
+        format_fields = fields[8].split(':')
+        sample_data = fields[9].split(':')
+
+        if 'GT' in format_fields:
+            gt_index = format_fields.index('GT')
+            if gt_index < len(sample_data):
+                genotype = sample_data[gt_index].replace('|', '/')
+
+    return chrom, pos, ref, alt, qual, filter_val, genotype
+
+def _chunk_frame(columns):
+    """Build a chunk DataFrame with a fixed schema (QUAL is always float, even if all missing)"""
+    df = pd.DataFrame(dict(zip(VARIANT_COLUMNS, columns)))
+    df['POS'] = df['POS'].astype('int64')
+    df['QUAL'] = df['QUAL'].astype('float64')
+    return df
+
+def iter_vcf_chunks(input_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream a VCF file as DataFrames of at most `chunk_size` variants.
+
+    Variants are collected column by column and released after each chunk is
+    yielded, so memory use depends on `chunk_size` rather than on file size.
+    """
+    columns = [[] for _ in VARIANT_COLUMNS]
+    rows = 0
+
+    with open(input_file, 'r') as f:
+        for line in f:
+            # Skip header lines (meta-information and the #CHROM column header)
+            if line.startswith('#') or not line.strip():
+                continue
+
+            variant = _parse_variant_line(line)
+            if variant is None:
+                continue
+
+            for column, value in zip(columns, variant):
+                column.append(value)
+            rows += 1
+
+            if rows >= chunk_size:
+                yield _chunk_frame(columns)
+                columns = [[] for _ in VARIANT_COLUMNS]
+                rows = 0
+
+    if rows:
+        yield _chunk_frame(columns)
+
+def load_vcf(input_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Parse a VCF file into an in-memory DataFrame (text columns as categoricals)
+
+    Returns an empty DataFrame with the standard columns if the file has no variants.
+    """
+    chunks = [categorize(chunk) for chunk in iter_vcf_chunks(input_file, chunk_size)]
+    if not chunks:
+        return pd.DataFrame(columns=VARIANT_COLUMNS)
+    return concat_frames(chunks)
+
+def preprocess_vcf(input_file, output_file, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Preprocess VCF file and extract variant information (Windows-compatible, no pysam)
+
+    The output is written chunk by chunk, so peak memory stays flat regardless
+    of how many variants the input contains. A `.npz` output file is written in
+    the columnar intermediate format, anything else as CSV.
+    """
+    total = 0
+    out = None
+
+    try:
+        for chunk in iter_vcf_chunks(input_file, chunk_size):
+            if out is None:
+                out = open_table_writer(output_file)
+            out.write(chunk)
+            total += len(chunk)
+
+        if out is not None:
+            out.close()
+            out = None
+
+        if not total:
             print("Warning: No variants found in VCF file")
             return False
-        
-        # Convert to DataFrame and save
-        df = pd.DataFrame(variants)
-        df.to_csv(output_file, index=False)
-        print(f"Processed {len(variants)} variants from {input_file}")
-        
+
+        print(f"Processed {total} variants from {input_file}")
+
     except FileNotFoundError:
         print(f"Error: File not found: {input_file}")
         return False
@@ -81,20 +131,23 @@ def preprocess_vcf(input_file, output_file):
         import traceback
         traceback.print_exc()
         return False
-    
+    finally:
+        if out is not None:
+            out.abort()
+
     return True
 
 if __name__ == "__main__":
     input_dir = "data/raw"
     output_dir = "data/processed"
-    
+
     os.makedirs(output_dir, exist_ok=True)
-    
+
     for file in os.listdir(input_dir):
         if file.endswith('.vcf'):
             input_path = os.path.join(input_dir, file)
             output_path = os.path.join(output_dir, file.replace('.vcf', '_processed.csv'))
-            
+
             print(f"Processing {file}...")
             if preprocess_vcf(input_path, output_path):
-                print(f"Saved to {output_path}")
\ No newline at end of file
+                print(f"Saved to {output_path}")
@@ -0,0 +1,208 @@
+"""
+Table I/O for pipeline intermediates.
+
+Stages hand tables to each other in a typed columnar format: an uncompressed
+zip of .npy members (readable with ``np.load``). Numeric columns are stored as
+raw arrays; text columns are stored as categorical codes plus a category
+array, so decoding never has to parse text. Tables are written chunk by
+chunk, which keeps memory flat for streamed inputs.
+
+CSV is still supported for debugging and for the standalone scripts; the
+format is picked from the file extension.
+"""
+
+import json
+import os
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+COLUMNAR_EXT = '.npz'
+FORMAT_VERSION = 1
+
+_META_MEMBER = 'meta.json'
+
+
+def is_columnar(path):
+    """True if `path` names a columnar table rather than a CSV file"""
+    return str(path).endswith(COLUMNAR_EXT)
+
+
+def _write_array(zf, name, array):
+    with zf.open(f'{name}.npy', 'w', force_zip64=True) as f:
+        np.lib.format.write_array(f, np.ascontiguousarray(array), allow_pickle=False)
+
+
+def _read_array(zf, name):
+    with zf.open(f'{name}.npy') as f:
+        return np.lib.format.read_array(f, allow_pickle=False)
+
+
+class ColumnarWriter:
+    """Append DataFrame chunks to a columnar table.
+
+    The schema (column order and kinds) is fixed by the first chunk. The file
+    is written under a temporary name and moved into place on close, so
+    readers never see a partial table.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._tmp_path = f'{self.path}.tmp'
+        self._zf = zipfile.ZipFile(self._tmp_path, 'w', compression=zipfile.ZIP_STORED, allowZip64=True)
+        self._schema = None
+        self._chunk_rows = []
+
+    def write(self, df):
+        if self._schema is None:
+            self._schema = {
+                name: ('numeric', df[name].dtype.str) if _is_numeric(df[name]) else ('category', None)
+                for name in df.columns
+            }
+
+        chunk = len(self._chunk_rows)
+        for name, (kind, dtype) in self._schema.items():
+            column = df[name]
+            if kind == 'numeric':
+                _write_array(self._zf, f'{chunk}/{name}', np.asarray(column, dtype=dtype))
+            else:
+                values = pd.Categorical(column)
+                categories = np.asarray(values.categories.astype(str), dtype=str)
+                _write_array(self._zf, f'{chunk}/{name}.codes', values.codes)
+                _write_array(self._zf, f'{chunk}/{name}.categories', categories)
+        self._chunk_rows.append(len(df))
+
+    def close(self):
+        meta = {
+            'version': FORMAT_VERSION,
+            'columns': [[name, kind, dtype] for name, (kind, dtype) in (self._schema or {}).items()],
+            'chunk_rows': self._chunk_rows,
+        }
+        self._zf.writestr(_META_MEMBER, json.dumps(meta))
+        self._zf.close()
+        os.replace(self._tmp_path, self.path)
+
+    def abort(self):
+        self._zf.close()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+class CsvWriter:
+    """Append DataFrame chunks to a CSV file (header written once)"""
+
+    def __init__(self, path):
+        self._f = open(path, 'w', newline='')
+        self._header = True
+
+    def write(self, df):
+        df.to_csv(self._f, index=False, header=self._header)
+        self._header = False
+
+    def close(self):
+        self._f.close()
+
+    def abort(self):
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def open_table_writer(path):
+    """Open a chunked writer for `path`, columnar or CSV depending on extension"""
+    return ColumnarWriter(path) if is_columnar(path) else CsvWriter(path)
+
+
+def _is_numeric(column):
+    return pd.api.types.is_numeric_dtype(column.dtype) and not isinstance(column.dtype, pd.CategoricalDtype)
+
+
+def _read_meta(zf):
+    meta = json.loads(zf.read(_META_MEMBER))
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported table format version: {meta.get('version')}")
+    return meta
+
+
+def _read_chunk_columns(zf, meta, chunk):
+    columns = {}
+    for name, kind, _ in meta['columns']:
+        if kind == 'numeric':
+            columns[name] = _read_array(zf, f'{chunk}/{name}')
+        else:
+            codes = _read_array(zf, f'{chunk}/{name}.codes')
+            categories = _read_array(zf, f'{chunk}/{name}.categories')
+            columns[name] = pd.Categorical.from_codes(codes, categories=pd.Index(categories, dtype=object))
+    return columns
+
+
+def iter_table_chunks(path, chunk_size=100_000):
+    """Yield a table chunk by chunk (stored chunks for columnar files, `chunk_size` rows for CSV)"""
+    if not is_columnar(path):
+        yield from pd.read_csv(path, chunksize=chunk_size)
+        return
+
+    with zipfile.ZipFile(path) as zf:
+        meta = _read_meta(zf)
+        for chunk in range(len(meta['chunk_rows'])):
+            yield pd.DataFrame(_read_chunk_columns(zf, meta, chunk))
+
+
+def categorize(df):
+    """Convert text columns to categoricals in place (compact in memory, cheap to encode)"""
+    for name in df.columns:
+        if not _is_numeric(df[name]) and not isinstance(df[name].dtype, pd.CategoricalDtype):
+            df[name] = pd.Categorical(df[name])
+    return df
+
+
+def concat_frames(frames):
+    """Concatenate categorized chunks, merging category sets column by column"""
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = {}
+    for name in frames[0].columns:
+        parts = [frame[name] for frame in frames]
+        if isinstance(parts[0].dtype, pd.CategoricalDtype):
+            columns[name] = pd.api.types.union_categoricals(parts, ignore_order=True)
+        else:
+            columns[name] = np.concatenate([part.to_numpy() for part in parts])
+    return pd.DataFrame(columns, columns=frames[0].columns)
+
+
+def read_table(path):
+    """Read a whole table; text columns come back as pandas categoricals"""
+    if not is_columnar(path):
+        return pd.read_csv(path)
+
+    with zipfile.ZipFile(path) as zf:
+        meta = _read_meta(zf)
+        chunks = [
+            pd.DataFrame(_read_chunk_columns(zf, meta, chunk))
+            for chunk in range(len(meta['chunk_rows']))
+        ]
+
+    if not chunks:
+        return pd.DataFrame(columns=[name for name, _, _ in meta['columns']])
+    return concat_frames(chunks)
+
+
+def write_table(df, path):
+    """Write a whole DataFrame to `path` (columnar or CSV depending on extension)"""
+    with open_table_writer(path) as writer:
+        writer.write(df)
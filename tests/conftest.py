@@ -0,0 +1,32 @@
+import os
+
+# Settings refuse to load without these; the tests never connect to MongoDB
+os.environ.setdefault("MONGODB_URL", "mongodb://localhost:27017")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+
+import pytest
+
+SAMPLE_VCF = """##fileformat=VCFv4.2
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tSAMPLE1
+17\t43094464\t.\tA\tC\t60\tPASS\t.\tGT\t0/1
+13\t32315474\t.\tG\tT\t60\tPASS\t.\tGT\t0/1
+"""
+
+
+@pytest.fixture
+def sample_vcf(tmp_path):
+    """Path of a two-variant VCF (one BRCA1, one BRCA2 variant) in tmp_path"""
+    path = tmp_path / "sample.vcf"
+    path.write_text(SAMPLE_VCF)
+    return str(path)
+
+
+@pytest.fixture
+def analysis_service():
+    """AnalysisService keeping records in memory, without remote annotation"""
+    from backend.services.analysis_service import AnalysisService
+
+    service = AnalysisService(remote_annotation=False)
+    service._db = None
+    yield service
+    service.shutdown()
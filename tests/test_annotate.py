@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from scripts.annotate import DISEASE_VARIANTS, annotate_frame, annotate_variants
+from scripts.annotation_db import AnnotationDB, IntervalIndex, disease_variant_regions, read_clinvar_vcf, read_region_tsv
+
+def _brute_force(chroms, starts, ends, query_chroms, query_positions):
+    result = []
+    for chrom, pos in zip(query_chroms, query_positions):
+        match = -1
+        for record, (c, start, end) in enumerate(zip(chroms, starts, ends)):
+            if c == chrom and start <= pos <= end:
+                match = record
+                break
+        result.append(match)
+    return np.array(result)
+
+def test_interval_index_matches_first_match_scan():
+    rng = np.random.default_rng(0)
+    chroms = rng.choice(['1', '2', 'X'], 200)
+    starts = rng.integers(0, 10_000, 200)
+    ends = starts + rng.integers(0, 800, 200)
+    query_chroms = rng.choice(['1', '2', 'X', '7'], 2_000)
+    query_positions = rng.integers(0, 11_000, 2_000)
+
+    index = IntervalIndex.build(chroms, starts, ends)
+    expected = _brute_force(chroms, starts, ends, query_chroms, query_positions)
+    np.testing.assert_array_equal(index.lookup(query_chroms, query_positions), expected)
+
+def test_lookup_normalizes_chromosome_names():
+    index = IntervalIndex.build(['17'], [100], [200])
+    np.testing.assert_array_equal(index.lookup(['chr17', 17, '17', '1'], [150, 150, 201, 150]), [0, 0, -1, -1])
+
+def test_annotation_matches_reference_output(tmp_path):
+    output = tmp_path / "annotated.csv"
+    annotate_variants("data/processed/test_analysis_processed.csv", str(output))
+    assert output.read_text() == open("data/processed/test_analysis_annotated.csv").read()
+
+def test_low_quality_variants_are_not_annotated():
+    df = pd.DataFrame({'CHROM': ['17', '17'], 'POS': [43044295, 43044295], 'QUAL': [60.0, 10.0]})
+    annotate_frame(df)
+    assert list(df['GENE']) == ['BRCA1', '']
+    assert list(df['PATHOGENICITY']) == ['Pathogenic', 'Benign']
+
+def test_store_roundtrip_is_memory_mapped(tmp_path):
+    regions = disease_variant_regions(DISEASE_VARIANTS)
+    built = AnnotationDB.build(regions, source='builtin')
+    built.save(str(tmp_path / "db"))
+    opened = AnnotationDB.open(str(tmp_path / "db"))
+
+    assert isinstance(opened.regions.segments['17'][0], np.memmap)
+    chroms, positions = ['17', '13', '7', 'X'], [43044295, 32315474, 1, 31119220]
+    records = opened.lookup(chroms, positions)
+    np.testing.assert_array_equal(records, built.lookup(chroms, positions))
+    assert list(opened.annotations.take(records)['GENE']) == ['BRCA1', 'BRCA2', '', 'DMD']
+
+def test_region_tsv_source(tmp_path):
+    source = tmp_path / "regions.tsv"
+    source.write_text("chrom\tstart\tend\tgene\trisk\tdiseases\nchr2\t100\t200\tGENE1\tHigh\tDisease A;Disease B\n")
+    db = AnnotationDB.build(read_region_tsv(str(source)), source='regions.tsv')
+    columns = db.annotations.take(db.lookup(['2', '2'], [150, 250]))
+    assert list(columns['GENE']) == ['GENE1', '']
+    assert list(columns['CLINICAL_SIG']) == ['Disease A, Disease B', 'Unknown']
+    assert list(columns['PATHOGENICITY']) == ['Pathogenic', 'Benign']
+
+def test_exact_allele_takes_precedence_over_region(tmp_path):
+    source = tmp_path / "clinvar.vcf"
+    source.write_text(
+        "##fileformat=VCFv4.1\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+        "17\t43044295\t1\tG\tA\t.\t.\tCLNDN=Hereditary_cancer|Other;CLNSIG=Benign;GENEINFO=BRCA1:672\n"
+        "17\t43044295\t2\tG\tGT\t.\t.\tCLNSIG=Likely_pathogenic;GENEINFO=BRCA1:672\n"
+    )
+    db = AnnotationDB.build(disease_variant_regions(DISEASE_VARIANTS), read_clinvar_vcf(str(source)))
+    db.save(str(tmp_path / "db"))
+    db = AnnotationDB.open(str(tmp_path / "db"))
+
+    records = db.lookup(['17'] * 3, [43044295] * 3, pd.Categorical(['G', 'G', 'G']), ['A', 'GT', 'C'])
+    assert list(records >= db.allele_offset) == [True, True, False]
+    columns = db.annotations.take(records)
+    assert list(columns['PATHOGENICITY']) == ['Benign', 'Likely Pathogenic', 'Pathogenic']
+    assert list(columns['CLINICAL_SIG'])[0] == 'Hereditary cancer, Other'
+
+def test_use_annotation_db_switches_store(tmp_path):
+    from scripts import annotate
+
+    source = tmp_path / "regions.tsv"
+    source.write_text("chrom\tstart\tend\tgene\trisk\tdiseases\nchr2\t100\t200\tGENE1\tHigh\tDisease A\n")
+    AnnotationDB.build(read_region_tsv(str(source)), source='regions.tsv').save(str(tmp_path / "db"))
+
+    previous = annotate.ANNOTATION_DB_PATH
+    try:
+        annotate.use_annotation_db(str(tmp_path / "db"))
+        db = annotate.get_annotation_db()
+        assert list(db.annotations.take(db.lookup(['2'], [150]))['GENE']) == ['GENE1']
+    finally:
+        annotate.use_annotation_db(previous)
+    assert annotate.get_annotation_db() is not db
+
+def test_clinvar_source_does_not_lend_allele_significance_to_other_alleles(tmp_path):
+    from scripts.build_annotation_db import build_annotation_db
+
+    source = tmp_path / "clinvar.vcf"
+    source.write_text(
+        "##fileformat=VCFv4.1\n#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\n"
+        "2\t1000\t1\tG\tA\t.\t.\tCLNDN=Disease_A;CLNSIG=Pathogenic;GENEINFO=GENE1:1\n"
+        "2\t1500\t2\tC\tT\t.\t.\tCLNSIG=Benign;GENEINFO=GENE1:1\n"
+    )
+    db = build_annotation_db(str(source), str(tmp_path / "db"))
+
+    records = db.lookup(['2'] * 4, [1000, 1000, 1200, 2000], pd.Categorical(['G', 'G', 'T', 'A']), ['A', 'C', 'G', 'G'])
+    columns = db.annotations.take(records)
+    assert list(columns['GENE']) == ['GENE1', 'GENE1', 'GENE1', '']
+    assert list(columns['PATHOGENICITY']) == ['Pathogenic', 'Uncertain Significance', 'Uncertain Significance', 'Benign']
+    assert list(columns['CLINICAL_SIG'])[1] == 'Unknown'
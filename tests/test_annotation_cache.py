@@ -0,0 +1,39 @@
+from backend.services.annotation_cache import AnnotationCache
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_lru_evicts_least_recently_used():
+    cache = AnnotationCache(max_size=2, db_path=None)
+    cache.set("a", {"gene": "A"})
+    cache.set("b", {"gene": "B"})
+    cache.get("a")
+    cache.set("c", {"gene": "C"})
+
+    assert cache.get("b") is None
+    assert cache.get("a") == {"gene": "A"}
+    assert len(cache) == 2
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    AnnotationCache(db_path=path).set("chr17:g.43094464A>C", {"gene": "BRCA1"})
+
+    fresh = AnnotationCache(db_path=path)
+    assert fresh.get("chr17:g.43094464A>C") == {"gene": "BRCA1"}
+    assert fresh.get("chr17:g.43094464A>C") == {"gene": "BRCA1"}
+    stats = fresh.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+
+def test_entries_expire_after_ttl(tmp_path):
+    clock = FakeClock()
+    cache = AnnotationCache(db_path=str(tmp_path / "cache.sqlite"), ttl_seconds=60, clock=clock)
+    cache.set("key", {"gene": "TP53"})
+
+    clock.now += 61
+    assert cache.get("key") is None
+    assert cache.stats()["misses"] == 1
+    assert cache.purge_expired() == 1
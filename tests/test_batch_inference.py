@@ -0,0 +1,50 @@
+import threading
+
+import numpy as np
+import pytest
+
+from backend.services.batch_inference import BatchInferenceService
+from scripts.predict import SimpleRiskModel
+
+class CountingModel(SimpleRiskModel):
+    def __init__(self):
+        self.calls = []
+
+    def predict_with_proba(self, X):
+        self.calls.append(len(X))
+        return super().predict_with_proba(X)
+
+def test_concurrent_requests_share_batches():
+    model = CountingModel()
+    service = BatchInferenceService(lambda: model, max_batch_rows=8, max_wait_ms=200)
+    rows = np.random.default_rng(0).poisson(2, (16, 8)).astype(float)
+    results = [None] * len(rows)
+    barrier = threading.Barrier(len(rows))
+
+    def submit(i):
+        barrier.wait()
+        results[i] = service.predict_with_proba(rows[i])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(len(rows))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    service.close()
+
+    classes, probs = SimpleRiskModel().predict_with_proba(rows)
+    assert [int(r[0][0]) for r in results] == classes.tolist()
+    np.testing.assert_allclose([r[1][0] for r in results], probs)
+    assert len(model.calls) < len(rows) and max(model.calls) <= 8
+    stats = service.stats()
+    assert stats['batch_size']['sum'] == len(rows)
+    assert stats['latency_ms']['count'] == len(rows)
+
+def test_model_errors_reach_every_caller():
+    def broken():
+        raise RuntimeError("model unavailable")
+
+    service = BatchInferenceService(broken, max_wait_ms=1)
+    with pytest.raises(RuntimeError, match="model unavailable"):
+        service.predict_with_proba([0] * 8)
+    service.close()
@@ -0,0 +1,57 @@
+import shutil
+
+import numpy as np
+
+from scripts.build_dataset import build_dataset, load_dataset
+from scripts.features import extract_features
+from scripts.table_io import read_table, write_table
+
+REFERENCE = "data/processed/test_analysis_annotated.csv"
+
+def _make_outputs(directory):
+    directory.mkdir()
+    shutil.copy(REFERENCE, directory / "a_annotated.csv")
+    df = read_table(REFERENCE)
+    write_table(df.iloc[:3], str(directory / "b_annotated.npz"))
+    return df
+
+def test_build_dataset_extracts_one_row_per_output(tmp_path):
+    df = _make_outputs(tmp_path / "processed")
+    output = tmp_path / "dataset.npz"
+
+    assert build_dataset(str(tmp_path / "processed"), str(output), workers=2,
+                         cache_path=str(tmp_path / "cache.sqlite")) == 2
+    X, y = load_dataset(output)
+    np.testing.assert_allclose(X[0], extract_features(df), rtol=1e-6)
+    np.testing.assert_allclose(X[1], extract_features(df.iloc[:3]), rtol=1e-6)
+    assert y.shape == (2,)
+
+def test_rerun_only_processes_new_files(tmp_path, capsys):
+    _make_outputs(tmp_path / "processed")
+    args = dict(output_file=str(tmp_path / "dataset.npz"), workers=1, cache_path=str(tmp_path / "cache.sqlite"))
+    build_dataset(str(tmp_path / "processed"), **args)
+
+    write_table(read_table(REFERENCE).iloc[:5], str(tmp_path / "processed" / "c_annotated.npz"))
+    capsys.readouterr()
+    assert build_dataset(str(tmp_path / "processed"), **args) == 3
+    assert "(2 cached, 1 to process)" in capsys.readouterr().out
+
+def test_copied_file_is_found_by_content_hash(tmp_path, capsys):
+    _make_outputs(tmp_path / "processed")
+    args = dict(output_file=str(tmp_path / "dataset.npz"), workers=1, cache_path=str(tmp_path / "cache.sqlite"))
+    build_dataset(str(tmp_path / "processed"), **args)
+
+    shutil.copy(REFERENCE, tmp_path / "processed" / "renamed_annotated.csv")
+    capsys.readouterr()
+    assert build_dataset(str(tmp_path / "processed"), **args) == 3
+    assert "(3 cached, 0 to process)" in capsys.readouterr().out
+    X, _ = load_dataset(tmp_path / "dataset.npz")
+    np.testing.assert_array_equal(X[0], X[2])
+
+def test_worker_reuses_hash_from_lookup_pass(monkeypatch):
+    from scripts import build_dataset as module
+
+    expected = module.extract_file_features(REFERENCE)
+    monkeypatch.setattr(module, "file_hash", lambda path: 1 / 0)
+    content_hash, features, rows = module.extract_file_features(REFERENCE, expected[0])
+    assert (content_hash, features, rows) == expected
@@ -0,0 +1,113 @@
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from backend.services.executor import ThreadAnalysisExecutor
+from backend.services.ml_pipeline import MLPipeline
+
+
+class Interrupted(BaseException):
+    """Stands in for the worker being killed mid-stage"""
+
+
+def _pipeline(tmp_path):
+    pipeline = MLPipeline(defer_remote=True, checkpoint=True)
+    pipeline.processed_dir = tmp_path
+    return pipeline
+
+
+def _interrupt(*args, **kwargs):
+    raise Interrupted()
+
+
+@pytest.mark.parametrize("interrupted_stage, resumed_stages", [
+    ("_annotate_step", [("preprocess", True), ("annotate", False), ("predict", False)]),
+    ("_predict_step", [("annotate", True), ("predict", False)]),
+])
+def test_pipeline_resumes_after_last_checkpoint(tmp_path, monkeypatch, sample_vcf, interrupted_stage, resumed_stages):
+    pipeline, vcf = _pipeline(tmp_path), sample_vcf
+    expected = pipeline.process_vcf_file(vcf, "reference")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(pipeline, interrupted_stage, _interrupt)
+        with pytest.raises(Interrupted):
+            pipeline.process_vcf_file(vcf, "analysis-1")
+    assert (tmp_path / "analysis-1_checkpoint.json").exists()
+
+    results = pipeline.process_vcf_file(vcf, "analysis-1")
+    assert results["status"] == "completed"
+    assert [(stage["stage"], stage["resumed"]) for stage in results["stages"]] == resumed_stages
+    assert results["risk_probability"] == expected["risk_probability"]
+    assert results["deferred_variants"] == expected["deferred_variants"]
+    # finished analyses leave no checkpoint behind
+    assert sorted(os.listdir(tmp_path)) == ["sample.vcf"]
+
+
+def test_checkpoint_ignored_when_input_changed(tmp_path, monkeypatch, sample_vcf):
+    pipeline, vcf = _pipeline(tmp_path), sample_vcf
+    monkeypatch.setattr(pipeline, "_annotate_step", _interrupt)
+    with pytest.raises(Interrupted):
+        pipeline.process_vcf_file(vcf, "analysis-1")
+
+    with open(vcf, "a") as f:
+        f.write("17\t43094465\t.\tA\tG\t60\tPASS\t.\tGT\t0/1\n")
+    assert pipeline._load_checkpoint("analysis-1", vcf) is None
+
+
+def test_recovery_sweep_resumes_stuck_analyses(tmp_path, analysis_service, sample_vcf):
+    service, vcf = analysis_service, sample_vcf
+    service._executor = ThreadAnalysisExecutor(service.ml_pipeline, max_workers=1)
+    stale = datetime.utcnow() - timedelta(hours=1)
+
+    def record(name, file_path, heartbeat_at, owner="stopped-instance"):
+        analysis_id = asyncio.run(service.create_analysis("user-1", name, file_path=file_path))
+        service._store[analysis_id].update(status="processing", owner=owner, heartbeat_at=heartbeat_at)
+        return analysis_id
+
+    stuck = record("sample.vcf", vcf, stale)
+    missing = record("gone.vcf", str(tmp_path / "gone.vcf"), stale)
+    alive = record("live.vcf", vcf, datetime.utcnow(), owner="other-live-instance")
+
+    assert service.recover_stuck_analyses() == [stuck]
+    service._executor.shutdown(wait=True)
+
+    assert service._store[stuck]["status"] == "completed"
+    assert service._store[stuck]["owner"] == service.instance_id
+    assert service._store[missing]["status"] == "failed"
+    assert service._store[alive]["status"] == "processing"
+    # a second sweep finds nothing left to claim
+    assert service.recover_stuck_analyses() == []
+
+
+def test_small_inputs_are_not_checkpointed(tmp_path, monkeypatch, sample_vcf):
+    pipeline, vcf = _pipeline(tmp_path), sample_vcf
+    pipeline.checkpoint_min_bytes = os.path.getsize(vcf) + 1
+    monkeypatch.setattr(pipeline, "_annotate_step", _interrupt)
+    with pytest.raises(Interrupted):
+        pipeline.process_vcf_file(vcf, "analysis-1")
+    assert sorted(os.listdir(tmp_path)) == ["sample.vcf"]
+
+
+def test_periodic_sweep_resumes_analyses_with_recent_heartbeat(monkeypatch, analysis_service, sample_vcf):
+    from config.settings import settings
+    monkeypatch.setattr(settings, "ANALYSIS_RECOVERY", True)
+    monkeypatch.setattr(settings, "ANALYSIS_HEARTBEAT_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "ANALYSIS_STALE_SECONDS", 1.0)
+
+    service = analysis_service
+    service._executor = ThreadAnalysisExecutor(service.ml_pipeline, max_workers=1)
+    # The previous instance heartbeated moments before it was restarted
+    analysis_id = asyncio.run(service.create_analysis("user-1", "sample.vcf", file_path=sample_vcf))
+    service._store[analysis_id].update(status="processing", owner="restarted-instance",
+                                       heartbeat_at=datetime.utcnow() - timedelta(seconds=0.2))
+    service.start()
+    assert service._store[analysis_id]["owner"] == "restarted-instance"
+
+    deadline = time.monotonic() + 30
+    while service._store[analysis_id]["status"] != "completed" and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert service._store[analysis_id]["status"] == "completed"
+    assert service._store[analysis_id]["owner"] == service.instance_id
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import threading
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.services.events import AnalysisEventBus
+from backend.services.executor import ThreadAnalysisExecutor
+
+
+def test_events_published_from_other_threads():
+    bus = AnalysisEventBus()
+
+    async def scenario():
+        subscription = bus.subscribe("a1")
+        other = bus.subscribe("a2")
+        publisher = threading.Thread(target=lambda: bus.publish("a1", {"progress": 35}))
+        publisher.start()
+        event = await asyncio.wait_for(subscription.get(), timeout=5)
+        publisher.join()
+        assert other._queue.empty()
+        bus.unsubscribe(subscription)
+        bus.unsubscribe(other)
+        return event
+
+    assert asyncio.run(scenario()) == {"progress": 35}
+    assert bus.subscriber_count() == 0
+
+
+def test_slow_subscriber_keeps_latest_events():
+    bus = AnalysisEventBus(max_events=2)
+
+    async def scenario():
+        subscription = bus.subscribe("a1")
+        for percent in (0, 35, 70):
+            bus.publish("a1", {"progress": percent})
+        await asyncio.sleep(0)
+        return [await subscription.get(), await subscription.get()]
+
+    assert asyncio.run(scenario()) == [{"progress": 35}, {"progress": 70}]
+
+
+def test_analysis_publishes_status_and_progress(analysis_service, sample_vcf):
+    service = analysis_service
+
+    async def scenario():
+        analysis_id = await service.create_analysis("user-1", "sample.vcf")
+        subscription = service.events.subscribe(analysis_id)
+        service._executor = ThreadAnalysisExecutor(service.ml_pipeline, 1, progress=service._on_progress)
+        service.submit_analysis(analysis_id, sample_vcf)
+        events = []
+        while not events or events[-1].get("status") not in ("completed", "failed"):
+            events.append(await asyncio.wait_for(subscription.get(), timeout=60))
+        return events
+
+    events = asyncio.run(scenario())
+    assert events[0]["status"] == "processing"
+    assert [event["stage"] for event in events if "stage" in event] == ["preprocess", "annotate", "predict"]
+    assert events[-1]["status"] == "completed"
+    assert events[-1]["progress"] == 100
+
+
+def _events_client(analysis_api, user_id="user-1"):
+    class FakeUser:
+        id = user_id
+
+    app = FastAPI()
+    app.include_router(analysis_api.router)
+    app.dependency_overrides[analysis_api.get_current_user] = lambda: FakeUser()
+    return TestClient(app)
+
+
+def _stream_token(client, analysis_id):
+    response = client.post(f"/analysis/results/{analysis_id}/events/token")
+    assert response.status_code == 200
+    return response.json()["token"]
+
+
+def test_events_endpoint_streams_current_state():
+    from backend.api import analysis as analysis_api
+
+    service = analysis_api.analysis_service
+    service._db = None
+    analysis_id = asyncio.run(service.create_analysis("user-1", "sample.vcf"))
+    service._update_analysis(analysis_id, {"status": "completed", "progress": 100, "risk_probability": 0.9})
+
+    client = _events_client(analysis_api)
+    response = client.get(f"/analysis/results/{analysis_id}/events",
+                          params={"token": _stream_token(client, analysis_id)})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    event = json.loads(response.text.strip().removeprefix("data: "))
+    assert event["status"] == "completed" and event["risk_probability"] == 0.9
+    assert client.post("/analysis/results/missing/events/token").status_code == 404
+    assert service.events.subscriber_count() == 0
+
+
+def test_events_endpoint_only_accepts_its_stream_token():
+    from backend.api import analysis as analysis_api
+    from backend.services.auth_service import create_access_token
+
+    service = analysis_api.analysis_service
+    service._db = None
+    first = asyncio.run(service.create_analysis("user-1", "first.vcf"))
+    second = asyncio.run(service.create_analysis("user-1", "second.vcf"))
+    client = _events_client(analysis_api)
+
+    for token in [_stream_token(client, first), create_access_token({"sub": "user-1"}), "garbage"]:
+        assert client.get(f"/analysis/results/{second}/events", params={"token": token}).status_code == 401
+    assert _events_client(analysis_api, "user-2").post(f"/analysis/results/{first}/events/token").status_code == 403
+
+
+def test_events_endpoint_follows_jobs_running_elsewhere(monkeypatch):
+    from backend.api import analysis as analysis_api
+
+    monkeypatch.setattr(analysis_api, "SSE_KEEPALIVE_SECONDS", 0.05)
+    service = analysis_api.analysis_service
+    service._db = None
+    analysis_id = asyncio.run(service.create_analysis("user-1", "sample.vcf"))
+    service._store[analysis_id].update(status="processing", progress=35)
+    client = _events_client(analysis_api)
+    token = _stream_token(client, analysis_id)
+
+    # Another worker finishes the job: the record changes, no event is published here
+    finish = threading.Timer(0.3, service._store[analysis_id].update, kwargs={"status": "completed", "progress": 100})
+    finish.start()
+    response = client.get(f"/analysis/results/{analysis_id}/events", params={"token": token})
+    finish.join()
+
+    events = [json.loads(line.removeprefix("data: ")) for line in response.text.splitlines() if line.startswith("data: ")]
+    assert events[0]["status"] == "processing"
+    assert events[-1]["status"] == "completed" and events[-1]["progress"] == 100
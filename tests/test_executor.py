@@ -0,0 +1,104 @@
+import asyncio
+
+import pytest
+
+from backend.services.analysis_service import AnalysisService
+from backend.services.executor import ProcessAnalysisExecutor, ThreadAnalysisExecutor, create_executor
+
+def test_submit_analysis_applies_results_from_executor(analysis_service, sample_vcf):
+    service = analysis_service
+    service._executor = ThreadAnalysisExecutor(service.ml_pipeline, max_workers=2)
+    analysis_id = asyncio.run(service.create_analysis("user-1", "sample.vcf"))
+    future = service.submit_analysis(analysis_id, sample_vcf)
+    assert future.result(timeout=60)["status"] == "completed"
+
+    record = service._store[analysis_id]
+    assert record["status"] == "completed"
+    assert record["total_variants"] == 2
+
+
+def test_submit_analysis_marks_failed_when_pipeline_raises(analysis_service, sample_vcf):
+    service = analysis_service
+
+    class Broken:
+        kind = "thread"
+
+        def run_pipeline(self, vcf_path, analysis_id):
+            from concurrent.futures import Future
+            future = Future()
+            future.set_exception(RuntimeError("worker died"))
+            return future
+
+        def shutdown(self, wait=True):
+            pass
+
+    service._executor = Broken()
+    analysis_id = asyncio.run(service.create_analysis("user-1", "sample.vcf"))
+    service.submit_analysis(analysis_id, sample_vcf)
+
+    record = service._store[analysis_id]
+    assert record["status"] == "failed"
+    assert "worker died" in record["error_message"]
+
+
+def test_process_executor_runs_pipeline_in_worker(sample_vcf):
+    progress = []
+    executor = create_executor("process", 1, None, {"defer_remote": False},
+                               progress=lambda *update: progress.append(update))
+    assert isinstance(executor, ProcessAnalysisExecutor)
+    try:
+        results = executor.run_pipeline(sample_vcf, "analysis-1").result(timeout=120)
+    finally:
+        executor.shutdown()
+    assert results["status"] == "completed"
+    assert results["total_variants"] == 2
+    # progress messages from the worker reach the API-process callback
+    assert progress == [("analysis-1", "preprocess", 0), ("analysis-1", "annotate", 35), ("analysis-1", "predict", 70)]
+
+
+def test_inference_batching_only_with_thread_executor():
+    class Stub:
+        def __init__(self, kind):
+            self.kind = kind
+
+    threaded = AnalysisService(remote_annotation=False, executor=Stub("thread"))
+    pooled = AnalysisService(remote_annotation=False, executor=Stub("process"))
+    try:
+        assert threaded.ml_pipeline.batch_inference is threaded.batch_inference is not None
+        assert threaded.inference_stats()["enabled"]
+        assert pooled.batch_inference is None
+        assert pooled.inference_stats() == {"enabled": False, "executor": "process"}
+    finally:
+        threaded.batch_inference.close()
+
+
+def test_unknown_executor_kind():
+    with pytest.raises(ValueError):
+        create_executor("gpu", 1, None, {})
+
+
+def test_executor_is_created_once_under_concurrent_first_use(analysis_service, monkeypatch):
+    import threading
+    import time
+
+    from backend.services import analysis_service as module
+
+    class Stub:
+        def shutdown(self, wait=True):
+            pass
+
+    created = []
+
+    def slow_create(*args, **kwargs):
+        time.sleep(0.05)
+        created.append(Stub())
+        return created[-1]
+
+    monkeypatch.setattr(module, "create_executor", slow_create)
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(analysis_service.executor)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(created) == 1 and all(executor is created[0] for executor in seen)
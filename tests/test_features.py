@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from scripts.features import FeatureAccumulator, extract_features
+
+def _reference_features(df):
+    """Original multi-pass create_features()"""
+    risk_counts = df['DISEASE_RISK'].value_counts()
+    return [
+        risk_counts.get('High', 0), risk_counts.get('Medium', 0), risk_counts.get('Low', 0),
+        len(df[df['PATHOGENICITY'] == 'Pathogenic']),
+        df['QUAL'].mean(),
+        len(df[df['GENE'].str.contains('BRCA', na=False)]),
+        len(df[df['GENE'].str.contains('APOE', na=False)]),
+        len(df[df['GENE'].str.contains('TP53', na=False)]),
+    ]
+
+def _annotated_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    qual = rng.normal(35, 12, n)
+    qual[rng.random(n) < 0.05] = np.nan
+    return pd.DataFrame({
+        'GENE': rng.choice(['', 'BRCA1', 'BRCA2', 'TP53', 'APOE', 'CFTR'], n),
+        'DISEASE_RISK': rng.choice(['High', 'Medium', 'Low'], n),
+        'PATHOGENICITY': rng.choice(['Pathogenic', 'Benign', 'Likely Pathogenic'], n),
+        'QUAL': qual,
+    })
+
+@pytest.mark.parametrize('categorical', [False, True])
+def test_single_pass_features_match_reference(categorical):
+    df = _annotated_frame(5_000)
+    if categorical:
+        df = df.astype({name: 'category' for name in ['GENE', 'DISEASE_RISK', 'PATHOGENICITY']})
+
+    np.testing.assert_allclose(extract_features(df), _reference_features(df))
+
+def test_chunked_accumulation_matches_whole_table():
+    df = _annotated_frame(5_000, seed=1)
+    accumulator = FeatureAccumulator()
+    for start in range(0, len(df), 1_234):
+        accumulator.update(df.iloc[start:start + 1_234])
+
+    assert accumulator.rows == len(df)
+    np.testing.assert_allclose(accumulator.features(), extract_features(df))
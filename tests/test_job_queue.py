@@ -0,0 +1,112 @@
+from concurrent.futures import Future
+
+import pytest
+
+from backend.services.job_queue import AnalysisJobQueue, QueueFullError
+
+
+class ManualStart:
+    """Start function whose jobs finish only when the test says so"""
+
+    def __init__(self):
+        self.jobs = {}
+
+    def __call__(self, analysis_id, file_path):
+        self.jobs[analysis_id] = Future()
+        return self.jobs[analysis_id]
+
+
+def test_runs_up_to_limit_and_queues_the_rest():
+    start = ManualStart()
+    queue = AnalysisJobQueue(start, max_running=2, max_queued=2)
+    futures = {name: queue.submit(name, f"{name}.vcf") for name in ["a", "b", "c", "d"]}
+
+    assert set(start.jobs) == {"a", "b"}
+    assert [queue.position(name) for name in "abcd"] == [0, 0, 1, 2]
+    assert queue.position("unknown") is None
+
+    start.jobs["a"].set_result({"status": "completed"})
+    assert futures["a"].result() == {"status": "completed"}
+    assert "c" in start.jobs
+    assert queue.position("d") == 1
+    assert queue.stats()["running"] == 2
+
+
+def test_rejects_when_full_with_retry_after():
+    start = ManualStart()
+    queue = AnalysisJobQueue(start, max_running=1, max_queued=1, initial_job_seconds=10)
+    queue.submit("a", "a.vcf")
+    queue.submit("b", "b.vcf")
+
+    with pytest.raises(QueueFullError) as error:
+        queue.check_admission()
+    assert error.value.retry_after == 20
+    with pytest.raises(QueueFullError):
+        queue.submit("c", "c.vcf")
+    assert queue.stats()["rejected"] == 2
+
+    start.jobs["a"].set_result({})
+    queue.check_admission()
+
+
+def test_failed_job_frees_its_slot():
+    start = ManualStart()
+    queue = AnalysisJobQueue(start, max_running=1, max_queued=1)
+    first = queue.submit("a", "a.vcf")
+    queue.submit("b", "b.vcf")
+
+    start.jobs["a"].set_exception(RuntimeError("boom"))
+    with pytest.raises(RuntimeError):
+        first.result()
+    assert queue.position("b") == 0
+
+
+def test_failed_start_does_not_shorten_retry_after():
+    def start(analysis_id, file_path):
+        raise OSError("executor is gone")
+
+    queue = AnalysisJobQueue(start, max_running=1, max_queued=1, initial_job_seconds=10)
+    for name in "abc":
+        with pytest.raises(OSError):
+            queue.submit(name, f"{name}.vcf").result()
+    assert queue.stats()["avg_job_seconds"] == 10
+
+
+def test_bulk_user_does_not_starve_others():
+    start = ManualStart()
+    queue = AnalysisJobQueue(start, max_running=1, max_queued=300)
+    for i in range(200):
+        queue.submit(f"bulk-{i}", "x.vcf", user_id="loader", priority="bulk")
+    queue.submit("mine", "x.vcf", user_id="alice")
+
+    # alice's upload is next in line, ahead of the 199 waiting bulk jobs
+    assert queue.position("mine") == 1
+    start.jobs["bulk-0"].set_result({})
+    assert queue.position("mine") == 0
+    assert queue.user_counts("loader") == {"running": 0, "queued": 199}
+    assert queue.stats()["users"]["alice"] == {"running": 1, "queued": 0}
+
+
+def test_weights_share_slots_between_priorities():
+    start = ManualStart()
+    queue = AnalysisJobQueue(start, max_running=1, max_queued=100)
+    queue.submit("first", "x.vcf", user_id="a")
+    for i in range(8):
+        queue.submit(f"bulk-{i}", "x.vcf", user_id="b", priority="bulk")
+        queue.submit(f"interactive-{i}", "x.vcf", user_id="c")
+
+    order = []
+    current = "first"
+    for _ in range(10):
+        start.jobs[current].set_result({})
+        current = next(name for name, job in start.jobs.items() if not job.done())
+        order.append(current)
+    # interactive jobs get four slots for every bulk one
+    assert sum(name.startswith("interactive") for name in order) == 8
+    assert sum(name.startswith("bulk") for name in order) == 2
+
+
+def test_unknown_priority():
+    queue = AnalysisJobQueue(ManualStart(), max_running=1, max_queued=1)
+    with pytest.raises(ValueError):
+        queue.submit("a", "a.vcf", priority="urgent")
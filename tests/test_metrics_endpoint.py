@@ -0,0 +1,59 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.api.metrics import MetricsRegistry, install_metrics, render_histogram
+from backend.services.metrics import Histogram
+
+
+def _client():
+    app = FastAPI()
+    registry = MetricsRegistry()
+    install_metrics(app, registry)
+
+    @app.get("/items/{item_id}")
+    def item(item_id: str):
+        return {"id": item_id}
+
+    return TestClient(app), registry
+
+
+def test_request_latency_is_labelled_by_route_template():
+    client, _ = _client()
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/missing")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert 'http_request_duration_seconds_count{method="GET",route="/items/{item_id}",status="200"} 2' in body
+    assert 'route="unmatched",status="404"' in body
+    assert "http_requests_in_flight 1" in body  # the scrape itself
+
+
+def test_registered_collectors_are_rendered():
+    client, registry = _client()
+    registry.register(lambda: ["# TYPE custom_value gauge", "custom_value 42"])
+    registry.register(lambda: 1 / 0)  # a failing collector does not break the scrape
+    assert "custom_value 42" in client.get("/metrics").text
+
+
+def test_render_histogram_scales_to_seconds():
+    histogram = Histogram((1, 10))
+    histogram.observe(5)
+    lines = render_histogram("latency_seconds", histogram.snapshot(), {"stage": "predict"}, scale=0.001)
+    assert 'latency_seconds_bucket{stage="predict",le="0.001"} 0' in lines
+    assert 'latency_seconds_bucket{stage="predict",le="0.01"} 1' in lines
+    assert 'latency_seconds_bucket{stage="predict",le="+Inf"} 1' in lines
+    assert 'latency_seconds_count{stage="predict"} 1' in lines
+
+
+def test_served_app_exposes_analysis_metrics():
+    from backend.main import app
+
+    body = TestClient(app).get("/metrics").text
+    assert "analysis_jobs_running 0" in body
+    assert "analysis_jobs_queued 0" in body
+    assert "# TYPE analysis_stage_duration_seconds histogram" in body
+    assert "# TYPE http_request_duration_seconds histogram" in body
@@ -0,0 +1,118 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from scripts.model_artifact import export_model, load_model_artifact
+from scripts.model_registry import FALLBACK_VERSION, ModelRegistry
+from scripts.predict import SimpleRiskModel
+from scripts.quick_model import QuickGenomicsModel
+
+def _write_quick_model(path, version):
+    with open(path, 'wb') as f:
+        pickle.dump({'model': QuickGenomicsModel(), 'version': version}, f)
+
+def test_model_is_loaded_once_and_swapped_on_change(tmp_path):
+    path = tmp_path / 'model.pkl'
+    _write_quick_model(path, '1.0')
+    registry = ModelRegistry(path)
+
+    first = registry.get()
+    assert isinstance(first, QuickGenomicsModel)
+    assert registry.get() is first
+    assert registry.version.startswith('1.0-')
+    assert not registry.reload_if_changed()
+
+    _write_quick_model(path, '2.0')
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert registry.reload_if_changed()
+    assert registry.get() is not first
+    assert registry.version.startswith('2.0-')
+
+def test_broken_artifact_keeps_current_model(tmp_path):
+    path = tmp_path / 'model.pkl'
+    _write_quick_model(path, '1.0')
+    registry = ModelRegistry(path)
+    model = registry.get()
+
+    path.write_bytes(b'not a pickle')
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert not registry.reload_if_changed()
+    assert registry.get() is model
+
+def test_broken_artifact_is_retried_only_after_it_changes(tmp_path, monkeypatch):
+    path = tmp_path / 'model.pkl'
+    _write_quick_model(path, '1.0')
+    registry = ModelRegistry(path)
+    registry.get()
+
+    path.write_bytes(b'not a pickle')
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert not registry.reload_if_changed()
+
+    loads = []
+    monkeypatch.setattr(registry, 'load', lambda p=None: loads.append(p))
+    assert not registry.reload_if_changed()
+    assert loads == []
+
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert registry.reload_if_changed()
+    assert loads == [str(path)]
+
+def test_missing_artifact_falls_back_to_rule_model(tmp_path):
+    registry = ModelRegistry(tmp_path / 'missing.pkl')
+    assert isinstance(registry.get(), SimpleRiskModel)
+    assert registry.warm() == FALLBACK_VERSION
+
+def test_loads_pickled_xgboost_classifier(tmp_path):
+    xgb = pytest.importorskip('xgboost')
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 8))
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=2).fit(X, (X[:, 0] > 0.5).astype(int))
+    path = tmp_path / 'model.pkl'
+    with open(path, 'wb') as f:
+        pickle.dump(model, f)
+
+    registry = ModelRegistry(path)
+    assert isinstance(registry.get(), xgb.XGBClassifier)
+    registry.warm()
+
+def test_xgboost_artifact_roundtrip_without_pickle(tmp_path):
+    xgb = pytest.importorskip('xgboost')
+    rng = np.random.default_rng(0)
+    X = rng.random((200, 8))
+    model = xgb.XGBClassifier(n_estimators=5, max_depth=2).fit(X, (X[:, 0] > 0.5).astype(int))
+
+    meta_path = export_model(model, tmp_path, version='2.1')
+    loaded, version, seconds = load_model_artifact(meta_path)
+    assert version.startswith('2.1-') and seconds >= 0
+    np.testing.assert_allclose(loaded.predict_proba(X), model.predict_proba(X), rtol=1e-6)
+
+    # Re-export replaces the binary; the registry follows the metadata file
+    registry = ModelRegistry(meta_path)
+    assert registry.version == version
+    export_model(xgb.XGBClassifier(n_estimators=3).fit(X, (X[:, 1] > 0.5).astype(int)), tmp_path)
+    os.utime(meta_path, ns=(0, os.stat(meta_path).st_mtime_ns + 1_000_000))
+    assert registry.reload_if_changed()
+    assert registry.version != version
+    # The previous binary stays for readers of the old metadata
+    assert len(list(tmp_path.glob('model-*.ubj'))) == 2
+    export_model(model, tmp_path, version='2.2')
+    assert len(list(tmp_path.glob('model-*.ubj'))) == 2
+
+def test_artifact_with_missing_binary_fails_instead_of_falling_back(tmp_path):
+    xgb = pytest.importorskip('xgboost')
+    X = np.random.default_rng(0).random((50, 8))
+    meta_path = export_model(xgb.XGBClassifier(n_estimators=2).fit(X, (X[:, 0] > 0.5).astype(int)), tmp_path)
+    for binary in tmp_path.glob('model-*.ubj'):
+        binary.unlink()
+
+    with pytest.raises(ValueError, match="missing binary"):
+        ModelRegistry(meta_path).get()
+
+def test_rule_model_artifact(tmp_path):
+    meta_path = export_model(QuickGenomicsModel(), tmp_path)
+    model, version, _ = load_model_artifact(meta_path)
+    assert isinstance(model, QuickGenomicsModel)
+    assert version.startswith('1.0-')
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+import pytest
+
+from backend.services.annotation_cache import AnnotationCache
+from backend.services.myvariant_client import MyVariantClient, TokenBucket
+from backend.services.variant_annotator import VariantAnnotator
+
+KNOWN = {
+    "chr17:g.43094464A>C": {
+        "clinvar": {"rcv": {"clinical_significance": "Pathogenic", "conditions": "Breast cancer"}},
+        "dbnsfp": {"genename": "BRCA1"},
+    },
+    "chr13:g.32315474G>T": {"dbnsfp": {"genename": "BRCA2"}},
+}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Mimics POST /v1/variant: one document per id, notfound for unknown ids"""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        ids = parse_qs(body)["ids"][0].split(",")
+        self.server.batches.append(ids)
+
+        docs = [dict(KNOWN[i], query=i, _id=i) if i in KNOWN else {"query": i, "notfound": True} for i in ids]
+        payload = json.dumps(docs).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.batches = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _client(server, **kwargs):
+    return MyVariantClient(base_url=f"http://127.0.0.1:{server.server_port}/v1",
+                           requests_per_second=1000, **kwargs)
+
+
+def test_fetch_splits_ids_into_batches(stub_server):
+    ids = list(KNOWN) + [f"chr1:g.{pos}A>G" for pos in range(1, 6)]
+    found = _client(stub_server, batch_size=3).fetch_sync(ids)
+
+    assert set(found) == set(KNOWN)
+    assert sorted(len(batch) for batch in stub_server.batches) == [1, 3, 3]
+
+
+def test_all_callers_share_one_connection_pool_and_rate_limit(stub_server):
+    client = _client(stub_server)
+    try:
+        client.fetch_sync(list(KNOWN)[:1])
+        http, bucket = client._http, client._bucket
+        # asyncio.run callers each bring a new event loop
+        for _ in range(2):
+            assert set(asyncio.run(client.fetch(list(KNOWN)))) == set(KNOWN)
+        client.fetch_sync(list(KNOWN)[1:])
+        assert (client._http, client._bucket) == (http, bucket)
+        assert client.requests_sent == 4
+    finally:
+        client.close()
+    assert http.is_closed and client._http is None
+
+
+def test_fetch_sync_refuses_to_block_a_running_loop(stub_server):
+    client = _client(stub_server)
+
+    async def run():
+        with pytest.raises(RuntimeError, match="running event loop"):
+            client.fetch_sync(list(KNOWN))
+        return await client.fetch(list(KNOWN))
+
+    assert set(asyncio.run(run())) == set(KNOWN)
+
+
+def test_batch_annotate_only_fetches_cache_misses(stub_server):
+    annotator = VariantAnnotator(use_api=True, cache=AnnotationCache(db_path=None),
+                                 client=_client(stub_server))
+    variants = [
+        {"chrom": "17", "pos": 43094464, "ref": "A", "alt": "C"},
+        {"chrom": "13", "pos": 32315474, "ref": "G", "alt": "T"},
+        {"chrom": "1", "pos": 100, "ref": "A", "alt": "G"},
+    ]
+
+    annotated = annotator.batch_annotate([dict(v) for v in variants])
+    assert annotated[0]["gene"] == "BRCA1"
+    assert annotated[0]["pathogenicity"] == "Pathogenic"
+    assert annotated[1]["gene"] == "BRCA2"
+    assert "gene" not in annotated[2]
+
+    annotator.batch_annotate([dict(v) for v in variants[:2]])
+    assert len(stub_server.batches) == 1
+
+
+def test_token_bucket_waits_for_refill():
+    now = [0.0]
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    async def run():
+        bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0], sleep=fake_sleep)
+        for _ in range(4):
+            await bucket.acquire()
+
+    asyncio.run(run())
+    assert sum(slept) == pytest.approx(1.0)
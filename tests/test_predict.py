@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from scripts.predict import SimpleRiskModel, score_features
+from scripts.quick_model import QuickGenomicsModel
+
+def _reference(features):
+    """Original per-row rule: class from the raw score, probability with the quality discount"""
+    score = (features[0] * 4 + features[1] * 2 + features[3] * 5 + features[5] * 3.5 + features[7] * 4) / 25.0
+    pred = 1 if score > 0.6 else 0
+    if features[4] < 20:
+        score *= 0.7
+    return pred, min(max(score, 0.05), 0.95)
+
+@pytest.mark.parametrize('model', [SimpleRiskModel(), QuickGenomicsModel()])
+def test_vectorized_scoring_matches_row_rule(model):
+    rng = np.random.default_rng(1)
+    X = np.column_stack([rng.poisson(lam, 500) for lam in (1.5, 3, 15, 0.8)]
+                        + [rng.normal(30, 15, 500)]
+                        + [rng.poisson(lam, 500) for lam in (0.3, 0.2, 0.15)])
+
+    classes, probs = model.predict_with_proba(X)
+    expected = [_reference(row) for row in X]
+    np.testing.assert_array_equal(classes, [c for c, _ in expected])
+    np.testing.assert_allclose(probs, [p for _, p in expected])
+    np.testing.assert_allclose(model.predict_proba(X).sum(axis=1), 1.0)
+    assert model.predict([5, 10, 20, 3, 35, 2, 1, 1]).tolist() == [1]
+
+def test_score_features_falls_back_to_predict_proba():
+    class ProbaOnly:
+        def predict_proba(self, X):
+            p = np.asarray(X)[:, 0] / 10
+            return np.column_stack([1 - p, p])
+
+    classes, probs = score_features(ProbaOnly(), [[2] + [0] * 7, [8] + [0] * 7])
+    assert classes.tolist() == [0, 1]
+    np.testing.assert_allclose(probs, [0.2, 0.8])
@@ -0,0 +1,26 @@
+import pandas as pd
+
+from scripts.preprocess import iter_vcf_chunks, preprocess_vcf
+
+SAMPLE_VCF = "data/raw/high_risk_sample.vcf"
+
+def test_chunks_respect_chunk_size():
+    chunks = list(iter_vcf_chunks(SAMPLE_VCF, chunk_size=10))
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == 95
+
+def test_chunked_output_matches_single_pass(tmp_path):
+    chunked = tmp_path / "chunked.csv"
+    single = tmp_path / "single.csv"
+    assert preprocess_vcf(SAMPLE_VCF, str(chunked), chunk_size=7)
+    assert preprocess_vcf(SAMPLE_VCF, str(single), chunk_size=10_000)
+    pd.testing.assert_frame_equal(pd.read_csv(chunked), pd.read_csv(single))
+
+def test_sample_matches_reference_output(tmp_path):
+    output = tmp_path / "sample.csv"
+    assert preprocess_vcf("data/raw/sample.vcf", str(output), chunk_size=2)
+    expected = open("data/processed/test_analysis_processed.csv").read()
+    assert output.read_text() == expected
+
+def test_missing_file_returns_false(tmp_path):
+    assert not preprocess_vcf(str(tmp_path / "missing.vcf"), str(tmp_path / "out.csv"))
@@ -0,0 +1,58 @@
+import asyncio
+import time
+
+from backend.services.analysis_service import AnalysisService
+from backend.services.ml_pipeline import MLPipeline
+
+VCF = """##fileformat=VCFv4.2
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tSAMPLE1
+17\t43094464\t.\tA\tC\t60\tPASS\t.\tGT\t0/1
+17\t43094470\t.\tG\tT\t5\tPASS\t.\tGT\t0/1
+1\t1000\t.\tC\tT\t60\tPASS\t.\tGT\t1/1
+"""
+
+
+class FakeAnnotator:
+    """Stands in for the MyVariant.info-backed annotator"""
+
+    async def abatch_annotate(self, variants):
+        for variant in variants:
+            variant.update({"gene": "BRCA1", "pathogenicity": "Pathogenic", "risk_level": "High",
+                            "clinical_significance": "Pathogenic", "disease": ["Breast cancer"]})
+        return variants
+
+
+def _write_vcf(tmp_path):
+    path = tmp_path / "sample.vcf"
+    path.write_text(VCF)
+    return str(path)
+
+
+def test_pipeline_defers_region_only_variants(tmp_path):
+    results = MLPipeline(defer_remote=True).process_vcf_file(_write_vcf(tmp_path), "defer_test")
+
+    assert results["status"] == "completed"
+    assert [(v["chrom"], v["pos"]) for v in results["deferred_variants"]] == [("17", 43094464)]
+    assert results["deferred_variants"][0]["gene"] == "BRCA1"
+    assert results["deferred_variants"][0]["annotation_source"] == "local"
+
+
+def test_remote_annotations_upgrade_completed_analysis(tmp_path):
+    service = AnalysisService(remote_annotation=True)
+    service._db = None
+    service.remote_annotations.annotator = FakeAnnotator()
+
+    analysis_id = asyncio.run(service.create_analysis("user-1", "sample.vcf"))
+    service.process_vcf(analysis_id, _write_vcf(tmp_path))
+
+    deadline = time.monotonic() + 5
+    while service.remote_annotations.pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+    service.remote_annotations.shutdown()
+
+    record = service._store[analysis_id]
+    assert record["status"] == "completed"
+    assert record["remote_annotation_status"] == "completed"
+    assert record["variants"][0]["annotation_source"] == "myvariant"
+    assert record["variants"][0]["diseases"] == ["Breast cancer"]
+    assert record["pathogenic_variants"] == 1
@@ -0,0 +1,40 @@
+import asyncio
+
+import numpy as np
+
+from scripts.predict import SimpleRiskModel
+
+class AlwaysHigh:
+    def predict_proba(self, X):
+        return np.tile([0.1, 0.9], (len(X), 1))
+
+
+def test_completed_analysis_stores_features_and_model_version(analysis_service, sample_vcf):
+    service = analysis_service
+    analysis_id = asyncio.run(service.create_analysis("user-1", "sample.vcf"))
+    service.process_vcf(analysis_id, sample_vcf)
+
+    record = service._store[analysis_id]
+    assert record["status"] == "completed"
+    assert len(record["features"]) == 8
+    assert all(type(value) is float for value in record["features"])
+    assert record["model_version"] == service.ml_pipeline.model_registry.version
+    assert type(record["risk_probability"]) is float
+
+
+def test_rescore_all_updates_stored_analyses_in_batches(analysis_service):
+    service = analysis_service
+    features = np.random.default_rng(0).poisson(1, (25, 8)).astype(float).tolist()
+    for i, row in enumerate(features):
+        service._store[f"a{i}"] = {"_id": f"a{i}", "status": "completed", "features": row,
+                                   "model_version": "old", "risk_probability": 0.0}
+    service._store["pending"] = {"_id": "pending", "status": "pending", "features": None}
+
+    assert service.rescore_all(AlwaysHigh(), "v2", batch_size=10) == 25
+    assert all(service._store[f"a{i}"]["risk_classification"] == "high_risk" for i in range(25))
+    assert service._store["a0"]["model_version"] == "v2"
+    assert "risk_classification" not in service._store["pending"]
+
+    # Already at this version: skipped unless forced
+    assert service.rescore_all(AlwaysHigh(), "v2") == 0
+    assert service.rescore_all(SimpleRiskModel(), "v2", force=True) == 25
@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+
+@pytest.fixture
+def content_hash(sample_vcf):
+    with open(sample_vcf, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+@pytest.fixture
+def completed(analysis_service, sample_vcf, content_hash):
+    """(service, id of a completed analysis of sample_vcf by user-1)"""
+    first = asyncio.run(analysis_service.create_analysis("user-1", "sample.vcf", content_hash))
+    analysis_service.process_vcf(first, sample_vcf)
+    return analysis_service, first
+
+
+def test_reupload_reuses_completed_result(completed, content_hash):
+    service, first = completed
+
+    second = asyncio.run(service.create_analysis("user-1", "copy.vcf", content_hash))
+    assert service.reuse_cached_result(second, content_hash, "user-1") == first
+
+    original, copy = service._store[first], service._store[second]
+    assert copy["status"] == "completed"
+    assert copy["cached_from"] == first
+    for field in ["total_variants", "risk_probability", "features", "model_version"]:
+        assert copy[field] == original[field]
+
+
+def test_no_reuse_for_other_content_or_model(completed, content_hash):
+    service, first = completed
+
+    other = asyncio.run(service.create_analysis("user-1", "other.vcf", "0" * 64))
+    assert service.reuse_cached_result(other, "0" * 64, "user-1") is None
+    assert service._store[other]["status"] == "pending"
+
+    service._store[first]["model_version"] = "older-model"
+    again = asyncio.run(service.create_analysis("user-1", "sample.vcf", content_hash))
+    assert service.reuse_cached_result(again, content_hash, "user-1") is None
+
+
+def test_no_reuse_across_users(completed, content_hash):
+    service, first = completed
+
+    other_user = asyncio.run(service.create_analysis("user-2", "sample.vcf", content_hash))
+    assert service.reuse_cached_result(other_user, content_hash, "user-2") is None
+    assert service._store[other_user]["status"] == "pending"
+    assert "cached_from" not in service._store[other_user]
+
+
+def test_upload_served_from_cache_when_queue_is_full(tmp_path, monkeypatch, sample_vcf, content_hash):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from backend.api import analysis as analysis_api
+    from backend.services.job_queue import QueueFullError
+    from config.settings import settings
+
+    class FakeUser:
+        id = "user-1"
+
+    service = analysis_api.analysis_service
+    service._db = None
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path / "uploads"))
+    first = asyncio.run(service.create_analysis("user-1", "sample.vcf", content_hash))
+    service.process_vcf(first, sample_vcf)
+    with open(sample_vcf) as f:
+        vcf = f.read()
+
+    def full(*args, **kwargs):
+        raise QueueFullError(5)
+
+    monkeypatch.setattr(service.job_queue, "check_admission", full)
+    monkeypatch.setattr(service.job_queue, "submit", full)
+    app = FastAPI()
+    app.include_router(analysis_api.router)
+    app.dependency_overrides[analysis_api.get_current_user] = lambda: FakeUser()
+    client = TestClient(app)
+
+    cached = client.post("/analysis/upload", files={"file": ("sample.vcf", vcf)})
+    assert cached.status_code == 200 and cached.json()["cached_from"] == first
+
+    rejected = client.post("/analysis/upload", files={"file": ("sample.vcf", vcf + vcf.splitlines()[-1] + "\n")})
+    assert rejected.status_code == 429
+    # each upload gets its own file, so the rejected one did not replace the cached one
+    assert os.listdir(tmp_path / "uploads") == [os.path.basename(service._store[cached.json()["analysis_id"]]["file_path"])]
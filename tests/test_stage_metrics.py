@@ -0,0 +1,89 @@
+import asyncio
+import os
+
+import pytest
+
+from backend.services.metrics import StageMetrics, StageSpan
+
+
+def test_stage_span_measures_block():
+    with StageSpan("work", rows_in=3, bytes_read=10) as span:
+        sum(range(100_000))
+        span.rows_out = 2
+    record = span.to_dict()
+    assert record["stage"] == "work" and record["ok"]
+    assert record["wall_ms"] > 0 and record["cpu_ms"] >= 0
+    assert (record["rows_in"], record["rows_out"], record["bytes_read"]) == (3, 2, 10)
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_stage_span_reports_memory_growth_of_the_stage():
+    ballast = b"x" * (64 * 1024 * 1024)  # raises the process peak before the span
+    del ballast
+    with StageSpan("small") as small:
+        small.rows_out = 0
+    with StageSpan("large") as large:
+        kept = b"x" * (32 * 1024 * 1024)
+        large.rows_out = len(kept)
+    assert small.rss_delta_mb < 16
+    assert large.rss_delta_mb > 16
+    assert large.rss_mb >= large.rss_delta_mb
+
+
+def _can_reset_peak():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+@pytest.mark.skipif(not _can_reset_peak(), reason="needs a writable /proc/self/clear_refs")
+def test_stage_span_reports_transient_peak_of_the_stage():
+    ballast = b"x" * (64 * 1024 * 1024)  # raises the process peak before the span
+    del ballast
+    with StageSpan("quiet") as quiet:
+        quiet.rows_out = 0
+    with StageSpan("spiky") as spiky:
+        transient = b"x" * (48 * 1024 * 1024)
+        spiky.rows_out = len(transient)
+        del transient
+    assert quiet.peak_rss_mb - quiet.rss_mb < 16
+    assert spiky.peak_rss_mb - spiky.rss_mb > 32
+    assert spiky.to_dict()["peak_rss_mb"] == round(spiky.peak_rss_mb, 1)
+
+
+def test_stage_span_not_ok_on_exception():
+    with pytest.raises(ValueError):
+        with StageSpan("work") as span:
+            raise ValueError("boom")
+    assert not span.ok
+    assert span.wall_ms is not None
+
+
+def test_analysis_records_stage_spans(analysis_service, sample_vcf):
+    service = analysis_service
+    analysis_id = asyncio.run(service.create_analysis("user-1", "sample.vcf"))
+    service.process_vcf(analysis_id, sample_vcf)
+
+    stages = service._store[analysis_id]["stages"]
+    assert [stage["stage"] for stage in stages] == ["preprocess", "annotate", "predict"]
+    assert all(stage["ok"] for stage in stages)
+    assert stages[0]["bytes_read"] == os.path.getsize(sample_vcf)
+    assert stages[0]["rows_out"] == stages[1]["rows_in"] == 2
+    assert stages[2]["rows_out"] == 1
+
+    stats = service.pipeline_stats()
+    assert stats["predict"]["wall_ms"]["count"] == 1
+    assert stats["annotate"]["rows_in"]["sum"] == 2
+
+
+def test_stage_metrics_aggregates_by_stage():
+    metrics = StageMetrics()
+    metrics.record([{"stage": "predict", "wall_ms": 5.0, "cpu_ms": 4.0, "rows_in": 10}])
+    metrics.record([{"stage": "predict", "wall_ms": 15.0, "cpu_ms": 12.0, "rows_in": None}])
+    snapshot = metrics.snapshot()["predict"]
+    assert snapshot["wall_ms"]["count"] == 2
+    assert snapshot["wall_ms"]["mean"] == 10.0
+    assert snapshot["rows_in"]["count"] == 1
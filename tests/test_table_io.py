@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+from scripts.table_io import iter_table_chunks, open_table_writer, read_table, write_table
+
+def _frame():
+    return pd.DataFrame({
+        'CHROM': ['1', '17', 'X'],
+        'POS': np.array([100, 43044295, 31119220], dtype=np.int64),
+        'QUAL': [60.0, np.nan, 12.5],
+        'GT': ['0/1', None, '1/1'],
+    })
+
+def test_roundtrip_preserves_values_and_types(tmp_path):
+    path = tmp_path / "table.npz"
+    write_table(_frame(), str(path))
+    result = read_table(str(path))
+
+    assert result['POS'].dtype == np.int64
+    assert result['QUAL'].dtype == np.float64
+    assert list(result['CHROM']) == ['1', '17', 'X']
+    assert pd.isna(result['GT'][1])
+    text = {'CHROM': object, 'GT': object}
+    pd.testing.assert_frame_equal(result.astype(text), _frame().astype(text))
+
+def test_chunked_write_merges_categories(tmp_path):
+    path = tmp_path / "table.npz"
+    with open_table_writer(str(path)) as writer:
+        writer.write(_frame().iloc[:2])
+        writer.write(_frame().iloc[2:])
+
+    assert [len(chunk) for chunk in iter_table_chunks(str(path))] == [2, 1]
+    assert list(read_table(str(path))['CHROM']) == ['1', '17', 'X']
+
+def test_matches_csv_export(tmp_path):
+    write_table(_frame(), str(tmp_path / "table.npz"))
+    write_table(read_table(str(tmp_path / "table.npz")), str(tmp_path / "table.csv"))
+    write_table(_frame(), str(tmp_path / "direct.csv"))
+    assert (tmp_path / "table.csv").read_text() == (tmp_path / "direct.csv").read_text()
@@ -4,6 +4,11 @@ import { analysisAPI } from '../services/api';
 import toast from 'react-hot-toast';
 import { FileText, AlertCircle, CheckCircle, Clock, XCircle, ArrowLeft, Download } from 'lucide-react';
 
+// Poll interval while the event stream is unavailable
+const POLL_FALLBACK_MS = 12000;
+// Stream reopen attempts in a row before relying on polling alone
+const MAX_STREAM_REOPENS = 3;
+
 const Results = () => {
   const { id } = useParams();
   const navigate = useNavigate();
@@ -15,15 +20,92 @@ const Results = () => {
     console.log('📊 Results: Loading analysis ID:', id);
     fetchAnalysis();
     
-    // Poll for updates if analysis is pending or processing
-    const interval = setInterval(() => {
-      if (analysis?.status === 'pending' || analysis?.status === 'processing') {
-        console.log('🔄 Results: Polling for updates...');
-        fetchAnalysis();
+    // Follow status and progress over server-sent events, polling slowly
+    // whenever the stream cannot be opened or ends without a final status
+    if (!localStorage.getItem('token')) return undefined;
+    
+    let lastStatus = null;
+    let source = null;
+    let pollTimer = null;
+    let reopenAttempts = 0;
+    let stopped = false;
+    
+    const isFinished = (status) => status === 'completed' || status === 'failed';
+    
+    const startPolling = () => {
+      if (pollTimer || stopped) return;
+      console.warn('⚠️ Results: Event stream unavailable, polling for updates...');
+      pollTimer = setInterval(async () => {
+        try {
+          const response = await analysisAPI.getResult(id);
+          setAnalysis({ ...response.data, id: response.data.id || response.data._id });
+          if (isFinished(response.data.status)) {
+            stopped = true;
+            clearInterval(pollTimer);
+          }
+        } catch (error) {
+          // Transient failure: try again on the next tick
+          console.warn('⚠️ Results: Polling failed:', error);
+        }
+      }, POLL_FALLBACK_MS);
+    };
+    
+    const openStream = async () => {
+      let streamToken;
+      try {
+        streamToken = (await analysisAPI.createEventsToken(id)).data.token;
+      } catch (error) {
+        // Network or server error, or a backend without event streams
+        console.warn('⚠️ Results: Could not open event stream:', error);
+        startPolling();
+        return;
       }
-    }, 3000); // Poll every 3 seconds
-
-    return () => clearInterval(interval);
+      if (stopped) return;
+      
+      source = new EventSource(analysisAPI.eventsUrl(id, streamToken));
+      source.onmessage = (message) => {
+        const event = JSON.parse(message.data);
+        console.log('🔄 Results: Analysis event:', event);
+        // The stream is healthy again: polling is no longer needed
+        reopenAttempts = 0;
+        if (pollTimer) {
+          clearInterval(pollTimer);
+          pollTimer = null;
+        }
+        setAnalysis((current) => (current ? { ...current, ...event } : current));
+        
+        if (isFinished(event.status)) {
+          // The stream ends here; close it so EventSource does not reconnect
+          stopped = true;
+          source.close();
+          // Load the full results if the analysis finished while we watched
+          if (lastStatus !== null && lastStatus !== event.status) {
+            fetchAnalysis();
+          }
+        }
+        lastStatus = event.status ?? lastStatus;
+      };
+      source.onerror = () => {
+        // EventSource retries on its own unless the server rejected it,
+        // e.g. because the stream token expired: then open with a new one,
+        // and keep polling in case that fails too
+        if (source.readyState === EventSource.CLOSED && !stopped) {
+          startPolling();
+          if (reopenAttempts < MAX_STREAM_REOPENS) {
+            reopenAttempts += 1;
+            console.warn('⚠️ Results: Event stream closed, reopening...');
+            setTimeout(openStream, 1000 * reopenAttempts);
+          }
+        }
+      };
+    };
+    openStream();
+    
+    return () => {
+      stopped = true;
+      if (source) source.close();
+      if (pollTimer) clearInterval(pollTimer);
+    };
   }, [id]);
 
   const fetchAnalysis = async () => {
@@ -150,8 +232,27 @@ const Results = () => {
               <p className="text-blue-700 text-sm">
                 Your genomic data is being analyzed. This page will update automatically.
               </p>
+              {analysis.status === 'pending' && analysis.queue_position > 0 && (
+                <p className="text-blue-700 text-sm mt-1">
+                  Position in queue: {analysis.queue_position}
+                </p>
+              )}
             </div>
           </div>
+          {analysis.status === 'processing' && analysis.progress != null && (
+            <div className="mt-4">
+              <div className="flex justify-between text-sm text-blue-800 mb-1">
+                <span className="capitalize">{analysis.stage || 'processing'}</span>
+                <span>{analysis.progress}%</span>
+              </div>
+              <div className="w-full bg-blue-100 rounded-full h-2">
+                <div
+                  className="bg-blue-600 h-2 rounded-full transition-all"
+                  style={{ width: `${analysis.progress}%` }}
+                ></div>
+              </div>
+            </div>
+          )}
         </div>
       )}
 
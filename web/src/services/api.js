@@ -57,6 +57,11 @@ export const analysisAPI = {
     });
   },
   getResult: (id) => api.get(`/analysis/results/${id}`),
+  // EventSource cannot send an Authorization header, so the stream takes a
+  // short-lived token scoped to one analysis in its query string
+  createEventsToken: (id) => api.post(`/analysis/results/${id}/events/token`),
+  eventsUrl: (id, streamToken) =>
+    `${API_BASE_URL}/analysis/results/${id}/events?token=${encodeURIComponent(streamToken)}`,
   getHistory: () => api.get('/analysis/history'),
   deleteAnalysis: (id) => api.delete(`/analysis/results/${id}`),
   downloadReport: (id) => {